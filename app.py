@@ -3,9 +3,10 @@ import streamlit as st
 
 # 引入模組
 from storage import init_session_state
-from utils.section_detector import classify_document_sections
 from ui.file_upload import (
+    uploaded_file_hash,
     handle_file_upload,
+    load_reference_paragraphs,
     display_citation_analysis,
     display_reference_parsing
 )
@@ -14,7 +15,7 @@ from ui.comparison_ui import (
     display_comparison_results,
     run_comparison 
 )
-from citation.in_text_extractor import extract_in_text_citations
+from ui.stage_cache import split_document_stage, extract_citations_stage
 from utils.i18n import get_text  # [新增] 匯入翻譯函式
 
 # ==================== 頁面設定 ====================
@@ -42,6 +43,9 @@ with st.sidebar:
     
     st.markdown("---")
 
+    # 2. 只檢查參考文獻（尾端讀取，不解析內文）
+    ref_only = st.checkbox(get_text("ref_only_mode"), key="ref_only_mode")
+
 # ==================== 主區域 ====================
 st.title(get_text("page_title"))
 
@@ -62,48 +66,55 @@ if not uploaded_file and (st.session_state.in_text_citations or st.session_state
     st.info(get_text("show_imported"))
 
 elif uploaded_file:
-    # 檢查是否為新檔案
-    current_file_id = f"{uploaded_file.name}_{uploaded_file.size}"
+    # 檢查是否為新檔案（以內容雜湊識別，同名同大小的不同檔案也能分辨；同一次上傳只雜湊一次）
+    current_file_id = uploaded_file_hash(uploaded_file)
     
     # [關鍵修改] 判斷是否為新檔案，如果是，重置狀態並準備重新分析
     if st.session_state.get('last_file_id') != current_file_id:
         st.session_state.in_text_citations = []
         st.session_state.reference_list = []
+        st.session_state.reference_index = None
         st.session_state.missing_refs = []
         st.session_state.unused_refs = []
         st.session_state.comparison_done = False # 重置比對狀態
+        st.session_state.comparison_hash = None
+        st.session_state.section_map = None
         st.session_state.last_file_id = current_file_id
     
+    # 只檢查參考文獻：從檔尾讀到參考文獻標題即停止，不分析內文與交叉比對
+    if ref_only:
+        display_reference_parsing(
+            load_reference_paragraphs(uploaded_file, file_hash=current_file_id),
+            file_hash=current_file_id, source="tail"
+        )
+        if st.session_state.reference_list:
+            st.subheader(get_text("ref_detail_header"))
+            from ui.components import display_reference_details_paginated
+            display_reference_details_paginated(
+                st.session_state.reference_list,
+                format_type=st.session_state.get("format_type", "APA")
+            )
+        st.stop()
+
     # 讀取檔案
-    all_paragraphs = handle_file_upload(uploaded_file)
+    document = handle_file_upload(uploaded_file, file_hash=current_file_id)
 
-    # 分離內文與參考文獻
-    content_paras, ref_paras, ref_start_idx, ref_keyword = classify_document_sections(all_paragraphs)
+    # 區段地圖 + 內文/參考文獻分離（統計式頁首頁尾偵測也在此時完成，內文與參考文獻都依此排除）
+    # 以下各分析階段都以檔案雜湊快取，rerun 時直接取回結果
+    sections = split_document_stage(current_file_id, document)
+    st.session_state.section_map = sections["section_map"]
+    content_paras = sections["content_paras"]
+    ref_paras = sections["ref_paras"]
 
     # 1. 先解析參考文獻（總覽統計）
-    display_reference_parsing(ref_paras)
-
-    # 2. 分析內文引用（但先不顯示，只解析存入 session）
-    reference_list = st.session_state.get('reference_list', [])
-    in_text_citations = extract_in_text_citations(content_paras, reference_list)
-    # 轉換為可序列化格式並存入 session
-    serializable_citations = []
-    for cite in in_text_citations:
-        cite_dict = {
-            'author': cite.get('author'),
-            'co_author': cite.get('co_author'),
-            'year': cite.get('year'),
-            'ref_number': cite.get('ref_number'),
-            'all_numbers': cite.get('all_numbers'),
-            'original': cite.get('original'),
-            'normalized': cite.get('normalized'),
-            'position': cite.get('position'),
-            'type': cite.get('type'),
-            'format': cite.get('format'),
-            'matched_ref_index': cite.get('matched_ref_index')
-        }
-        serializable_citations.append(cite_dict)
-    st.session_state.in_text_citations = serializable_citations
+    display_reference_parsing(ref_paras, file_hash=current_file_id)
+
+    # 2. 分析內文引用（但先不顯示，只以可序列化格式存入 session）
+    st.session_state.in_text_citations = extract_citations_stage(
+        current_file_id, content_paras,
+        st.session_state.get('reference_list', []),
+        st.session_state.get('reference_index')
+    )
 
     # 3. 自動執行交叉比對
     if st.session_state.in_text_citations and st.session_state.reference_list:
@@ -127,13 +138,13 @@ elif uploaded_file:
     # 6. 參考文獻逐筆解析結果
     if st.session_state.reference_list:
         st.subheader(get_text("ref_detail_header"))  # [修改] 替換中文
-        from ui.components import display_reference_with_details
-        
-        parsed_refs = st.session_state.reference_list
-        format_type = st.session_state.get("format_type", "APA")
-        
-        for idx, ref in enumerate(parsed_refs, 1):
-            display_reference_with_details(ref, idx, format_type=format_type)
+        from ui.components import display_reference_details_paginated
+
+        # 分頁顯示：只建立目前頁面的 expander，長篇文獻列表 rerun 時不必全部重繪
+        display_reference_details_paginated(
+            st.session_state.reference_list,
+            format_type=st.session_state.get("format_type", "APA")
+        )
         
         st.markdown("---")
 
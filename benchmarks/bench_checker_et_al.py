@@ -0,0 +1,101 @@
+"""
+交叉比對「等人」引用的效能比較：逐筆掃描 reference_list vs (第一作者, 年份) 索引
+
+用法（於專案根目錄執行）：
+    python -m benchmarks.bench_checker_et_al [文獻筆數] [引用筆數] [重複次數]
+預設 1000 筆文獻 × 10000 則引用，資料為隨機產生的中英文作者
+"""
+import random
+import sys
+import time
+
+from checker import check_references
+from citation.citation_matcher import (
+    build_reference_index,
+    find_et_al_reference,
+    normalize_reference_author,
+    normalize_year
+)
+
+_SURNAMES = ["Smith", "Chen", "Wang", "Lee", "Kim", "Garcia", "Müller", "Brown", "Park", "Lin"]
+_ZH_NAMES = ["王小明", "李大華", "陳一心", "林志玲", "張家豪", "黃淑芬", "吳建宏", "劉美君"]
+
+
+def _make_data(n_refs, n_cits, seed=0):
+    """產生 n_refs 筆文獻與 n_cits 則「等人」引用（約一成引用找不到對應文獻）"""
+    rng = random.Random(seed)
+    refs = []
+    for i in range(n_refs):
+        if rng.random() < 0.5:
+            first = f"{rng.choice(_SURNAMES)}{i}, {rng.choice('ABCDEFG')}."
+        else:
+            first = f"{rng.choice(_ZH_NAMES)}{i}"
+        year = str(rng.randint(1990, 2024))
+        refs.append({
+            "authors": [first, "Other, B.", "Third, C."],
+            "year": year,
+            "original": f"{first} et al. ({year}). Title.",
+        })
+
+    cits = []
+    for _ in range(n_cits):
+        ref = rng.choice(refs)
+        surname = ref["authors"][0].split(",")[0]
+        year = ref["year"] if rng.random() < 0.9 else "1800"
+        if rng.random() < 0.5:
+            original = f"({surname} et al., {year})"
+        else:
+            original = f"{surname}等人({year})"
+        cits.append({"format": "APA", "author": surname, "year": year, "original": original})
+    return refs, cits
+
+
+def _linear_et_al_lookup(reference_list, cit_author, cit_year):
+    """改版前的作法：每則引用都逐筆重新標準化文獻的第一作者與年份"""
+    for ref_idx, ref in enumerate(reference_list):
+        ref_authors = ref.get("authors") or ref.get("author")
+        ref_year = normalize_year(ref.get("year"))
+        if isinstance(ref_authors, list) and ref_authors:
+            ref_first_author = normalize_reference_author(ref_authors[0])
+        else:
+            ref_first_author = normalize_reference_author(ref_authors)
+        if ref_first_author == cit_author and ref_year == cit_year:
+            return ref_idx
+    return None
+
+
+def _best_of(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv):
+    n_refs = int(argv[1]) if len(argv) > 1 else 1000
+    n_cits = int(argv[2]) if len(argv) > 2 else 10000
+    repeat = int(argv[3]) if len(argv) > 3 else 3
+
+    refs, cits = _make_data(n_refs, n_cits)
+    queries = [(normalize_reference_author(c["author"]), normalize_year(c["year"])) for c in cits]
+
+    build_time, index = _best_of(lambda: build_reference_index(refs), repeat)
+    linear = _best_of(lambda: [_linear_et_al_lookup(refs, a, y) for a, y in queries], 1)
+    indexed = _best_of(lambda: [find_et_al_reference(index, a, y) for a, y in queries], repeat)
+    full = _best_of(lambda: check_references(cits, refs, reference_index=index), repeat)
+
+    print(f"refs x cits : {n_refs} x {n_cits}")
+    print(f"index build : {build_time * 1000:8.1f} ms")
+    print(f"linear scan : {linear[0] * 1000:8.1f} ms")
+    print(f"index lookup: {indexed[0] * 1000:8.1f} ms")
+    print(f"speedup     : {linear[0] / indexed[0]:.0f}x")
+    print(f"identical   : {linear[1] == indexed[1]}")
+    print(f"check_references (with index): {full[0] * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,54 @@
+"""
+DOCX 讀取效能比較：iterparse 快速路徑 vs python-docx 物件模型
+
+用法（於專案根目錄執行）：
+    python -m benchmarks.bench_docx_reader thesis.docx [重複次數]
+"""
+import io
+import sys
+import time
+import tracemalloc
+
+from utils.file_reader import (
+    iter_docx_paragraphs,
+    _extract_paragraphs_from_docx_model
+)
+
+
+def _measure(reader, data, repeat):
+    """回傳 (最佳耗時秒數, 峰值記憶體 bytes, 段落列表)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = reader(io.BytesIO(data))
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    reader(io.BytesIO(data))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+    with open(argv[1], "rb") as f:
+        data = f.read()
+    repeat = int(argv[2]) if len(argv) > 2 else 5
+
+    fast = _measure(lambda f: list(iter_docx_paragraphs(f)), data, repeat)
+    model = _measure(_extract_paragraphs_from_docx_model, data, repeat)
+
+    print(f"paragraphs : {len(model[2])}")
+    print(f"iterparse  : {fast[0] * 1000:8.1f} ms  peak {fast[1] / 1024:8.0f} KiB")
+    print(f"python-docx: {model[0] * 1000:8.1f} ms  peak {model[1] / 1024:8.0f} KiB")
+    print(f"speedup    : {model[0] / fast[0]:.1f}x")
+    print(f"identical  : {fast[2] == model[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,7 +1,12 @@
 import re
+from citation.citation_matcher import (
+    ensure_reference_index,
+    find_et_al_reference,
+    resolve_citation_form
+)
 
 # ===== 交叉比對 =====
-def check_references(in_text_citations, reference_list):
+def check_references(in_text_citations, reference_list, reference_index=None, trust_matched_index=False):
     """
     直接使用已解析並存入 JSON 的參考文獻資料
     
@@ -15,6 +20,9 @@ def check_references(in_text_citations, reference_list):
     Args:
         in_text_citations: 內文引用列表（包含 format, author, year, ref_number 等）
         reference_list: 參考文獻列表（已解析的 JSON 資料）
+        reference_index: build_reference_index(reference_list) 的結果；未提供時在此建立
+        trust_matched_index: True 時，APA 引用若已有擷取階段比對到的 matched_ref_index 就直接採用，
+                             只有未比對到的引用才用下面的作者-年份規則重新比對
     
     Returns:
         missing_in_refs: 遺漏的參考文獻列表
@@ -22,307 +30,20 @@ def check_references(in_text_citations, reference_list):
         year_error_refs: 年份錯誤的參考文獻列表
     """
     
-    # --- 從內文引用原始文本提取第一作者 ---
-    def extract_first_author_from_citation(cit):
-        """
-        從內文引用的原始文本中提取第一作者
-        
-        處理多種格式：
-        - 1 位作者: (Smith, 2020) 或 Smith (2020)
-        - 2 位作者: (Smith & Jones, 2020) 或 Smith and Jones (2020)
-        - 3 位以上: (Smith et al., 2020) 或 Smith et al. (2020)
-        
-        Args:
-            cit: 內文引用字典（包含 original, author 等欄位）
-        
-        Returns:
-            第一作者的姓名字串，如果無法提取則返回 None
-        """
-        # 優先使用已解析的 author 欄位（如果存在且是單一作者）
-        if cit.get('author'):
-            author_str = str(cit['author'])
-            # 清理多余空格（处理 "Pak     et al." 这种情况）
-            author_str = re.sub(r'\s+', ' ', author_str).strip()
-            
-            # 如果 author 欄位中不包含連接詞（&, and, 與, 和, et al.），則直接使用
-            if not re.search(r'\s+&\s+|\s+and\s+|、|與|et\s+al\.?|等人', author_str, re.IGNORECASE):
-                return author_str
-            
-            # 如果包含 et al.，從 author 字段提取第一作者（不需要回退到原始文本）
-            if re.search(r'et\s+al\.?|等人|等', author_str, re.IGNORECASE):
-                author_cleaned = re.sub(r'\s+et\s+al\.?.*$', '', author_str, flags=re.IGNORECASE)
-                author_cleaned = re.sub(r'等人.*$', '', author_cleaned)  # 移除空格要求
-                author_cleaned = re.sub(r'\s*等(?![^\u4e00-\u9fff]).*$', '', author_cleaned)
-                author_cleaned = author_cleaned.strip()
-                # 清理多余空格并提取第一作者（处理可能的顿号分隔的多作者情况）
-                author_cleaned = re.sub(r'\s+', ' ', author_cleaned).strip()
-                first_author = re.split(r'\s+&\s+|\s+and\s+|、|與', author_cleaned)[0].strip()
-                return re.sub(r'\s+', ' ', first_author).strip()
-            
-            # 如果包含雙作者連接詞，提取第一個作者
-            if re.search(r'\s+&\s+|\s+and\s+|、|與', author_str):
-                first_author = re.split(r'\s+&\s+|\s+and\s+|、|與', author_str)[0].strip()
-                return re.sub(r'\s+', ' ', first_author).strip()
-        
-        # 否則從原始文本中提取
-        original_text = cit.get('original', '')
-        if not original_text:
-            return None
-        
-        # 先清理原始文本中的多余空格（处理 "Pak  et al." 这种情况）
-        original_text = re.sub(r'\s+', ' ', original_text)
-        
-        # 處理多引用情況：如果包含分號，提取第一個引用部分
-        # 例如："(Smith et al., 2020; Andy et al., 2021; Bob et al., 2022)" → "(Smith et al., 2020)"
-        if re.search(r'[;；]', original_text):
-            # 找到第一個分號的位置
-            semicolon_match = re.search(r'[;；]', original_text)
-            if semicolon_match:
-                # 提取第一個分號之前的所有內容
-                first_part = original_text[:semicolon_match.start()].strip()
-                # 確保以左括號開頭（如果沒有，添加）
-                if not first_part.startswith(('(', '（')):
-                    first_part = '(' + first_part
-                # 確保以右括號結尾：找到第一個年份後添加右括號
-                year_match = re.search(r'\d{4}[a-z]?', first_part)
-                if year_match:
-                    # 提取到年份結束位置，然後添加右括號
-                    end_pos = year_match.end()
-                    # 移除年份之後可能存在的右括號或分號
-                    first_part_clean = first_part[:end_pos].rstrip(')）;；,，')
-                    original_text = first_part_clean + ')'
-                else:
-                    # 如果沒找到年份，保持原樣
-                    original_text = first_part
-        
-        # 處理括號式: (作者, 年份) 或 (作者 & 作者, 年份) 或 (作者 et al., 年份)
-        paren_match = re.search(
-            r'[（(]\s*([\w\s\u4e00-\u9fff\-\.]+?)(?:\s*(?:&|and|與|、)\s*[\w\s\u4e00-\u9fff\-\.]+?)*(?:\s*,?\s*et\s*al\.?)?\s*[,，]\s*\d{4}',
-            original_text,
-            re.IGNORECASE | re.UNICODE
-        )
-        if paren_match:
-            author_part = paren_match.group(1).strip()
-            # 清理多余空格
-            author_part = re.sub(r'\s+', ' ', author_part).strip()
-            
-            # 移除逗號及其後的內容（例如 "Hundhausen, C. D." → "Hundhausen"）
-            author_part = re.sub(r',.*$', '', author_part).strip()
-            
-            # 如果包含 et al.，先移除 et al. 部分
-            if re.search(r'et\s+al\.?|等人|等', author_part, re.IGNORECASE):
-                author_part = re.sub(r'\s+et\s+al\.?.*$', '', author_part, flags=re.IGNORECASE)
-                author_part = re.sub(r'\s*等人.*$', '', author_part)
-                author_part = re.sub(r'\s*等(?![^\u4e00-\u9fff]).*$', '', author_part)  # 只匹配「等」後面不是中文的情況
-                author_part = author_part.strip()
-            
-            # 提取第一個作者（去除可能的連接詞：&, and, 與, 和）
-            first_author = re.split(r'\s+&\s+|\s+and\s+|、|與', author_part)[0].strip()
-            # 再次清理多余空格
-            first_author = re.sub(r'\s+', ' ', first_author).strip()
-            return first_author
-        
-        # 處理敘述式: 作者 (年份) 或 作者 & 作者 (年份) 或 作者 et al. (年份)
-        # 找到括號前的文本部分，提取作者名
-        # 匹配模式：任意文本 + 作者部分 + (年份)
-        narrative_match = re.search(
-            r'([\w\u4e00-\u9fff][^（(]*?)\s*[（(]\s*\d{4}',
-            original_text,
-            re.IGNORECASE | re.UNICODE
-        )
-        if narrative_match:
-            # 獲取括號前的文本，然後提取最後的作者部分
-            text_before_paren = narrative_match.group(1).strip()
-            # 清理多余空格
-            text_before_paren = re.sub(r'\s+', ' ', text_before_paren).strip()
-            
-            # 如果包含 et al.，提取 et al. 前的部分
-            if re.search(r'et\s+al\.?|等人|等', text_before_paren, re.IGNORECASE):
-                # 移除 et al. 及之後的內容（注意：et 和 al 之間可能有多余空格）
-                author_part = re.sub(r'\s+et\s+al\.?.*$', '', text_before_paren, flags=re.IGNORECASE)
-                author_part = re.sub(r'\s*等人.*$', '', author_part)
-                author_part = re.sub(r'\s*等(?![^\u4e00-\u9fff]).*$', '', author_part)  # 只匹配「等」後面不是中文的情況
-            else:
-                author_part = text_before_paren
-            
-            # 清理多余空格
-            author_part = re.sub(r'\s+', ' ', author_part).strip()
-            
-            # 如果包含雙作者連接詞，提取第一個作者
-            if re.search(r'\s+&\s+|\s+and\s+|、|與', author_part):
-                first_author = re.split(r'\s+&\s+|\s+and\s+|、|與', author_part)[0].strip()
-                # 清理多余空格
-                first_author = re.sub(r'\s+', ' ', first_author).strip()
-                return first_author
-            
-            # 單一作者：取最後的單詞或詞組（因為前面可能有其他文本）
-            # 例如："根據Smith (2020)" → 提取 "Smith"
-            # 例如："Smith (2020)" → 提取 "Smith"
-            words = re.findall(r'[\w\u4e00-\u9fff]+', author_part)
-            if words:
-                # 如果是中文，可能有多個字組成姓名；如果是英文，取最後一個單詞（通常是姓氏）
-                if any('\u4e00' <= char <= '\u9fff' for char in author_part):
-                    # 中文：取最後的1-4個字（通常是姓名）
-                    chinese_chars = re.findall(r'[\u4e00-\u9fff]+', author_part)
-                    if chinese_chars:
-                        result = chinese_chars[-1]  # 取最後的中文詞組
-                        # 清理多余空格
-                        return re.sub(r'\s+', ' ', result).strip()
-                else:
-                    # 英文：取最後一個單詞（通常是姓氏）
-                    result = words[-1] if words else author_part
-                    # 清理多余空格
-                    return re.sub(r'\s+', ' ', result).strip()
-            
-            # 清理多余空格
-            return re.sub(r'\s+', ' ', author_part).strip()
-        
-        # 如果都無法匹配，返回 None
-        return None
-    
-    # --- 標準化作者姓名以便比對 ---
-    def normalize_author(author_data):
-        """
-        將作者資料標準化為可比對的格式
-        
-        Args:
-            author_data: 可能是字串、列表或 None
-        
-        Returns:
-            標準化後的作者姓名（小寫、去除特殊符號）
-        """
-        if not author_data:
-            return ""
-        
-        # 如果是列表，取第一作者
-        if isinstance(author_data, list):
-            if not author_data:
-                return ""
-            author_str = str(author_data[0])
-            # 只保留姓氏部分（移除逗號及其後的內容，例如 "Hundhausen, C. D." → "Hundhausen"）
-            author_str = re.sub(r',.*$', '', author_str).strip()
-        else:
-            author_str = str(author_data)
-        
-        # 先清理多余空格（处理 "Pak  et al." 这种情况）
-        author_str = re.sub(r'\s+', ' ', author_str).strip()
-        
-        # 轉小寫
-        author_str = author_str.lower()
-        
-        # 移除常見的綴詞和連接詞
-        for junk in ['et al.', 'et al', 'and', '&', ',', '與', '和', '及', '等人', '等', '.', '、']:
-            author_str = author_str.replace(junk, ' ')
-        
-        # 再次清理多余空格（因为替换后可能产生多余空格）
-        author_str = re.sub(r'\s+', ' ', author_str).strip()
-        
-        # 提取核心姓名部分
-        # 中文：保留所有漢字和字母數字
-        # 英文：取第一個單詞（通常是姓氏）
-        if any('\u4e00' <= char <= '\u9fff' for char in author_str):
-            # 中文作者：保留所有字母數字字元
-            core = "".join(filter(lambda c: c.isalnum() or '\u4e00' <= c <= '\u9fff', author_str))
-        else:
-            # 英文作者：取第一個單詞
-            parts = author_str.split()
-            if parts:
-                core = "".join(filter(str.isalnum, parts[0]))
-            else:
-                core = ""
-        
-        return core.strip()
-    
-    # --- 標準化年份 ---
-    def normalize_year(year_data):
-        """
-        提取並標準化年份
-        
-        Args:
-            year_data: 年份資料（可能是字串或數字）
-        
-        Returns:
-            標準化後的年份字串（4位數字）
-        """
-        if not year_data:
-            return ""
-        
-        year_str = str(year_data)
-        # 提取4位數年份
-        digits = ''.join(filter(str.isdigit, year_str))
-        
-        # 尋找19xx或20xx格式的年份
-        year_match = re.search(r'(19\d{2}|20\d{2})', digits)
-        if year_match:
-            return year_match.group(1)
-        
-        return digits[:4] if len(digits) >= 4 else digits
-    
     # --- 初始化 ---
     matched_indices = set()  # 記錄已比對到的參考文獻索引
     missing_in_refs = []     # 內文有引用但參考文獻缺漏
     missing_in_refs_set = set()  # 用於去重：記錄已添加的遺漏引用標識符
     year_mismatch_map = {}   # 作者匹配但年份不符
     
-    # --- 1. 建立參考文獻快速查找表 ---
-    
+    # --- 1. 參考文獻快速查找表（session 中已建好的 ReferenceIndex 直接沿用）---
+    reference_index = ensure_reference_index(reference_list, reference_index)
     # IEEE 格式：以編號為 key
-    ref_map_by_number = {}
-    # APA 格式：以 (作者, 年份) 為 key
-    ref_map_by_author_year = {}
+    ref_map_by_number = reference_index['checker_by_number']
+    # APA 格式：以 (作者, 年份) 為 key（完整作者與第一作者）
+    ref_map_by_author_year = reference_index['checker_by_author_year']
     # 作者索引：以作者為 key，存放所有相關的參考文獻索引
-    ref_map_by_author = {}
-    
-    for i, ref in enumerate(reference_list):
-        # 建立編號索引（IEEE）
-        if ref.get('ref_number'):
-            ref_num = str(ref['ref_number']).strip().strip('.')
-            ref_map_by_number[ref_num] = i
-        
-        # 建立作者-年份索引（APA）
-        ref_authors = ref.get('authors') or ref.get('author')
-        ref_year = normalize_year(ref.get('year'))
-        
-        # 【修改】同時建立「完整作者」和「第一作者」的索引
-        # 完整作者索引（用於精確匹配）
-        ref_author_full = normalize_author(ref_authors)
-        if ref_author_full and ref_year:
-            key = (ref_author_full, ref_year)
-            ref_map_by_author_year[key] = i
-        
-        # 【新增】第一作者索引（用於「等人」匹配）
-        if isinstance(ref_authors, list) and ref_authors:
-            first_author_raw = ref_authors[0]
-            
-            # 【修正】如果第一個元素包含頓號，表示作者被打包在一個字串裡，需要拆分
-            if isinstance(first_author_raw, str) and '、' in first_author_raw:
-                # 拆分作者字串，取第一個作者
-                first_author_raw = first_author_raw.split('、')[0].strip()
-            
-            ref_first_author = normalize_author(first_author_raw)
-        else:
-            # 字串格式，可能也包含多個作者
-            if isinstance(ref_authors, str) and '、' in ref_authors:
-                first_author_raw = ref_authors.split('、')[0].strip()
-                ref_first_author = normalize_author(first_author_raw)
-            else:
-                ref_first_author = normalize_author(ref_authors)
-
-        if ref_first_author and ref_year:
-            key_first = (ref_first_author, ref_year)
-            # 如果這個 key 還沒有被佔用，才加入（避免覆蓋完整作者索引）
-            if key_first not in ref_map_by_author_year:
-                ref_map_by_author_year[key_first] = i
-        
-        # 建立作者索引（用於年份錯誤檢測）
-        if ref_author_full:
-            if ref_author_full not in ref_map_by_author:
-                ref_map_by_author[ref_author_full] = []
-            ref_map_by_author[ref_author_full].append({
-                'index': i,
-                'year': ref_year,
-                'original': ref.get('original', '')
-            })
+    ref_map_by_author = reference_index['checker_by_author']
     
     # --- 2. 遍歷內文引用，進行比對 ---
     for cit in in_text_citations:
@@ -351,42 +72,26 @@ def check_references(in_text_citations, reference_list):
             if any_matched:
                 is_found = True
         
+        # 路徑 A2: APA 格式引用直接採用擷取階段的比對結果（與內文引用列表顯示的一致）
+        if not is_found and trust_matched_index and cit.get('format') == 'APA':
+            matched_ref_index = cit.get('matched_ref_index')
+            if (isinstance(matched_ref_index, int) and not isinstance(matched_ref_index, bool)
+                    and 0 <= matched_ref_index < len(reference_list)):
+                matched_indices.add(matched_ref_index)
+                is_found = True
+        
         # 路徑 B: APA 格式引用（使用作者-年份比對）
         if not is_found and cit.get('format') == 'APA':
-            # 改進：先從內文引用原始文本提取第一作者（處理多作者情況）
-            first_author_str = extract_first_author_from_citation(cit)
-            if not first_author_str:
-                # 如果無法從原始文本提取，回退到使用 author 欄位
-                first_author_str = cit.get('author')
-            
-            cit_author = normalize_author(first_author_str)
-            cit_year = normalize_year(cit.get('year'))
+            # 先從內文引用原始文本提取第一作者（處理多作者情況），並檢查是否為「等人」格式
+            cit_author, cit_year, is_et_al_citation = resolve_citation_form(cit)
             
             if cit_author and cit_year:
-                # 【新增】檢查內文引用是否包含「等人」
-                is_et_al_citation = False
-                cit_original = cit.get('original', '')
-                if re.search(r'等人|等|et\s+al\.?', cit_original, re.IGNORECASE):
-                    is_et_al_citation = True
-                
-                # 【新增】如果是「等人」格式，只用第一作者 + 年份比對所有參考文獻
+                # 【新增】如果是「等人」格式，只用第一作者 + 年份比對（查 (第一作者, 年份) 索引）
                 if is_et_al_citation:
-                    # 遍歷所有參考文獻，找到第一作者 + 年份匹配的
-                    for ref_idx, ref in enumerate(reference_list):
-                        ref_authors = ref.get('authors') or ref.get('author')
-                        ref_year = normalize_year(ref.get('year'))
-                        
-                        # 提取參考文獻的第一作者
-                        if isinstance(ref_authors, list) and ref_authors:
-                            ref_first_author = normalize_author(ref_authors[0])
-                        else:
-                            ref_first_author = normalize_author(ref_authors)
-                        
-                        # 比對：第一作者相同 + 年份相同
-                        if ref_first_author == cit_author and ref_year == cit_year:
-                            matched_indices.add(ref_idx)
-                            is_found = True
-                            break
+                    ref_idx = find_et_al_reference(reference_index, cit_author, cit_year)
+                    if ref_idx is not None:
+                        matched_indices.add(ref_idx)
+                        is_found = True
                 
                 # 如果不是「等人」格式，或者「等人」格式沒找到匹配，則繼續原有的精確匹配邏輯
                 if not is_found:
@@ -422,13 +127,7 @@ def check_references(in_text_citations, reference_list):
             if cit_format == 'APA':
                 # APA 格式：只使用標準化的作者和年份（不依賴原始文本，避免因空格等差異導致重複）
                 if cit_author is None:
-                    first_author_str = extract_first_author_from_citation(cit)
-                    if not first_author_str:
-                        first_author_str = cit.get('author')
-                    cit_author = normalize_author(first_author_str)
-                
-                if cit_year is None:
-                    cit_year = normalize_year(cit.get('year'))
+                    cit_author, cit_year, _ = resolve_citation_form(cit)
                 
                 # 只使用標準化的作者和年份生成唯一鍵
                 if cit_author and cit_year:
@@ -0,0 +1,658 @@
+"""
+內文引用 ↔ 參考文獻比對共用的工具
+- ReferenceIndex（build_reference_index）：每份 reference_list 建一次的作者/年份/編號特徵表，
+  內文引用擷取（in_text_extractor）與交叉比對（checker）都直接查表，不再各自重建索引
+- 多字串自動機（Aho-Corasick）：把每筆文獻可能出現在內文引用中的姓名片段（姓氏、標準化姓名、中文名字）放進同一台自動機，
+  比對時對引用文字只掃描一次，就得到「姓名片段有出現在引用中」的文獻 index 集合（只負責縮小候選範圍）
+- 姓名/年份標準化與內文引用第一作者擷取：正則都預先編譯，並以有上限的 lru_cache 記住結果
+  （同一篇論文中相同的作者字串、引用寫法大量重複），命中率可用 matching_cache_info() 查看
+"""
+import hashlib
+import json
+import re
+from collections import deque
+from functools import lru_cache
+
+# 每個標準化函式最多記住的不同輸入數
+MATCHING_CACHE_SIZE = 8192
+
+_ET_AL_IN_REF_RE = re.compile(r'et\s*al\.?|等人|等', re.IGNORECASE)
+_AUTHOR_SPLIT_RE = re.compile(r'[,;]|\sand\s|\s&\s|、|與')
+_AUTHOR_SEPARATORS = [',', ';', ' and ', ' & ', '、', '與']
+_AFTER_COMMA_RE = re.compile(r',.*$')
+_WHITESPACE_RE = re.compile(r'\s+')
+_YEAR_IN_DIGITS_RE = re.compile(r'(19\d{2}|20\d{2})')
+
+# 內文引用第一作者擷取用
+_CONNECTOR_RE = re.compile(r'\s+&\s+|\s+and\s+|、|與')
+_CONNECTOR_OR_ET_AL_RE = re.compile(r'\s+&\s+|\s+and\s+|、|與|et\s+al\.?|等人', re.IGNORECASE)
+_ET_AL_WORD_RE = re.compile(r'et\s+al\.?|等人|等', re.IGNORECASE)
+_TRAILING_ET_AL_RE = re.compile(r'\s+et\s+al\.?.*$', re.IGNORECASE)
+_TRAILING_DENGREN_RE = re.compile(r'等人.*$')
+_TRAILING_DENGREN_SPACED_RE = re.compile(r'\s*等人.*$')
+# 只匹配「等」後面不是中文的情況
+_TRAILING_DENG_RE = re.compile(r'\s*等(?![^\u4e00-\u9fff]).*$')
+_SEMICOLON_RE = re.compile(r'[;；]')
+_YEAR_TOKEN_RE = re.compile(r'\d{4}[a-z]?')
+_PAREN_AUTHOR_RE = re.compile(
+    r'[（(]\s*([\w\s\u4e00-\u9fff\-\.]+?)(?:\s*(?:&|and|與|、)\s*[\w\s\u4e00-\u9fff\-\.]+?)*(?:\s*,?\s*et\s*al\.?)?\s*[,，]\s*\d{4}',
+    re.IGNORECASE | re.UNICODE
+)
+_NARRATIVE_AUTHOR_RE = re.compile(r'([\w\u4e00-\u9fff][^（(]*?)\s*[（(]\s*\d{4}', re.IGNORECASE | re.UNICODE)
+_WORD_RUN_RE = re.compile(r'[\w\u4e00-\u9fff]+')
+# 內文引用是否為「等人」格式（交叉比對用）
+_ET_AL_CITATION_RE = re.compile(r'等人|等|et\s+al\.?', re.IGNORECASE)
+_CJK_RUN_RE = re.compile(r'[\u4e00-\u9fff]+')
+
+
+def build_surname_automaton(keyword_sets):
+    """
+    建立自動機
+    keyword_sets: 依文獻順序排列，第 i 個元素是第 i 筆文獻的姓名片段（空字串會略過）
+    回傳 dict：goto（每個狀態的轉移表）/ fail（失敗連結）/ out（到達該狀態時命中的文獻 index）
+    """
+    goto = [{}]
+    out = [set()]
+    for ref_idx, keywords in enumerate(keyword_sets):
+        for word in keywords:
+            if not word:
+                continue
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state].add(ref_idx)
+
+    # BFS 建立失敗連結，並把失敗連結上的命中合併進來（較淺的狀態一定先處理完）
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for ch, nxt in goto[state].items():
+            queue.append(nxt)
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            out[nxt] |= out[fail[nxt]]
+
+    return {
+        'goto': goto,
+        'fail': fail,
+        'out': [frozenset(o) for o in out],
+    }
+
+
+def find_keyword_owners(automaton, text):
+    """掃描一次 text，回傳任一姓名片段出現在 text 中的文獻 index 集合"""
+    goto = automaton['goto']
+    fail = automaton['fail']
+    out = automaton['out']
+
+    found = set()
+    state = 0
+    for ch in text:
+        while state and ch not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(ch, 0)
+        if out[state]:
+            found |= out[state]
+    return found
+
+
+# ==================== 姓名/年份標準化 ====================
+
+def _has_cjk(text):
+    return any('\u4e00' <= char <= '\u9fff' for char in text)
+
+
+def normalize_author_name(author):
+    """標準化作者姓名以便比對（內文引用擷取時使用）"""
+    if not author:
+        return ""
+    return _normalize_author_name(str(author))
+
+
+@lru_cache(maxsize=MATCHING_CACHE_SIZE)
+def _normalize_author_name(author_str):
+    author_str = author_str.lower()
+    
+    # 先將頓號替換為空格（避免作者名粘在一起）
+    author_str = author_str.replace('、', ' ')
+    
+    # 移除常見綴詞
+    for junk in ['et al.', 'et al', 'and', '&', ',', '與', '和', '及', '等人', '等', '.']:
+        author_str = author_str.replace(junk, ' ')
+    
+    # 清理多余空格
+    author_str = _WHITESPACE_RE.sub(' ', author_str).strip()
+    
+    # 提取核心姓名
+    if _has_cjk(author_str):
+        # 中文作者
+        core = "".join(filter(lambda c: c.isalnum() or '\u4e00' <= c <= '\u9fff', author_str))
+    else:
+        # 英文作者：取第一個單詞
+        parts = author_str.split()
+        if parts:
+            core = "".join(filter(lambda c: c.isalnum() or c in '-\'', parts[0]))
+        else:
+            core = ""
+    
+    return core.strip()
+
+
+def normalize_reference_author(author_data):
+    """
+    將作者資料標準化為可比對的格式（交叉比對時使用）
+    列表只取第一作者的姓氏部分；英文取第一個單詞，中文保留所有漢字與字母數字
+    """
+    if not author_data:
+        return ""
+    
+    # 如果是列表，取第一作者
+    if isinstance(author_data, list):
+        author_str = str(author_data[0])
+        # 只保留姓氏部分（移除逗號及其後的內容，例如 "Hundhausen, C. D." → "Hundhausen"）
+        author_str = _AFTER_COMMA_RE.sub('', author_str).strip()
+    else:
+        author_str = str(author_data)
+    return _normalize_reference_author(author_str)
+
+
+@lru_cache(maxsize=MATCHING_CACHE_SIZE)
+def _normalize_reference_author(author_str):
+    # 先清理多余空格（处理 "Pak  et al." 这种情况）
+    author_str = _WHITESPACE_RE.sub(' ', author_str).strip()
+    
+    # 轉小寫
+    author_str = author_str.lower()
+    
+    # 移除常見的綴詞和連接詞
+    for junk in ['et al.', 'et al', 'and', '&', ',', '與', '和', '及', '等人', '等', '.', '、']:
+        author_str = author_str.replace(junk, ' ')
+    
+    # 再次清理多余空格（因为替换后可能产生多余空格）
+    author_str = _WHITESPACE_RE.sub(' ', author_str).strip()
+    
+    if _has_cjk(author_str):
+        # 中文作者：保留所有字母數字字元
+        core = "".join(filter(lambda c: c.isalnum() or '\u4e00' <= c <= '\u9fff', author_str))
+    else:
+        # 英文作者：取第一個單詞
+        parts = author_str.split()
+        if parts:
+            core = "".join(filter(str.isalnum, parts[0]))
+        else:
+            core = ""
+    
+    return core.strip()
+
+
+def normalize_year(year):
+    """標準化年份（取 19xx/20xx，否則取前四位數字）"""
+    if not year:
+        return ""
+    return _normalize_year(str(year))
+
+
+@lru_cache(maxsize=MATCHING_CACHE_SIZE)
+def _normalize_year(year_str):
+    digits = ''.join(filter(str.isdigit, year_str))
+    
+    year_match = _YEAR_IN_DIGITS_RE.search(digits)
+    if year_match:
+        return year_match.group(1)
+    
+    return digits[:4] if len(digits) >= 4 else digits
+
+
+def extract_first_author_from_citation(cit):
+    """
+    從內文引用的原始文本中提取第一作者
+
+    處理多種格式：
+    - 1 位作者: (Smith, 2020) 或 Smith (2020)
+    - 2 位作者: (Smith & Jones, 2020) 或 Smith and Jones (2020)
+    - 3 位以上: (Smith et al., 2020) 或 Smith et al. (2020)
+
+    Args:
+        cit: 內文引用字典（包含 original, author 等欄位）
+
+    Returns:
+        第一作者的姓名字串，如果無法提取則返回 None
+    """
+    author = cit.get('author')
+    return _extract_first_author(str(author) if author else None, cit.get('original', ''))
+
+
+@lru_cache(maxsize=MATCHING_CACHE_SIZE)
+def _extract_first_author(author_str, original_text):
+    """extract_first_author_from_citation 的本體：參數都是字串，相同引用寫法直接取快取結果"""
+    # 優先使用已解析的 author 欄位（如果存在且是單一作者）
+    if author_str:
+        # 清理多余空格（处理 "Pak     et al." 这种情况）
+        author_str = _WHITESPACE_RE.sub(' ', author_str).strip()
+
+        # 如果 author 欄位中不包含連接詞（&, and, 與, 和, et al.），則直接使用
+        if not _CONNECTOR_OR_ET_AL_RE.search(author_str):
+            return author_str
+
+        # 如果包含 et al.，從 author 字段提取第一作者（不需要回退到原始文本）
+        if _ET_AL_WORD_RE.search(author_str):
+            author_cleaned = _TRAILING_ET_AL_RE.sub('', author_str)
+            author_cleaned = _TRAILING_DENGREN_RE.sub('', author_cleaned)  # 移除空格要求
+            author_cleaned = _TRAILING_DENG_RE.sub('', author_cleaned)
+            author_cleaned = author_cleaned.strip()
+            # 清理多余空格并提取第一作者（处理可能的顿号分隔的多作者情况）
+            author_cleaned = _WHITESPACE_RE.sub(' ', author_cleaned).strip()
+            first_author = _CONNECTOR_RE.split(author_cleaned)[0].strip()
+            return _WHITESPACE_RE.sub(' ', first_author).strip()
+
+        # 如果包含雙作者連接詞，提取第一個作者
+        if _CONNECTOR_RE.search(author_str):
+            first_author = _CONNECTOR_RE.split(author_str)[0].strip()
+            return _WHITESPACE_RE.sub(' ', first_author).strip()
+
+    # 否則從原始文本中提取
+    if not original_text:
+        return None
+
+    # 先清理原始文本中的多余空格（处理 "Pak  et al." 这种情况）
+    original_text = _WHITESPACE_RE.sub(' ', original_text)
+
+    # 處理多引用情況：如果包含分號，提取第一個引用部分
+    # 例如："(Smith et al., 2020; Andy et al., 2021; Bob et al., 2022)" → "(Smith et al., 2020)"
+    if _SEMICOLON_RE.search(original_text):
+        # 找到第一個分號的位置
+        semicolon_match = _SEMICOLON_RE.search(original_text)
+        if semicolon_match:
+            # 提取第一個分號之前的所有內容
+            first_part = original_text[:semicolon_match.start()].strip()
+            # 確保以左括號開頭（如果沒有，添加）
+            if not first_part.startswith(('(', '（')):
+                first_part = '(' + first_part
+            # 確保以右括號結尾：找到第一個年份後添加右括號
+            year_match = _YEAR_TOKEN_RE.search(first_part)
+            if year_match:
+                # 提取到年份結束位置，然後添加右括號
+                end_pos = year_match.end()
+                # 移除年份之後可能存在的右括號或分號
+                first_part_clean = first_part[:end_pos].rstrip(')）;；,，')
+                original_text = first_part_clean + ')'
+            else:
+                # 如果沒找到年份，保持原樣
+                original_text = first_part
+
+    # 處理括號式: (作者, 年份) 或 (作者 & 作者, 年份) 或 (作者 et al., 年份)
+    paren_match = _PAREN_AUTHOR_RE.search(original_text)
+    if paren_match:
+        author_part = paren_match.group(1).strip()
+        # 清理多余空格
+        author_part = _WHITESPACE_RE.sub(' ', author_part).strip()
+
+        # 移除逗號及其後的內容（例如 "Hundhausen, C. D." → "Hundhausen"）
+        author_part = _AFTER_COMMA_RE.sub('', author_part).strip()
+
+        # 如果包含 et al.，先移除 et al. 部分
+        if _ET_AL_WORD_RE.search(author_part):
+            author_part = _TRAILING_ET_AL_RE.sub('', author_part)
+            author_part = _TRAILING_DENGREN_SPACED_RE.sub('', author_part)
+            author_part = _TRAILING_DENG_RE.sub('', author_part)  # 只匹配「等」後面不是中文的情況
+            author_part = author_part.strip()
+
+        # 提取第一個作者（去除可能的連接詞：&, and, 與, 和）
+        first_author = _CONNECTOR_RE.split(author_part)[0].strip()
+        # 再次清理多余空格
+        first_author = _WHITESPACE_RE.sub(' ', first_author).strip()
+        return first_author
+
+    # 處理敘述式: 作者 (年份) 或 作者 & 作者 (年份) 或 作者 et al. (年份)
+    # 找到括號前的文本部分，提取作者名
+    # 匹配模式：任意文本 + 作者部分 + (年份)
+    narrative_match = _NARRATIVE_AUTHOR_RE.search(original_text)
+    if narrative_match:
+        # 獲取括號前的文本，然後提取最後的作者部分
+        text_before_paren = narrative_match.group(1).strip()
+        # 清理多余空格
+        text_before_paren = _WHITESPACE_RE.sub(' ', text_before_paren).strip()
+
+        # 如果包含 et al.，提取 et al. 前的部分
+        if _ET_AL_WORD_RE.search(text_before_paren):
+            # 移除 et al. 及之後的內容（注意：et 和 al 之間可能有多余空格）
+            author_part = _TRAILING_ET_AL_RE.sub('', text_before_paren)
+            author_part = _TRAILING_DENGREN_SPACED_RE.sub('', author_part)
+            author_part = _TRAILING_DENG_RE.sub('', author_part)  # 只匹配「等」後面不是中文的情況
+        else:
+            author_part = text_before_paren
+
+        # 清理多余空格
+        author_part = _WHITESPACE_RE.sub(' ', author_part).strip()
+
+        # 如果包含雙作者連接詞，提取第一個作者
+        if _CONNECTOR_RE.search(author_part):
+            first_author = _CONNECTOR_RE.split(author_part)[0].strip()
+            # 清理多余空格
+            first_author = _WHITESPACE_RE.sub(' ', first_author).strip()
+            return first_author
+
+        # 單一作者：取最後的單詞或詞組（因為前面可能有其他文本）
+        # 例如："根據Smith (2020)" → 提取 "Smith"
+        # 例如："Smith (2020)" → 提取 "Smith"
+        words = _WORD_RUN_RE.findall(author_part)
+        if words:
+            # 如果是中文，可能有多個字組成姓名；如果是英文，取最後一個單詞（通常是姓氏）
+            if any('\u4e00' <= char <= '\u9fff' for char in author_part):
+                # 中文：取最後的1-4個字（通常是姓名）
+                chinese_chars = _CJK_RUN_RE.findall(author_part)
+                if chinese_chars:
+                    result = chinese_chars[-1]  # 取最後的中文詞組
+                    # 清理多余空格
+                    return _WHITESPACE_RE.sub(' ', result).strip()
+            else:
+                # 英文：取最後一個單詞（通常是姓氏）
+                result = words[-1] if words else author_part
+                # 清理多余空格
+                return _WHITESPACE_RE.sub(' ', result).strip()
+
+        # 清理多余空格
+        return _WHITESPACE_RE.sub(' ', author_part).strip()
+
+    # 如果都無法匹配，返回 None
+    return None
+
+
+def resolve_citation_form(cit):
+    """
+    交叉比對用：從內文引用取得 (標準化第一作者, 標準化年份, 是否為「等人」格式)
+    先從原始文本提取第一作者（處理多作者情況），無法提取時回退到 author 欄位
+    """
+    author = cit.get('author')
+    year = cit.get('year')
+    return _resolve_citation_form(
+        str(author) if author else None, cit.get('original') or '', str(year) if year else None
+    )
+
+
+@lru_cache(maxsize=MATCHING_CACHE_SIZE)
+def _resolve_citation_form(author_str, original_text, year_str):
+    """resolve_citation_form 的本體：參數都是字串，同一種引用寫法只解析一次"""
+    first_author_str = _extract_first_author(author_str, original_text)
+    if not first_author_str:
+        # 無法從原始文本提取，回退到 author 欄位
+        first_author_str = author_str
+    return (
+        normalize_reference_author(first_author_str),
+        normalize_year(year_str),
+        bool(_ET_AL_CITATION_RE.search(original_text)),
+    )
+
+
+def matching_cache_info():
+    """
+    各標準化快取的命中統計：{函式名稱: {hits, misses, maxsize, currsize, hit_rate}}
+    可在處理完真實論文後查看重複程度
+    """
+    info = {}
+    for name, func in (
+        ("normalize_author_name", _normalize_author_name),
+        ("normalize_reference_author", _normalize_reference_author),
+        ("normalize_year", _normalize_year),
+        ("extract_first_author_from_citation", _extract_first_author),
+        ("resolve_citation_form", _resolve_citation_form),
+    ):
+        stats = func.cache_info()._asdict()
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        info[name] = stats
+    return info
+
+
+def clear_matching_caches():
+    """清空標準化快取與統計"""
+    for func in (
+        _normalize_author_name, _normalize_reference_author, _normalize_year,
+        _extract_first_author, _resolve_citation_form
+    ):
+        func.cache_clear()
+
+
+def get_first_author_str(authors):
+    """從 authors 資料中提取第一作者字串"""
+    if not authors:
+        return None
+    
+    if isinstance(authors, list):
+        return authors[0] if authors else None
+    
+    return str(authors)
+
+
+# ==================== ReferenceIndex ====================
+
+def _author_features(name):
+    """
+    單一作者的比對特徵：(原字串, 標準化姓名, 是否中文, 名字, 姓氏)
+    中文：名字 = 去掉第一個字、姓氏 = 第一個字；英文：姓氏 = 逗號前的部分（小寫）
+    """
+    if not name:
+        return None
+    name = str(name)
+    if _has_cjk(name):
+        return (name, normalize_author_name(name), True, name[1:], name[0])
+    return (name, normalize_author_name(name), False, '', name.split(',')[0].strip().lower())
+
+
+def _reference_author_count(authors, original):
+    """作者數量；字串以常見分隔符拆分，原文有 et al./等 而只有一位作者時視為多作者"""
+    if isinstance(authors, list):
+        author_count = len(authors)
+    else:
+        author_str = str(authors)
+        author_count = 1
+        for sep in _AUTHOR_SEPARATORS:
+            if sep in author_str:
+                author_count = len(_AUTHOR_SPLIT_RE.split(author_str))
+                break
+
+    has_et_al = bool(_ET_AL_IN_REF_RE.search(original))
+    if has_et_al and author_count == 1:
+        author_count = 2
+    return author_count, has_et_al
+
+
+def _checker_first_author(ref_authors):
+    """交叉比對的第一作者 key：第一作者字串若用頓號打包多位作者，只取第一位"""
+    if isinstance(ref_authors, list) and ref_authors:
+        first_author_raw = ref_authors[0]
+        if isinstance(first_author_raw, str) and '、' in first_author_raw:
+            first_author_raw = first_author_raw.split('、')[0].strip()
+        return normalize_reference_author(first_author_raw)
+    if isinstance(ref_authors, str) and '、' in ref_authors:
+        return normalize_reference_author(ref_authors.split('、')[0].strip())
+    return normalize_reference_author(ref_authors)
+
+
+def reference_name_keys(author_features):
+    """
+    一筆文獻的姓名片段：APA 比對時只要其中之一出現在引用文字裡才可能判定作者相符
+    （前三位作者的標準化姓名；中文取名字與姓，英文取逗號前的姓氏）
+    """
+    keys = []
+    for feature in author_features:
+        if feature is None:
+            continue
+        _, norm, _, given, surname = feature
+        keys.extend((norm, given, surname))
+    return keys
+
+
+def reference_list_fingerprint(reference_list):
+    """
+    文獻列表的內容雜湊：只取索引用到的欄位（作者、年份、編號、原文）
+    用來判斷 ReferenceIndex 是否仍對應目前的 reference_list（筆數相同但內容不同也能分辨）
+    """
+    payload = json.dumps(
+        [
+            (ref.get('authors') or ref.get('author'), ref.get('year'), ref.get('ref_number'), ref.get('original'))
+            for ref in reference_list
+        ],
+        ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def build_reference_index(reference_list):
+    """
+    由 reference_list 建立 ReferenceIndex（每份文獻列表建一次，存在 session 中給擷取與比對共用）
+    - size / fingerprint：筆數與內容雜湊（reference_list_fingerprint），供 ensure_reference_index 判斷是否過期
+    逐筆陣列（與 reference_list 同順序）：
+    - years / raw_years：標準化年份 / 原始年份
+    - ref_numbers：IEEE 編號（去空白）
+    - author_features：前三位作者的 (原字串, 標準化姓名, 是否中文, 名字, 姓氏)；沒有作者時為 None
+    - author_counts / has_et_al：作者數量（已考慮 et al.）/ 原文是否有 et al.
+    - first_authors：第一作者 (原字串, 小寫)；display_authors：比對成功時顯示的第一作者姓氏
+    - ref_authors / ref_first_authors / et_al_authors：交叉比對用的標準化作者（完整 / 第一作者 / 等人比對）
+    查找表：
+    - by_number / by_year / by_author_year：內文引用擷取用
+    - checker_by_number / checker_by_author_year / checker_by_author：交叉比對用
+    - et_al_by_author_year：(第一作者, 年份) → [文獻 index]（依原順序），「等人」引用比對用
+    - automaton：姓名片段自動機
+    """
+    size = len(reference_list)
+    years = []
+    raw_years = []
+    ref_numbers = []
+    author_features = []
+    author_counts = []
+    has_et_al = []
+    first_authors = []
+    display_authors = []
+    ref_authors_norm = []
+    ref_first_authors = []
+    et_al_authors = []
+
+    by_number = {}
+    by_year = {}
+    by_author_year = {}
+    checker_by_number = {}
+    checker_by_author_year = {}
+    checker_by_author = {}
+    et_al_by_author_year = {}
+
+    for i, ref in enumerate(reference_list):
+        year = normalize_year(ref.get('year'))
+        years.append(year)
+        raw_years.append(ref.get('year'))
+
+        ref_number = None
+        if ref.get('ref_number'):
+            ref_number = str(ref['ref_number']).strip()
+            by_number[ref_number] = i
+            checker_by_number[ref_number.strip('.')] = i
+        ref_numbers.append(ref_number)
+
+        authors = ref.get('authors') or ref.get('author')
+        first_author = get_first_author_str(authors)
+
+        # --- 內文引用擷取用 ---
+        if authors:
+            names = authors[:3] if isinstance(authors, list) else [first_author]
+            author_features.append(tuple(_author_features(name) for name in names))
+            count, et_al = _reference_author_count(authors, ref.get('original') or '')
+            if isinstance(authors, list):
+                display = _AFTER_COMMA_RE.sub('', str(authors[0])).strip()
+            else:
+                display = first_author
+        else:
+            author_features.append(None)
+            count, et_al, display = 0, False, None
+        author_counts.append(count)
+        has_et_al.append(et_al)
+        display_authors.append(display)
+
+        first_author_str = str(first_author) if first_author else ''
+        first_authors.append((first_author_str, first_author_str.lower()))
+
+        if year:
+            by_year.setdefault(year, []).append(i)
+            if authors:
+                first_author_norm = normalize_author_name(first_author)
+                if first_author_norm:
+                    by_author_year[(first_author_norm, year)] = i
+
+        # --- 交叉比對用 ---
+        author_full = normalize_reference_author(authors)
+        first_key = _checker_first_author(authors)
+        ref_authors_norm.append(author_full)
+        ref_first_authors.append(first_key)
+        if isinstance(authors, list) and authors:
+            et_al_author = normalize_reference_author(authors[0])
+        else:
+            et_al_author = normalize_reference_author(authors)
+        et_al_authors.append(et_al_author)
+        if et_al_author and year:
+            et_al_by_author_year.setdefault((et_al_author, year), []).append(i)
+
+        if author_full and year:
+            checker_by_author_year[(author_full, year)] = i
+        # 第一作者 key 不覆蓋完整作者索引
+        if first_key and year and (first_key, year) not in checker_by_author_year:
+            checker_by_author_year[(first_key, year)] = i
+        if author_full:
+            checker_by_author.setdefault(author_full, []).append({
+                'index': i,
+                'year': year,
+                'original': ref.get('original', '')
+            })
+
+    return {
+        'size': size,
+        'fingerprint': reference_list_fingerprint(reference_list),
+        'years': years,
+        'raw_years': raw_years,
+        'ref_numbers': ref_numbers,
+        'author_features': author_features,
+        'author_counts': author_counts,
+        'has_et_al': has_et_al,
+        'first_authors': first_authors,
+        'display_authors': display_authors,
+        'ref_authors': ref_authors_norm,
+        'ref_first_authors': ref_first_authors,
+        'et_al_authors': et_al_authors,
+        'by_number': by_number,
+        'by_year': by_year,
+        'by_author_year': by_author_year,
+        'checker_by_number': checker_by_number,
+        'checker_by_author_year': checker_by_author_year,
+        'checker_by_author': checker_by_author,
+        'et_al_by_author_year': et_al_by_author_year,
+        'automaton': build_surname_automaton(
+            reference_name_keys(features) if features else () for features in author_features
+        ),
+    }
+
+
+def find_et_al_reference(reference_index, first_author, year):
+    """「等人」引用：回傳第一作者與年份都相同的第一筆文獻 index，沒有則回傳 None"""
+    indices = reference_index['et_al_by_author_year'].get((first_author, year))
+    return indices[0] if indices else None
+
+
+def ensure_reference_index(reference_list, reference_index=None):
+    """
+    沿用呼叫端傳入的 ReferenceIndex；沒有、筆數對不上或內容雜湊不同（文獻列表已更換）時重建
+    先比筆數，筆數相同時才計算內容雜湊
+    """
+    if (
+        reference_index is None
+        or reference_index.get('size') != len(reference_list)
+        or reference_index.get('fingerprint') != reference_list_fingerprint(reference_list)
+    ):
+        return build_reference_index(reference_list)
+    return reference_index
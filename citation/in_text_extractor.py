@@ -1,10 +1,265 @@
 import re
+from bisect import bisect_right
 from utils.text_processor import (
     normalize_citation_for_matching,
     is_valid_year
 )
+from citation.citation_matcher import (
+    find_keyword_owners,
+    ensure_reference_index,
+    normalize_year as _normalize_year,
+    get_first_author_str as _get_first_author_str
+)
+
+# ==================== 內文引用 pattern（import 時編譯一次） ====================
+
+# APA 多引用: (作者1, 年份1; 作者2, 年份2; ...)，明確匹配包含至少一個分號的情況
+_APA_MULTI_RE = re.compile(
+    r'[（(]\s*([^)）]+?(?:[;；][^)）]+?)+)\s*[）)]',
+    re.UNICODE
+)
+
+# APA 單一括號式: (作者, 年份) 或 (作者 & 作者, 年份) 或 (作者、作者、作者, 年份)
+_APA_PARENTHETICAL_RE = re.compile(
+    r'(?<![0-9])[（(]\s*'
+    r'('  # group(1): 完整的作者部分
+        # 作者部分不能包含 "p." 或 "pp." 等頁碼標記
+        # 使用負向前瞻確保不會匹配到頁碼
+        r'(?:(?!pp?\.?\s*\d)[\w\s\u4e00-\u9fff&、\-])+?'  # 不允許 p. 或 pp. 後接數字
+        r'(?:(?:\s+(?:et\s*al\.?)|(?:等人?|等)))?'  # 可選的 et al. 或等人
+    r')'
+    r'\s*[,，]\s*'
+    r'(?:pp?\.?\s*\d+(?:[-–—]\d+)?\s*[,，]\s*)?'  # 可選的頁碼在年份之前
+    r'(\d{4}[a-z]?)'  # group(2): 年份
+    r'(?:\s*[,，]?\s*pp?\.?\s*\d+(?:[-–—]\d+)?)?'  # 可選的頁碼：, p654 或 pp. 123-145
+    r'\s*[）)]',
+    re.UNICODE | re.IGNORECASE
+)
+
+# APA 敘述式: 作者 (年份)
+_APA_NARRATIVE_RE = re.compile(
+    r'(?<![0-9])'  # 前面不能是數字
+    r'('  # group(1): 作者部分
+        # 中文作者（2-4個中文字 + 可選的等/等人）
+        r'(?:[\u4e00-\u9fff]{2,4}(?:等人?|等)?)|'
+        # 英文作者/機構（支持連字符、撇號，以及逗號分隔的 et al.）
+        r'(?:[A-Za-z\-\']+(?:\s+[A-Za-z\-\']+){0,4}(?:[\s,]+(?:et\s*al\.?|等人?|等))?)'
+    r')'
+    # 匹配「等人」之後可能出現的連接詞（則表示、指出、發現等）
+    r'(?:則表示|指出|發現|認為|提出|表示|指明|顯示|說明|強調|建議)?'
+    # 可選的多作者連接（雙作者或三作者）
+    r'(?:'
+        # 雙作者:與/和/&/and + 第二作者
+        r'(?:\s*(?:與|和|&|and)\s*'
+            r'(?:'
+                r'(?:[\u4e00-\u9fff]{2,4})|'  # 中文第二作者
+                r'(?:[A-Za-z\-\']+(?:\s+[A-Za-z\-\']+){0,4})'  # 英文第二作者
+            r')'
+        r')|'
+        # 三作者:、第二作者、第三作者（中文頓號連接）
+        r'(?:、[\u4e00-\u9fff]{2,4}、[\u4e00-\u9fff]{2,4})'
+    r')?'
+    r'\s*[（(]\s*'
+    r'(\d{4}[a-z]?)'  # group(2): 年份
+    r'(?:\s*[,，]?\s*pp?\.?\s*\d+(?:[-–—]\d+)?)?'  # 可選的頁碼
+    r'\s*[）)]',
+    re.UNICODE | re.IGNORECASE
+)
+
+# IEEE 數字式範圍: [n]-[m]
+_IEEE_RANGE_RE = re.compile(
+    r'([【\[]\s*\d+\s*[】\]])\s*[–\-\—~～]\s*([【\[]\s*\d+\s*[】\]])',
+    re.UNICODE
+)
+
+# IEEE 數字式: [n] 或 [n,m,k]
+_IEEE_ROBUST_RE = re.compile(
+    r'[【\[]\s*(\d+(?:[–\-\—~～,;\s]+\d+)*)\s*[】\]]', 
+    re.UNICODE
+)
+
+CITATION_PATTERNS = {
+    'apa_multi': _APA_MULTI_RE,
+    'apa_parenthetical': _APA_PARENTHETICAL_RE,
+    'apa_narrative': _APA_NARRATIVE_RE,
+    'ieee_range': _IEEE_RANGE_RE,
+    'ieee_robust': _IEEE_ROBUST_RE,
+}
+
+# 錨點：每種引用都從一個左括號開始（敘述式則包含唯一一個左括號：年份括號）
+_ANCHOR_RE = re.compile(r'[（(\[【]')
+_CLOSE_PAREN_RE = re.compile(r'[）)]')
+# 敘述式在年份括號之前只會出現：英文字母（含 IGNORECASE 對應字）、中文、空白、,.&'-、
+# 掃描時遇到其他字元（第二組）代表敘述式的起點只能在它之後
+_NARRATIVE_SCAN_RE = re.compile(r"(\s+)|[^\sA-Za-z\u0130\u0131\u017f\u212a\u4e00-\u9fff,.&'\-、]")
+# 敘述式在年份括號之前最多只有 14 段空白（第一作者 5 個字 + et al. + 連接詞 + 第二作者 5 個字）
+_NARRATIVE_MAX_GAPS = 16
+
+
+# ==================== 內文修復（一次掃描完成） ====================
+# 四項修復（PDF 斷行殘留字、中文姓名分離、「等人」前的斷裂、英文姓名空白）都以「(年份」結尾，
+# 且年份括號之前只會涉及中文、英文字母、句點與空白。
+# 因此只在每個年份括號與其前方這段文字（修復點）上依序套用四項修復，
+# 其餘文字只需要清理連續空格 → 全文只掃描一次，結果與對全文依序 re.sub 完全相同
+
+_TEXT_REPAIRS = (
+    # 移除 PDF 斷行造成的殘留字
+    # 例如: "究李約德(2004)" → "李約德(2004)", "式葉慧君(2002)" → "葉慧君(2002)"
+    (re.compile(r'([究式論文獻期刊書篇章節段表研指探討析驗證明調查訪談問題方法理模型])([\u4e00-\u9fa5]{2,4}\s*[（(]\s*\d{4})'),
+     r'\2'),
+    # 1. 中文姓名（處理姓氏與名字分離的情況）
+    #    例如: "葉 乃嘉(2013)" → "葉乃嘉(2013)"
+    (re.compile(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff]{2,3})\s*[（(]\s*(\d{4}[a-z]?)\s*[）)]'),
+     r'\1\2(\3)'),
+    # 2. 中文姓名修復（處理「等人」前的斷裂）
+    #    例如: "葉 乃嘉等人(2013)" → "葉乃嘉等人(2013)"
+    (re.compile(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff]{2,3}(?:等人?))\s*[（(]\s*(\d{4}[a-z]?)\s*[）)]'),
+     r'\1\2(\3)'),
+    # 3. 英文姓名修復：姓名與年份括號之間只留一個空白
+    (re.compile(r'([A-Z][a-z]+(?:\s+et\s+al\.?)?)\s+([（(]\s*\d{4}[a-z]?\s*[）)])'),
+     r'\1 \2'),
+)
+# 4. 清理多餘的連續空格（但保留單個空格）
+_MULTI_SPACE_RE = re.compile(r'  +')
+
+# 修復點：一段連續的「中文/英文字母/句點/空白」接著年份括號（可連續多組）
+# 以 (?<!...) 限定從這段文字的開頭開始、*+ 不回溯，整份全文只需線性掃描一次
+_REPAIR_RUN = r'[\u4e00-\u9fffA-Za-z.\s]'
+_TEXT_REPAIR_RE = re.compile(
+    rf'(?P<site>(?<!{_REPAIR_RUN})(?:{_REPAIR_RUN}*+[（(]\s*\d{{4}}[a-z]?\s*[）)]?)+)'
+    r'|(?P<spaces>  +)'
+)
+
+
+def _repair_site(text):
+    """在單一修復點上依序套用四項修復與空格清理"""
+    for pattern, repl in _TEXT_REPAIRS:
+        text = pattern.sub(repl, text)
+    return _MULTI_SPACE_RE.sub(' ', text)
+
+
+def repair_citation_text(content_paragraphs):
+    """
+    串接內文段落並修復 PDF 造成的引用斷裂，只掃描全文一次
+    回傳 (修復後全文, offset_map)；offset_map 供 map_repaired_offset 將修復後位置換回原段落位置
+    """
+    full_text = " ".join(content_paragraphs)
+
+    pieces = []
+    out_starts = []   # 每一片輸出在修復後全文的起點
+    src_starts = []   # 對應的原文（串接後）起點
+    out_pos = 0
+    src_pos = 0
+    for match in _TEXT_REPAIR_RE.finditer(full_text):
+        start, end = match.span()
+        if start > src_pos:
+            out_starts.append(out_pos)
+            src_starts.append(src_pos)
+            pieces.append(full_text[src_pos:start])
+            out_pos += start - src_pos
+        if match.lastgroup == 'site':
+            replacement = _repair_site(match.group())
+        else:
+            replacement = ' '
+        out_starts.append(out_pos)
+        src_starts.append(start)
+        pieces.append(replacement)
+        out_pos += len(replacement)
+        src_pos = end
+
+    out_starts.append(out_pos)
+    src_starts.append(src_pos)
+    pieces.append(full_text[src_pos:])
+
+    # 每個段落在串接全文中的起點（段落間以一個空白相接）
+    para_starts = []
+    offset = 0
+    for para in content_paragraphs:
+        para_starts.append(offset)
+        offset += len(para) + 1
+
+    offset_map = {
+        'out_starts': out_starts,
+        'src_starts': src_starts,
+        'para_starts': para_starts,
+    }
+    return "".join(pieces), offset_map
+
+
+def map_repaired_offset(offset_map, position):
+    """修復後全文的位置 → (段落索引, 段落內位置)；被改寫的片段一律對應到片段起點"""
+    out_starts = offset_map['out_starts']
+    src_starts = offset_map['src_starts']
+    i = bisect_right(out_starts, position) - 1
+    if i < 0:
+        return None, None
+    src = src_starts[i] + (position - out_starts[i])
+    if i + 1 < len(src_starts):
+        src = min(src, src_starts[i + 1])
+
+    para_starts = offset_map['para_starts']
+    para_index = bisect_right(para_starts, src) - 1
+    if para_index < 0:
+        return None, None
+    return para_index, src - para_starts[para_index]
+
+
+def scan_citation_candidates(full_text):
+    """
+    單次由左至右掃描全文，找出五種引用 pattern 的所有匹配
+    回傳 {類型: [match, ...]}，每種類型的 match 序列與對該 pattern 做 finditer 完全相同：
+    - 多引用/括號式只可能從 ( 開始，IEEE 只可能從 [ 開始 → 只在錨點上做 match
+    - 敘述式的匹配只含一個左括號（年份括號），所以起點一定落在前一個左括號之後、
+      最後一個「不可能出現在敘述式中的字元」之後、且往前不超過 _NARRATIVE_MAX_GAPS 段空白
+      → 只在年份括號前的一小段內 search
+    每種類型各自記錄上次匹配結束的位置，與 finditer 一樣不產生重疊的匹配
+    """
+    found = {name: [] for name in CITATION_PATTERNS}
+    last_end = dict.fromkeys(CITATION_PATTERNS, 0)
+    prev_open = -1
+
+    for anchor in _ANCHOR_RE.finditer(full_text):
+        pos = anchor.start()
+        if anchor.group() in '[【':
+            names = ('ieee_range', 'ieee_robust')
+        else:
+            names = ('apa_multi', 'apa_parenthetical')
+        for name in names:
+            if pos >= last_end[name]:
+                match = CITATION_PATTERNS[name].match(full_text, pos)
+                if match:
+                    found[name].append(match)
+                    last_end[name] = match.end()
+        if anchor.group() in '[【':
+            continue
+
+        # 敘述式：以這個左括號為年份括號的匹配
+        lo = max(last_end['apa_narrative'], prev_open + 1)
+        prev_open = pos
+        if lo >= pos:
+            continue
+        close = _CLOSE_PAREN_RE.search(full_text, pos)
+        if not close:
+            continue
+        gaps = []
+        for token in _NARRATIVE_SCAN_RE.finditer(full_text, lo, pos):
+            if token.group(1) is None:
+                lo = token.end()
+                gaps.clear()
+            else:
+                gaps.append(token.end())
+        if len(gaps) > _NARRATIVE_MAX_GAPS:
+            lo = max(lo, gaps[-_NARRATIVE_MAX_GAPS - 1])
+        if lo >= pos:
+            continue
+        match = _APA_NARRATIVE_RE.search(full_text, lo, close.end())
+        if match:
+            found['apa_narrative'].append(match)
+            last_end['apa_narrative'] = match.end()
 
-def extract_in_text_citations(content_paragraphs, reference_list=None):
+    return found
+
+def extract_in_text_citations(content_paragraphs, reference_list=None, reference_index=None):
     """
     提取內文引用，APA 格式直接使用 reference_list 中已解析的 authors 和 year
     
@@ -15,47 +270,13 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
     Args:
         content_paragraphs: 內文段落列表
         reference_list: 已解析的參考文獻列表（包含 authors, year, ref_number 等欄位）
+        reference_index: build_reference_index(reference_list) 的結果；未提供時在此建立
     
     Returns:
         citations: 內文引用列表
     """
-    full_text = " ".join(content_paragraphs)
-
-    # 移除 PDF 斷行造成的殘留字 (在所有正則匹配之前)
-    # 例如: "究李約德(2004)" → "李約德(2004)", "式葉慧君(2002)" → "葉慧君(2002)"
-    full_text = re.sub(
-        r'([究式論文獻期刊書篇章節段表研指探討析驗證明調查訪談問題方法理模型])([\u4e00-\u9fa5]{2,4}\s*[（(]\s*\d{4})',
-        r'\2',  # 只保留第二組(姓名+年份)
-        full_text
-    )
-    
-    # 1. 中文姓名（處理姓氏與名字分離的情況）
-    #    例如: "葉 乃嘉(2013)" → "葉乃嘉(2013)"
-    #    匹配: 單個中文字 + 多個空格 + 2-3個中文字 + (年份)
-    full_text = re.sub(
-        r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff]{2,3})\s*[（(]\s*(\d{4}[a-z]?)\s*[）)]',
-        r'\1\2(\3)',
-        full_text
-    )
-    
-    # 2. 中文姓名修復（處理「等人」前的斷裂）
-    #    例如: "葉 乃嘉等人(2013)" → "葉乃嘉等人(2013)"
-    full_text = re.sub(
-        r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff]{2,3}(?:等人?))\s*[（(]\s*(\d{4}[a-z]?)\s*[）)]',
-        r'\1\2(\3)',
-        full_text
-    )
-    
-    # 3. 英文姓名修復
-    #    例如: "Smith (2020)" → "Smith (2020)"（移除多餘空格）
-    full_text = re.sub(
-        r'([A-Z][a-z]+(?:\s+et\s+al\.?)?)\s+([（(]\s*\d{4}[a-z]?\s*[）)])',
-        r'\1 \2',
-        full_text
-    )
-    
-    # 4. 清理多餘的連續空格（但保留單個空格）
-    full_text = re.sub(r'  +', ' ', full_text)
+    # 串接段落並修復 PDF 斷行造成的引用斷裂 (在所有正則匹配之前)
+    full_text, offset_map = repair_citation_text(content_paragraphs)
 
     citations = []
     citation_ids = set()
@@ -64,41 +285,19 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
     if reference_list is None:
         reference_list = []
     
-    # --- 建立 reference_list 索引 ---
-    ref_by_number = {}      # IEEE: {編號: ref_index}
-    ref_by_year = {}        # APA: {年份: [ref_index列表]}
-    ref_by_author_year = {} # APA精確匹配: {(標準化作者, 年份): ref_index}
-    
-    for i, ref in enumerate(reference_list):
-        # IEEE 編號索引
-        if ref.get('ref_number'):
-            num = str(ref['ref_number']).strip()
-            ref_by_number[num] = i
-        
-        # APA 年份索引
-        year = _normalize_year(ref.get('year'))
-        if year:
-            if year not in ref_by_year:
-                ref_by_year[year] = []
-            ref_by_year[year].append(i)
-            
-            # 建立作者-年份精確索引
-            authors = ref.get('authors') or ref.get('author')
-            if authors:
-                first_author_norm = _normalize_author_name(_get_first_author_str(authors))
-                if first_author_norm:
-                    key = (first_author_norm, year)
-                    ref_by_author_year[key] = i
+    # --- 參考文獻索引（session 中已建好的 ReferenceIndex 直接沿用）---
+    reference_index = ensure_reference_index(reference_list, reference_index)
+    ref_by_number = reference_index['by_number']  # IEEE: {編號: ref_index}
+    # 同一種引用寫法在論文中反覆出現，每種寫法只比對一次：(比對文字, 年份) -> 比對結果
+    resolved_forms = {}
     
     # ==================== 提取內文引用 ====================
-    
+
+    # 一次掃描找出五種 pattern 的匹配，以下依原本順序逐類處理
+    candidates = scan_citation_candidates(full_text)
+
     # --- 1. APA 多引用: (作者1, 年份1; 作者2, 年份2; 作者3, 年份3...) ---
-    # 明確匹配包含至少一個分號的情況，支持多個分號
-    pattern_apa_multi = re.compile(
-        r'[（(]\s*([^)）]+?(?:[;；][^)）]+?)+)\s*[）)]',
-        re.UNICODE
-    )
-    for match in pattern_apa_multi.finditer(full_text):
+    for match in candidates['apa_multi']:
         inner_text = match.group(1)
         # 用分號分割（支持中英文分號），可以處理多個分號的情況
         segments = re.split(r'\s*[;；]\s*', inner_text)
@@ -125,8 +324,8 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
                             raw_author_clean = re.sub(r'\s+', ' ', raw_author_part).strip()
                             seg_with_parens = f"({raw_author_clean}, {raw_year})"  # 改進格式
                             
-                            matched_ref = _match_apa_citation_to_reference(
-                                seg_with_parens, raw_year, ref_by_year, ref_by_author_year, reference_list
+                            matched_ref = _resolve_apa_citation(
+                                seg_with_parens, raw_year, reference_index, resolved_forms
                             )
                             
                             normalized = normalize_citation_for_matching(seg.strip())
@@ -145,23 +344,7 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
                             citation_ids.add(citation_id)
     
     # --- 2. APA 單一括號式: (作者, 年份) 或 (作者 & 作者, 年份) 或 (作者、作者、作者, 年份) ---
-    pattern_apa1 = re.compile(
-        r'(?<![0-9])[（(]\s*'
-        r'('  # group(1): 完整的作者部分
-            # 作者部分不能包含 "p." 或 "pp." 等頁碼標記
-            # 使用負向前瞻確保不會匹配到頁碼
-            r'(?:(?!pp?\.?\s*\d)[\w\s\u4e00-\u9fff&、\-])+?'  # 不允許 p. 或 pp. 後接數字
-            r'(?:(?:\s+(?:et\s*al\.?)|(?:等人?|等)))?'  # 可選的 et al. 或等人
-        r')'
-        r'\s*[,，]\s*'
-        r'(?:pp?\.?\s*\d+(?:[-–—]\d+)?\s*[,，]\s*)?'  # 可選的頁碼在年份之前
-        r'(\d{4}[a-z]?)'  # group(2): 年份
-        r'(?:\s*[,，]?\s*pp?\.?\s*\d+(?:[-–—]\d+)?)?'  # 可選的頁碼：, p654 或 pp. 123-145
-        r'\s*[）)]',
-        re.UNICODE | re.IGNORECASE
-    )
-
-    for match in pattern_apa1.finditer(full_text):
+    for match in candidates['apa_parenthetical']:
         citation_id = f"{match.start()}-{match.end()}"
         if citation_id in citation_ids:
             continue
@@ -228,8 +411,8 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
                     raw_text_cleaned = re.sub(r'\s+and\s+', ' & ', raw_text_cleaned, flags=re.IGNORECASE)
 
             # 用年份和原始文本反向匹配 reference_list
-            matched_ref = _match_apa_citation_to_reference(
-                raw_text_cleaned, raw_year, ref_by_year, ref_by_author_year, reference_list
+            matched_ref = _resolve_apa_citation(
+                raw_text_cleaned, raw_year, reference_index, resolved_forms
             )
             
             normalized = normalize_citation_for_matching(match.group(0))
@@ -248,36 +431,7 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
             citation_ids.add(citation_id)
 
     # --- 3. APA 敘述式: 作者 (年份) ---
-    pattern_apa2 = re.compile(
-        r'(?<![0-9])'  # 前面不能是數字
-        r'('  # group(1): 作者部分
-            # 中文作者（2-4個中文字 + 可選的等/等人）
-            r'(?:[\u4e00-\u9fff]{2,4}(?:等人?|等)?)|'
-            # 英文作者/機構（支持連字符、撇號，以及逗號分隔的 et al.）
-            r'(?:[A-Za-z\-\']+(?:\s+[A-Za-z\-\']+){0,4}(?:[\s,]+(?:et\s*al\.?|等人?|等))?)'
-        r')'
-        # 匹配「等人」之後可能出現的連接詞（則表示、指出、發現等）
-        r'(?:則表示|指出|發現|認為|提出|表示|指明|顯示|說明|強調|建議)?'
-        # 可選的多作者連接（雙作者或三作者）
-        r'(?:'
-            # 雙作者:與/和/&/and + 第二作者
-            r'(?:\s*(?:與|和|&|and)\s*'
-                r'(?:'
-                    r'(?:[\u4e00-\u9fff]{2,4})|'  # 中文第二作者
-                    r'(?:[A-Za-z\-\']+(?:\s+[A-Za-z\-\']+){0,4})'  # 英文第二作者
-                r')'
-            r')|'
-            # 三作者:、第二作者、第三作者（中文頓號連接）
-            r'(?:、[\u4e00-\u9fff]{2,4}、[\u4e00-\u9fff]{2,4})'
-        r')?'
-        r'\s*[（(]\s*'
-        r'(\d{4}[a-z]?)'  # group(2): 年份
-        r'(?:\s*[,，]?\s*pp?\.?\s*\d+(?:[-–—]\d+)?)?'  # 可選的頁碼
-        r'\s*[）)]',
-        re.UNICODE | re.IGNORECASE
-    )
-
-    for match in pattern_apa2.finditer(full_text):
+    for match in candidates['apa_narrative']:
         raw_text = match.group(0)
         raw_year = match.group(2)[:4]
         
@@ -310,8 +464,8 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
             citation_id = f"{match.start()}-{match.end()}"
             if citation_id not in citation_ids:
                 # 用年份和原始文本反向匹配 reference_list
-                matched_ref = _match_apa_citation_to_reference(
-                    raw_text, raw_year, ref_by_year, ref_by_author_year, reference_list
+                matched_ref = _resolve_apa_citation(
+                    raw_text, raw_year, reference_index, resolved_forms
                 )
                 
                 normalized = normalize_citation_for_matching(match.group(0))
@@ -536,11 +690,7 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
                 citation_ids.add(citation_id)
     
     # --- 4. IEEE 數字式範圍: [n]-[m] ---
-    pattern_ieee_range_brackets = re.compile(
-        r'([【\[]\s*\d+\s*[】\]])\s*[–\-\—~～]\s*([【\[]\s*\d+\s*[】\]])',
-        re.UNICODE
-    )
-    for match in pattern_ieee_range_brackets.finditer(full_text):
+    for match in candidates['ieee_range']:
         start_bracket = match.group(1)
         end_bracket = match.group(2)
         
@@ -598,12 +748,7 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
             citation_ids.add(citation_id)
     
     # --- 5. IEEE 數字式: [n] 或 [n,m,k] ---
-    pattern_ieee_robust = re.compile(
-        r'[【\[]\s*(\d+(?:[–\-\—~～,;\s]+\d+)*)\s*[】\]]', 
-        re.UNICODE
-    )
-
-    for match in pattern_ieee_robust.finditer(full_text):
+    for match in candidates['ieee_robust']:
         content_str = match.group(1)
         if re.match(r'^0\b', content_str) or re.search(r'[,;]\s*0\b', content_str):
             continue
@@ -674,64 +819,12 @@ def extract_in_text_citations(content_paragraphs, reference_list=None):
                 'matched_ref_index': matched_index
             })
             citation_ids.add(citation_id)
-            
-    return citations
-
-def _normalize_author_name(author):
-    """標準化作者姓名以便比對"""
-    if not author:
-        return ""
-    
-    author_str = str(author).lower()
-    
-    # 先將頓號替換為空格（避免作者名粘在一起）
-    author_str = author_str.replace('、', ' ')
-    
-    # 移除常見綴詞
-    for junk in ['et al.', 'et al', 'and', '&', ',', '與', '和', '及', '等人', '等', '.']:
-        author_str = author_str.replace(junk, ' ')
-    
-    # 清理多余空格
-    author_str = re.sub(r'\s+', ' ', author_str).strip()
-    
-    # 提取核心姓名
-    if any('\u4e00' <= char <= '\u9fff' for char in author_str):
-        # 中文作者
-        core = "".join(filter(lambda c: c.isalnum() or '\u4e00' <= c <= '\u9fff', author_str))
-    else:
-        # 英文作者：取第一個單詞
-        parts = author_str.split()
-        if parts:
-            core = "".join(filter(lambda c: c.isalnum() or c in '-\'', parts[0]))
-        else:
-            core = ""
-    
-    return core.strip()
 
-def _normalize_year(year):
-    """標準化年份"""
-    if not year:
-        return ""
-    
-    year_str = str(year)
-    digits = ''.join(filter(str.isdigit, year_str))
-    
-    year_match = re.search(r'(19\d{2}|20\d{2})', digits)
-    if year_match:
-        return year_match.group(1)
-    
-    return digits[:4] if len(digits) >= 4 else digits
+    # 對應回原始段落（修復會改變位置，position 仍是修復後全文中的位置）
+    for cite in citations:
+        cite['paragraph_index'] = map_repaired_offset(offset_map, cite['position'])[0]
 
-
-def _get_first_author_str(authors):
-    """從 authors 資料中提取第一作者字串"""
-    if not authors:
-        return None
-    
-    if isinstance(authors, list):
-        return authors[0] if authors else None
-    
-    return str(authors)
+    return citations
 
 def _clean_author_prefix(author_text):
     """清理作者名前的中文雜訊前綴(僅在無法匹配 reference 時使用)"""
@@ -766,14 +859,109 @@ def _clean_author_prefix(author_text):
     
     return clean_author
 
-def _match_apa_citation_to_reference(raw_text, raw_year, ref_by_year, ref_by_author_year, reference_list):
+# 比對時「反向匹配」（引用中的名字是文獻作者的一部分）用到的片段
+_ET_AL_STRIP_RE = re.compile(r'\s*et\s*al\.?|\s*等人')
+_CITATION_EN_NAME_RE = re.compile(r'([A-Za-z\s\-\']+)\s*[（(]\s*\d{4}')
+_CITATION_ZH_NAME_RE = re.compile(r'([\u4e00-\u9fff]{2,})\s*[（(]\s*\d{4}')
+_LEADING_ARTICLE_RE = re.compile(r'^(the|a|an)\s+', re.IGNORECASE)
+_FIRST_WORD_RE = re.compile(r'([A-Za-z\-\']+)')
+
+
+def _surname_in_text(surname, text):
+    """姓氏是否以完整單字（前後不是英文字母）出現在引用文字中"""
+    return bool(re.search(r'(?<![A-Za-z])' + re.escape(surname) + r'(?![A-Za-z])', text, re.IGNORECASE))
+
+
+def _citation_name_parts(raw_text_lower):
+    """
+    引用文字在比對時用到的片段（每則引用只算一次）：
+    移除 et al./等人 後的文字、年份括號前的英文名字與中文名字（反向匹配用，需至少 3 個字）
+    """
+    text_clean = _ET_AL_STRIP_RE.sub('', raw_text_lower)
+
+    en_name = ''
+    match = _CITATION_EN_NAME_RE.search(raw_text_lower)
+    if match:
+        en_name = _LEADING_ARTICLE_RE.sub('', match.group(1).strip())
+        if len(en_name) < 3:
+            en_name = ''
+
+    zh_name = ''
+    match = _CITATION_ZH_NAME_RE.search(raw_text_lower)
+    if match and len(match.group(1)) >= 3:
+        zh_name = match.group(1)
+
+    return text_clean, en_name, zh_name
+
+
+def _prefilter_candidates(raw_text_lower, candidate_indices, reference_index, name_parts):
+    """
+    從同年份的候選文獻中，留下可能判定作者相符的文獻（保持原順序）
+    - 姓名片段出現在引用文字（或移除 et al./等人 後的文字）中
+    - 或引用中的英文/中文名字是該文獻第一作者的一部分
+    """
+    text_clean, en_name, zh_name = name_parts
+    automaton = reference_index['automaton']
+    hits = find_keyword_owners(automaton, raw_text_lower)
+    if text_clean != raw_text_lower:
+        hits |= find_keyword_owners(automaton, text_clean)
+
+    first_authors = reference_index['first_authors']
+    return [
+        i for i in candidate_indices
+        if i in hits
+        or (en_name and en_name in first_authors[i][1])
+        or (zh_name and zh_name in first_authors[i][0])
+    ]
+
+
+def _match_other_author(feature, raw_text_lower, word_boundary):
+    """
+    第二、第三作者的比對：標準化姓名 → 中文名字/姓氏 → 英文姓氏
+    回傳匹配分數（不匹配為 0）
+    """
+    if feature is None:
+        return 0
+    _, norm, is_cjk, given, surname = feature
+
+    if norm and norm in raw_text_lower:
+        return len(norm)
+    if is_cjk:
+        # 中文：先檢查名字部分（去掉姓氏，適用於 "志富" vs "鄭志富"），再檢查姓氏
+        if given and given in raw_text_lower:
+            return len(given)
+        if surname in raw_text_lower:
+            return len(surname)
+        return 0
+    if surname and surname in raw_text_lower:
+        if word_boundary:
+            found = re.search(r'\b' + re.escape(surname) + r'\b', raw_text_lower, re.IGNORECASE)
+        else:
+            found = _surname_in_text(surname, raw_text_lower)
+        if found:
+            return len(surname)
+    return 0
+
+
+def _resolve_apa_citation(raw_text, raw_year, reference_index, resolved_forms):
+    """
+    同一種引用寫法只比對一次，結果記在 resolved_forms 再分送給每個出現位置
+    比對結果只由 (比對文字, 年份) 與 ReferenceIndex 決定，呼叫端只讀取結果不修改
+    """
+    key = (raw_text, raw_year)
+    if key not in resolved_forms:
+        resolved_forms[key] = _match_apa_citation_to_reference(raw_text, raw_year, reference_index)
+    return resolved_forms[key]
+
+
+def _match_apa_citation_to_reference(raw_text, raw_year, reference_index):
     """
     將 APA 格式的內文引用反向匹配到 reference_list
     
     匹配策略：
-    1. 先用年份縮小範圍
+    1. 先用年份縮小範圍，再用姓名片段自動機留下作者可能相符的文獻
     2. 檢查內文引用的作者數量格式（單作者、雙作者、三作者、et al.、機構）
-    3. 在該年份的所有 references 中，找符合作者數量規則且作者名匹配的
+    3. 在候選 references 中，找符合作者數量規則且作者名匹配的
     4. 支援第二作者和第三作者匹配
     
     APA 作者數量規則：
@@ -786,9 +974,7 @@ def _match_apa_citation_to_reference(raw_text, raw_year, ref_by_year, ref_by_aut
     Args:
         raw_text: 原始引用文本，例如 "其中Garrett (2002)" 或 "(Smith & Jones, 2020)" 或 "志富 (2014)"
         raw_year: 提取的年份，例如 "2002"
-        ref_by_year: 年份索引字典
-        ref_by_author_year: 作者-年份精確索引
-        reference_list: 完整的參考文獻列表
+        reference_index: build_reference_index 建立的 ReferenceIndex（作者特徵都已預先算好）
     
     Returns:
         匹配結果字典 {'author': str, 'year': str, 'index': int} 或 None
@@ -801,55 +987,47 @@ def _match_apa_citation_to_reference(raw_text, raw_year, ref_by_year, ref_by_aut
     raw_text_lower = raw_text.lower()
     
     # 用年份縮小範圍
+    ref_by_year = reference_index['by_year']
     if norm_year not in ref_by_year:
         return None
     
-    candidate_indices = ref_by_year[norm_year]
+    name_parts = _citation_name_parts(raw_text_lower)
+    citation_text_clean, citation_author, citation_zh_author = name_parts
+    candidate_indices = _prefilter_candidates(
+        raw_text_lower, ref_by_year[norm_year], reference_index, name_parts
+    )
+    if not candidate_indices:
+        return None
     
     # ===== 判斷內文引用的作者數量類型 =====
     citation_type = _detect_citation_author_type(raw_text_lower)
+    first_word_match = _FIRST_WORD_RE.search(raw_text_lower)
+    first_word = first_word_match.group(1).strip() if first_word_match else None
+    
+    author_features = reference_index['author_features']
+    author_counts = reference_index['author_counts']
+    has_et_al = reference_index['has_et_al']
+    first_authors = reference_index['first_authors']
     
-    # 遍歷該年份的所有 references，找作者名和數量都匹配的
+    # 遍歷候選 references，找作者名和數量都匹配的
     best_match = None
     best_match_score = 0
     
     for ref_idx in candidate_indices:
-        ref = reference_list[ref_idx]
-        authors = ref.get('authors') or ref.get('author')
-        
-        if not authors:
+        features = author_features[ref_idx]
+        if features is None:
             continue
         
-        # 計算 reference 的作者數量
-        if isinstance(authors, list):
-            author_count = len(authors)
-        else:
-            # 字串格式，嘗試拆分（以逗號、分號、"and"、"&" 等分隔）
-            author_str = str(authors)
-            # 簡單計數：看有幾個常見的作者分隔符
-            separators = [',', ';', ' and ', ' & ', '、', '與']
-            author_count = 1
-            for sep in separators:
-                if sep in author_str:
-                    author_count = len(re.split(r'[,;]|\sand\s|\s&\s|、|與', author_str))
-                    break
+        author_count = author_counts[ref_idx]
         
-        # 檢查參考文獻原文中是否有 et al.
-        ref_original = ref.get('original', '')
-        has_et_al_in_ref = bool(re.search(r'et\s*al\.?|等人|等', ref_original, re.IGNORECASE))
-
-        # 重新判斷作者數量（考慮 et al.）
-        if has_et_al_in_ref and author_count == 1:
-            author_count = 2  # 視為多作者（至少2位）
-
         # ===== 根據作者數量檢查是否匹配 =====
         is_count_match = False
-
+        
         if citation_type == 'et_al':
             # 內文是 "et al." 格式
             # 如果參考文獻原文也有 "et al."，則無論 authors 列表有幾位，都視為匹配
             # 如果參考文獻沒有 "et al."，則要求至少 2 位作者
-            if has_et_al_in_ref:
+            if has_et_al[ref_idx]:
                 is_count_match = True  # 參考文獻也用 et al.，直接匹配
             else:
                 is_count_match = (author_count >= 2)  # 參考文獻沒用 et al.，要求至少 2 位
@@ -865,236 +1043,95 @@ def _match_apa_citation_to_reference(raw_text, raw_year, ref_by_year, ref_by_aut
         elif citation_type == 'organization':
             # 內文是機構名稱 → 通常 reference 也是單一機構名（算 1 位）
             is_count_match = (author_count == 1)
-
+        
         if not is_count_match:
             continue  # 作者數量不符，跳過
         
         # ===== 檢查作者名是否匹配 =====
-        first_author = _get_first_author_str(authors)
         is_author_match = False
         match_score = 0
-
-        # 檢查參考文獻原文中是否有 et al.
-        # 如果有，即使 authors 只有 1 位，也視為多作者文獻
-        ref_original = ref.get('original', '')
-        has_et_al_in_ref = bool(re.search(r'et\s*al\.?', ref_original, re.IGNORECASE))
-
-        # 重新判斷作者數量（考慮 et al.）
-        if has_et_al_in_ref and author_count == 1:
-            author_count = 2  # 視為多作者（至少2位）
-
-        is_count_match = False
-
+        
         # --- 先檢查第一作者 ---
-        if first_author:
-            # 如果 et al. 精確匹配失敗，或不是 et al. 格式，繼續其他匹配方法
-            if not is_author_match:
-                # 標準化作者名
-                author_norm = _normalize_author_name(first_author)
+        first = features[0]
+        if first is not None:
+            first_author, author_norm, is_cjk, given_name, surname = first
+            
+            # 方法1:標準化後的作者名是否出現在原始引用文本中（移除 et al. 等干擾詞後再比對）
+            if author_norm and author_norm in citation_text_clean:
+                is_author_match = True
+                match_score = len(author_norm)
                 
-                # 方法1:標準化後的作者名是否出現在原始引用文本中
-                if author_norm:
-                    # 移除 et al. 等干擾詞後再比對
-                    citation_text_clean = re.sub(r'\s*et\s*al\.?|\s*等人', '', raw_text_lower)
-                    if author_norm in citation_text_clean:
+                # 如果是 et al. 格式且精確匹配第一作者姓氏,給予更高分數
+                if citation_type == 'et_al':
+                    match_score += 1000
+            
+            # 方法1.5：反向匹配
+            if not is_author_match and citation_author and citation_author in first_authors[ref_idx][1]:
+                is_author_match = True
+                match_score = len(citation_author)
+            
+            # 方法2：提取姓氏部分（支援中英文）
+            if not is_author_match:
+                if is_cjk:
+                    # 中文姓名處理
+                    if given_name and given_name in raw_text_lower:
                         is_author_match = True
-                        match_score = len(author_norm)
+                        match_score = len(given_name)
+                    
+                    # 中文部分匹配
+                    if not is_author_match and citation_zh_author and citation_zh_author in first_author:
+                        is_author_match = True
+                        match_score = len(citation_zh_author)
+                else:
+                    # 英文姓名：檢查姓氏是否出現在原始引用文本中
+                    if surname and surname in raw_text_lower and _surname_in_text(surname, raw_text_lower):
+                        is_author_match = True
+                        match_score = len(surname)
                         
-                        # 如果是 et al. 格式且精確匹配第一作者姓氏,給予更高分數
+                        # 如果是 et al. 格式,額外加分
                         if citation_type == 'et_al':
-                            match_score += 1000
-                
-                # 方法1.5：反向匹配
-                if not is_author_match:
-                    citation_author_match = re.search(r'([A-Za-z\s\-\']+)\s*[（(]\s*\d{4}', raw_text_lower)
-                    if citation_author_match:
-                        citation_author = citation_author_match.group(1).strip()
-                        citation_author = re.sub(r'^(the|a|an)\s+', '', citation_author, flags=re.IGNORECASE)
-                        
-                        if len(citation_author) >= 3 and citation_author in first_author.lower():
-                            is_author_match = True
-                            match_score = len(citation_author)
+                            match_score += 500
                 
-                # 方法2：提取姓氏部分（支援中英文）
-                if not is_author_match:
-                    if any('\u4e00' <= char <= '\u9fff' for char in first_author):
-                        # 中文姓名處理
-                        surname = first_author[0] if first_author else ''
+                # 檢查姓氏是否出現在原始引用文本中
+                if not is_author_match and surname and surname in raw_text_lower:
+                    if _surname_in_text(surname, raw_text_lower):
+                        is_author_match = True
+                        match_score = len(surname)
                         
-                        if len(first_author) >= 2:
-                            given_name = first_author[1:] if len(first_author) > 1 else ''
-                            if given_name and given_name in raw_text_lower:
-                                is_author_match = True
-                                match_score = len(given_name)
-
-                        # 中文部分匹配
-                        if not is_author_match:
-                            citation_zh_match = re.search(r'([\u4e00-\u9fff]{2,})\s*[（(]\s*\d{4}', raw_text_lower)
-                            if citation_zh_match:
-                                citation_zh_author = citation_zh_match.group(1)
-                                if len(citation_zh_author) >= 3 and citation_zh_author in first_author:
-                                    is_author_match = True
-                                    match_score = len(citation_zh_author)
-                    else:
-                        # 英文姓名：取姓氏
-                        parts = first_author.split(',')
-                        if len(parts) >= 1:
-                            surname = parts[0].strip().lower()
-                        else:
-                            words = first_author.split()
-                            surname = words[-1].lower() if words else ''
-
-                        # 檢查姓氏是否出現在原始引用文本中
-                        if not is_author_match and surname and surname in raw_text_lower:
-                            surname_escaped = re.escape(surname)
-                            surname_pattern = r'(?<![A-Za-z])' + surname_escaped + r'(?![A-Za-z])'
-                            if re.search(surname_pattern, raw_text_lower, re.IGNORECASE):
-                                is_author_match = True
-                                match_score = len(surname)
-                                
-                                # 如果是 et al. 格式,額外加分
-                                if citation_type == 'et_al':
-                                    match_score += 500
-
-                    # 檢查姓氏是否出現在原始引用文本中
-                    if not is_author_match and surname and surname in raw_text_lower:
-                        surname_escaped = re.escape(surname)
-                        surname_pattern = r'(?<![A-Za-z])' + surname_escaped + r'(?![A-Za-z])'
-                        if re.search(surname_pattern, raw_text_lower, re.IGNORECASE):
-                            is_author_match = True
-                            match_score = len(surname)
-                            
-                            # 精確匹配加分
-                            citation_first_word_match = re.search(r'([A-Za-z\-\']+)', raw_text_lower)
-                            if citation_first_word_match:
-                                first_word = citation_first_word_match.group(1).strip()
-                                if first_word == surname:
-                                    match_score += 1000
+                        # 精確匹配加分
+                        if first_word == surname:
+                            match_score += 1000
         
         # --- 如果第一作者不匹配，檢查第二作者 ---
-        if not is_author_match and author_count >= 2:
-            if isinstance(authors, list) and len(authors) >= 2:
-                second_author = authors[1]
-                second_author_norm = _normalize_author_name(second_author)
-                
-                # 檢查第二作者標準化名稱是否在原始文本中
-                if second_author_norm and second_author_norm in raw_text_lower:
-                    is_author_match = True
-                    match_score = len(second_author_norm)
-                else:
-                    # 檢查第二作者的名字部分或姓氏
-                    if any('\u4e00' <= char <= '\u9fff' for char in second_author):
-                        # 中文：先檢查名字部分（去掉姓氏，適用於 "志富" vs "鄭志富"）
-                        if len(second_author) >= 2:
-                            given_name = second_author[1:]  # "鄭志富" → "志富"
-                            if given_name and given_name in raw_text_lower:
-                                is_author_match = True
-                                match_score = len(given_name)
-                        
-                        # 如果還是不匹配，檢查姓氏
-                        if not is_author_match:
-                            surname = second_author[0] if second_author else ''
-                            if surname and surname in raw_text_lower:
-                                is_author_match = True
-                                match_score = len(surname)
-                    else:
-                        # 英文姓名：取姓氏
-                        parts = second_author.split(',')
-                        if len(parts) >= 1:
-                            surname = parts[0].strip().lower()
-                        else:
-                            words = second_author.split()
-                            surname = words[-1].lower() if words else ''
-                        
-                        # 檢查姓氏是否出現在原始引用文本中
-                        if surname and surname in raw_text_lower:
-                            surname_escaped = re.escape(surname)
-                            surname_pattern = r'(?<![A-Za-z])' + surname_escaped + r'(?![A-Za-z])'
-                            if re.search(surname_pattern, raw_text_lower, re.IGNORECASE):
-                                is_author_match = True
-                                match_score = len(surname)
+        if not is_author_match and author_count >= 2 and len(features) >= 2:
+            match_score = _match_other_author(features[1], raw_text_lower, word_boundary=False)
+            is_author_match = match_score > 0
+        
+        # --- 如果第一、二作者都不匹配，檢查第三作者 ---
+        if not is_author_match and author_count >= 3 and len(features) >= 3:
+            match_score = _match_other_author(features[2], raw_text_lower, word_boundary=True)
+            is_author_match = match_score > 0
         
-        # --- 如果第一、二作者都不匹配，且是三作者格式，檢查第三作者 ---
-        if not is_author_match and author_count >= 3:
-            if isinstance(authors, list) and len(authors) >= 3:
-                third_author = authors[2]
-                third_author_norm = _normalize_author_name(third_author)
-                
-                # 檢查第三作者標準化名稱是否在原始文本中
-                if third_author_norm and third_author_norm in raw_text_lower:
-                    is_author_match = True
-                    match_score = len(third_author_norm)
-                else:
-                    # 檢查第三作者的名字部分或姓氏
-                    if any('\u4e00' <= char <= '\u9fff' for char in third_author):
-                        # 中文：先檢查名字部分
-                        if len(third_author) >= 2:
-                            given_name = third_author[1:]
-                            if given_name and given_name in raw_text_lower:
-                                is_author_match = True
-                                match_score = len(given_name)
-                        
-                        # 如果還是不匹配，檢查姓氏
-                        if not is_author_match:
-                            surname = third_author[0] if third_author else ''
-                            if surname and surname in raw_text_lower:
-                                is_author_match = True
-                                match_score = len(surname)
-                    else:
-                        # 英文姓名：取姓氏
-                        parts = third_author.split(',')
-                        if len(parts) >= 1:
-                            surname = parts[0].strip().lower()
-                        else:
-                            words = third_author.split()
-                            surname = words[-1].lower() if words else ''
-                        
-                        # 檢查姓氏是否出現在原始引用文本中
-                        if surname and surname in raw_text_lower:
-                            surname_pattern = r'\b' + re.escape(surname) + r'\b'
-                            if re.search(surname_pattern, raw_text_lower, re.IGNORECASE):
-                                is_author_match = True
-                                match_score = len(surname)
-
         # 如果作者完全不匹配，跳過這個 reference
         if not is_author_match:
             continue
-
-        # --- 如果是雙作者，檢查兩個作者是否都匹配（加分） ---
-        if citation_type == 'two_authors' and isinstance(authors, list) and len(authors) >= 2:
-            first_author_norm = _normalize_author_name(authors[0])
-            second_author_norm = _normalize_author_name(authors[1])
-            
-            if first_author_norm and second_author_norm:
-                if first_author_norm in raw_text_lower and second_author_norm in raw_text_lower:
-                    match_score = len(first_author_norm) + len(second_author_norm)
         
-        # --- 如果是三作者，檢查三個作者是否都匹配（加分） ---
-        if citation_type == 'three_authors' and isinstance(authors, list) and len(authors) >= 3:
-            first_author_norm = _normalize_author_name(authors[0])
-            second_author_norm = _normalize_author_name(authors[1])
-            third_author_norm = _normalize_author_name(authors[2])
-            
-            if first_author_norm and second_author_norm and third_author_norm:
-                if (first_author_norm in raw_text_lower and 
-                    second_author_norm in raw_text_lower and 
-                    third_author_norm in raw_text_lower):
-                    match_score = len(first_author_norm) + len(second_author_norm) + len(third_author_norm)
-
+        # --- 如果是雙作者/三作者，檢查所有作者是否都匹配（加分） ---
+        if citation_type == 'two_authors' and len(features) >= 2:
+            author_norms = [f[1] if f else '' for f in features[:2]]
+        elif citation_type == 'three_authors' and len(features) >= 3:
+            author_norms = [f[1] if f else '' for f in features[:3]]
+        else:
+            author_norms = None
+        if author_norms and all(author_norms):
+            if all(norm in raw_text_lower for norm in author_norms):
+                match_score = sum(len(norm) for norm in author_norms)
+        
         if match_score > best_match_score:
             best_match_score = match_score
-            # 從 reference 的 authors 列表中提取第一作者姓氏
-            ref_authors = reference_list[ref_idx].get('authors') or reference_list[ref_idx].get('author')
-            if isinstance(ref_authors, list) and ref_authors:
-                # 提取第一作者並只保留姓氏
-                first_author_clean = str(ref_authors[0])
-                first_author_clean = re.sub(r',.*$', '', first_author_clean).strip()
-            else:
-                first_author_clean = first_author
-
             best_match = {
-                'author': first_author_clean,
-                'year': ref.get('year'),
+                'author': reference_index['display_authors'][ref_idx],
+                'year': reference_index['raw_years'][ref_idx],
                 'index': ref_idx
             }
     
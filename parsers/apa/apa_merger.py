@@ -4,189 +4,347 @@ from utils.text_processor import (
     has_chinese
 )
 
+_APA_HEAD_PAREN_RE = re.compile(r'[（(]\s*(\d{4}(?:[a-z])?|n\.d\.)\s*(?:,\s*([A-Za-z]+\.?\s*\d{0,2}))?\s*[)）]')
+_APA_HEAD_COMMA_RE = re.compile(r'[\.,]\s*(\d{4}(?:[a-z])?)\s*[\.,]')
+
 def find_apa_head(ref_text):
     """偵測 APA 格式開頭 (含變體格式)"""
-    match = re.search(r'[（(]\s*(\d{4}(?:[a-z])?|n\.d\.)\s*(?:,\s*([A-Za-z]+\.?\s*\d{0,2}))?\s*[)）]', ref_text)
+    match = _APA_HEAD_PAREN_RE.search(ref_text)
     if match and match.start() < 80: return True
-    
-    match_comma = re.search(r'[\.,]\s*(\d{4}(?:[a-z])?)\s*[\.,]', ref_text)
+
+    match_comma = _APA_HEAD_COMMA_RE.search(ref_text)
     if match_comma and match_comma.start() < 80: return True
-    
+
     return False
 
+# =============================================================================
+# merge_references_unified 規則表
+# -----------------------------------------------------------------------------
+# 每一行先算一次廉價特徵（行首字元類別、是否含括號/民/分號、長度），
+# 規則表中的每條規則宣告自己需要的特徵，不符合就直接跳過，不執行 regex。
+# =============================================================================
+
+# 行首字元類別（位元遮罩，normalize_text 之後行首不會是空白）
+K_CJK = 1        # 中文字
+K_UPPER = 2      # 大寫英文字母
+K_DIGIT = 4      # 數字
+K_BRACKET = 8    # [ 或 【
+K_OTHER = 16     # 其他（小寫英文、符號…）
+K_ANY = K_CJK | K_UPPER | K_DIGIT | K_BRACKET | K_OTHER
+
+# 行內特徵（位元遮罩）
+F_PAREN = 1      # 含 ( 或 （
+F_MIN = 2        # 含「民」
+F_SEMI = 4       # 含 ;
+F_LEN50 = 8      # 長度 < 50
+F_LEN60 = 16     # 長度 < 60
+
+# 規則判定結果
+NEW = "new"          # 新文獻開始
+CONT = "cont"        # 延續上一筆
+NOT_NEW = "not_new"  # 明確不是新文獻（覆蓋強制新文獻的判定）
+HOLD = "hold"        # 規則成立但不下判定，後續規則不再檢查
+
+_CJK = r'\u4e00-\u9fa5'
+
+# --- 1. 過濾（頁碼、圖表、分類標題） ---
+_DIGITS_ONLY_RE = re.compile(r'^\d+$')
+_SOURCE_TAG_RE = re.compile(r'^\[source', re.IGNORECASE)
+_TABLE_FIGURE_RE = re.compile(r'^(Table|Figure|Fig\.)', re.IGNORECASE)
+_CATEGORY_RE = re.compile(
+    r'^[\d\.\s、，,：:\[\]一二三四五]*'
+    r'(中文|英文|一|二|三|四|五|期刊論文|學術研討會論文|網站文章|紙本圖書|網路文獻|Conference|Journal|Article|Preprint|Paper|Book|Theses|Dissertation|Report|Proceedings|Symposium|Web|Online)',
+    re.IGNORECASE
+)
+_CATEGORY_YEAR_RE = re.compile(r'[（(]\s*\d{4}')
+_CATEGORY_JOURNAL_RE = re.compile(r'(Journal of|Proceedings of)', re.IGNORECASE)
+_NUMBERED_SUBHEADING_RE = re.compile(r'^\d+\.\s*[A-Za-z\s/&]+$')
+
+# --- 2. 新文獻開始 ---
+_ROC_YEAR_RE = re.compile(r'民\s*\d{2,3}')
+_EN_INSTITUTION_RE = re.compile(r';\s*[A-Z][a-z]+,\s*[A-Z]{2}:\s*\d{4}\.')
+_URL_DATE_END_RE = re.compile(r'https?://[^\s。)）]+\s*[（(]\s*\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日\s*[)）]\s*$')
+_ZH_AUTHOR_START_RE = re.compile(rf'^[{_CJK}]{{2,}}[、，(（]')
+_ZH_NAME_WRAP_RE = re.compile(rf'^[{_CJK}]{{1,2}}[、，]')
+_ZH_ROC_YEAR_RE = re.compile(rf'^[{_CJK}]{{2,4}}.*?[（(]民\s*\d{{2,3}}[)）]')
+_ZH_YEAR_RE = re.compile(rf'^[{_CJK}]+.*?[（(]\d{{4}}[a-z]?[)）]')
+_ZH_AUTHOR_LIST_RE = re.compile(rf'^[{_CJK}]{{2,4}}[、，][{_CJK}]{{2,4}}')
+_YEAR_PAREN_RE = re.compile(r'[（(]\d{4}[a-z]?[)）]')
+_YEAR_PAREN_PLAIN_RE = re.compile(r'[（(]\d{4}[)）]')
+_REF_DONE_TITLE_RE = re.compile(rf'[。.][{_CJK}]{{2,}}[。.]?$')
+_REF_DONE_BOOK_RE = re.compile(r'《[^》]+》')
+_REF_DONE_PAGES_RE = re.compile(r'[，,]\s*\d+.*[。.]?$')
+_EN_AUTHOR_YEAR_RE = re.compile(r'^[A-Z][^\d\(\)]+(\(|\,\s*)\d{4}')
+_EN_AND_START_RE = re.compile(r'^\s*(&|and)\b', re.IGNORECASE)
+_ZH_REGULATION_RE = re.compile(rf'^[{_CJK}]+.*?[\(（]\d{{4}}\s*年')
+_NUMBERED_RE = re.compile(r'^(\d+)\.')
+_NUMBERED_LINK_RE = re.compile(r'^\d+\.\s*(https?://|doi:)', re.IGNORECASE)
+_IEEE_INDEX_RE = re.compile(r'^\s*[\[【]\s*\d+\s*[】\]]')
+
+# --- 3. 延續 ---
+_DOI_RE = re.compile(r'(doi:10\.|doi\.org|arXiv:)', re.IGNORECASE)
+_CONFERENCE_RE = re.compile(r'^([A-Z]{2,}(?:\s+[A-Z]{2,})*)\s+\d{4}')
+_PUB_INFO_RE = re.compile(r'^(Paper No\.|Vol\.|pp\.|no\.)', re.IGNORECASE)
+_BIG_NUMBER_RE = re.compile(r'^\d{4,}\.')
+_ZH_AUTHOR_PAIR_RE = re.compile(rf'[{_CJK}]{{2,4}}[、，][{_CJK}]{{2,4}}')
+_SEP_RE = re.compile(r'[、，]')
+
+# --- 4. 動作 ---
+_NUMBER_STUB_RE = re.compile(r'^\d+\.\s*$')
+_LEADING_NUMBER_RE = re.compile(r'^\d{1,3}\.\s*')
+_MISSING_SPACE_RE = re.compile(r'([a-z]),([A-Z])')
+_URL_HYPHEN_BREAK_RE = re.compile(r'(https?://[^\s]*?)-\s+([a-zA-Z0-9])')
+_URL_SPACE_BREAK_RE = re.compile(r'(https?://[^\s]*?)\s+([a-zA-Z0-9/_\-]+)')
+
+
+def _is_cjk(ch):
+    return '\u4e00' <= ch <= '\u9fa5'
+
+def _line_features(para):
+    """計算一行的 (行首類別, 行內特徵)，每行只算一次"""
+    first = para[0]
+    if _is_cjk(first):
+        kind = K_CJK
+    elif 'A' <= first <= 'Z':
+        kind = K_UPPER
+    elif first.isdecimal():
+        kind = K_DIGIT
+    elif first in '[【':
+        kind = K_BRACKET
+    else:
+        kind = K_OTHER
+
+    flags = 0
+    if '(' in para or '（' in para: flags |= F_PAREN
+    if '民' in para: flags |= F_MIN
+    if ';' in para: flags |= F_SEMI
+    if len(para) < 50: flags |= F_LEN50
+    if len(para) < 60: flags |= F_LEN60
+    return kind, flags
+
+def _ref_state(current_ref):
+    """
+    暫存區（目前累積中的文獻）狀態：
+      tail       去頭尾空白後的最後一個字元（空字串代表暫存區為空）
+      stripped   去頭尾空白後的暫存區
+    """
+    stripped = current_ref.strip()
+    return {'ref': current_ref, 'stripped': stripped, 'tail': stripped[-1:]}
+
+
+# ----- 過濾規則：任一成立即丟棄該行 -----
+
+def _skip_category_heading(para, state):
+    return (_CATEGORY_RE.match(para)
+            and not _CATEGORY_YEAR_RE.search(para)
+            and not _CATEGORY_JOURNAL_RE.search(para))
+
+SKIP_RULES = (
+    # (名稱, 行首類別, 需要的特徵, 判斷函式)
+    ('page_number', K_DIGIT, 0, lambda p, s: _DIGITS_ONLY_RE.match(p)),
+    ('source_tag', K_BRACKET, 0, lambda p, s: _SOURCE_TAG_RE.match(p)),
+    ('table_figure', K_UPPER | K_OTHER, 0, lambda p, s: _TABLE_FIGURE_RE.match(p)),
+    ('category_heading', K_ANY, F_LEN50, _skip_category_heading),
+    ('numbered_subheading', K_DIGIT, F_LEN60, lambda p, s: _NUMBERED_SUBHEADING_RE.match(p)),
+)
+
+# ----- 強制新文獻：與後面的判斷鏈獨立，成立就標記為新文獻 -----
+
+def _force_url_date_then_author(para, state):
+    # 前一筆以「取自 URL (年月日)」結尾，當前行是中文作者開頭
+    return bool(state['ref'] and _ZH_AUTHOR_START_RE.match(para)
+                and _URL_DATE_END_RE.search(state['ref']))
+
+FORCE_NEW_RULES = (
+    # 中文機構作者 + 民國年，例如「衛生福利部國民健康署,…,民 111」
+    ('zh_institution_roc', K_CJK, F_MIN, lambda p, s: _ROC_YEAR_RE.search(p)),
+    # 英文機構作者 + 分號 + 地點 + 年份，例如「…; Bethesda, MD: 2018.」
+    ('en_institution', K_ANY, F_SEMI, lambda p, s: _EN_INSTITUTION_RE.search(p)),
+    ('url_date_then_author', K_CJK, 0, _force_url_date_then_author),
+)
+
+# ----- 新文獻判斷鏈：第一條「認領」該行的規則決定結果 -----
+
+def _start_name_wrap(para, state):
+    # 前一行以 1-2 個中文字結尾(非句號)，當前行是單字+頓號開頭 → 作者名字斷行，不做新文獻判斷
+    if _is_cjk(state['tail']) and _ZH_NAME_WRAP_RE.match(para):
+        return HOLD
+    return None
+
+def _start_zh_author_list(para, state):
+    # 中文作者列表開頭(即使年份不在同一行)
+    if not _ZH_AUTHOR_LIST_RE.match(para):
+        return None
+    if _YEAR_PAREN_RE.search(para):
+        return NEW
+    if not state['ref']:
+        return HOLD
+    # 前一筆已經完整(句號結尾)或看起來是完整的參考文獻 → 新文獻
+    if state['tail'] and state['tail'] in '。.':
+        return NEW
+    ref = state['ref']
+    if (_REF_DONE_TITLE_RE.search(state['stripped']) or
+            _REF_DONE_BOOK_RE.search(ref) or
+            _REF_DONE_PAGES_RE.search(ref)):
+        return NEW
+    return HOLD
+
+def _start_en_author_year(para, state):
+    # 英文標準；以 & / and 開頭的是作者斷行，交給後面的規則
+    if _EN_AUTHOR_YEAR_RE.match(para) and not _EN_AND_START_RE.match(para):
+        return NEW
+    return None
+
+def _start_numbered(para, state):
+    # 編號開頭 (避免文章編號與頁碼誤判)
+    match = _NUMBERED_RE.match(para)
+    if not match:
+        return None
+    if int(match.group(1)) > 500 or _NUMBERED_LINK_RE.match(para):
+        return NOT_NEW
+    return NEW
+
+def _regex_rule(pattern, outcome, method='match'):
+    """單一 regex 規則：成立回傳 outcome，否則交給下一條規則"""
+    test = getattr(pattern, method)
+    return lambda para, state: outcome if test(para) else None
+
+START_RULES = (
+    ('zh_name_wrap', K_CJK, 0, _start_name_wrap),
+    # A0. 民國年格式（優先於西元年）
+    ('zh_roc_year', K_CJK, F_PAREN | F_MIN, _regex_rule(_ZH_ROC_YEAR_RE, NEW)),
+    # A. 中文標準（含年份在同一行，支援 2003a 格式）
+    ('zh_year', K_CJK, F_PAREN, _regex_rule(_ZH_YEAR_RE, NEW)),
+    # A2. 中文作者列表開頭
+    ('zh_author_list', K_CJK, 0, _start_zh_author_list),
+    # B. 英文標準
+    ('en_author_year', K_UPPER, 0, _start_en_author_year),
+    # C. 法規文獻（標題開頭 + 括號日期）
+    ('zh_regulation', K_CJK, F_PAREN, _regex_rule(_ZH_REGULATION_RE, NEW)),
+    # D. 編號開頭
+    ('numbered', K_DIGIT, 0, _start_numbered),
+    # E. IEEE 括號編號 [1]
+    ('ieee_index', K_BRACKET, 0, _regex_rule(_IEEE_INDEX_RE, NEW)),
+)
+
+# ----- 延續判斷鏈：只在不是新文獻時檢查 -----
+
+def _cont_zh_author_list(para, state):
+    # 前一行是作者列表，當前行也是作者但無年份
+    if not state['ref'] or not _ZH_AUTHOR_PAIR_RE.search(state['ref']):
+        return None
+    if _is_cjk(para[0]) and _SEP_RE.search(para) and not _YEAR_PAREN_RE.search(para):
+        return CONT
+    return HOLD
+
+def _cont_zh_line_wrap(para, state):
+    # 前一行以中文結尾但沒有句號(可能是斷行)
+    if not _is_cjk(state['tail']):
+        return None
+    if _is_cjk(para[0]):
+        if _ZH_NAME_WRAP_RE.match(para):
+            # 單字 + 頓號開頭(如「蓉、」)，但有年份括號則不是延續
+            if not _YEAR_PAREN_PLAIN_RE.search(para):
+                return CONT
+        elif (_SEP_RE.search(para) and _SEP_RE.search(state['ref'])
+                and not _YEAR_PAREN_PLAIN_RE.search(para)):
+            # 有頓號且前一行也有頓號(作者列表延續)
+            return CONT
+    return HOLD
+
+CONTINUATION_RULES = (
+    # 排除：中文開頭 + 包含民國年、分號+地點+年份 → 不視為延續
+    ('zh_institution_roc', K_CJK, F_MIN, _regex_rule(_ROC_YEAR_RE, HOLD, 'search')),
+    ('en_institution', K_ANY, F_SEMI, _regex_rule(_EN_INSTITUTION_RE, HOLD, 'search')),
+    # A. 包含 DOI 或 arXiv
+    ('doi', K_ANY, 0, _regex_rule(_DOI_RE, CONT, 'search')),
+    # B. 會議資訊 (全大寫+年份)
+    ('conference', K_UPPER, 0, _regex_rule(_CONFERENCE_RE, CONT)),
+    # C. 特殊出版資訊
+    ('pub_info', K_UPPER | K_OTHER, 0, _regex_rule(_PUB_INFO_RE, CONT)),
+    # D. 大數字開頭的行 (如 104979.)
+    ('big_number', K_DIGIT, 0, _regex_rule(_BIG_NUMBER_RE, CONT)),
+    # E. 中文作者延續
+    ('zh_author_list', K_ANY, 0, _cont_zh_author_list),
+    # F. 中文斷行
+    ('zh_line_wrap', K_ANY, 0, _cont_zh_line_wrap),
+)
+
+
+def _run_chain(rules, para, kind, flags, state):
+    """依序檢查規則，回傳第一條認領該行的規則結果（都不符合時為 None）"""
+    for _, kinds, needs, rule in rules:
+        if kind & kinds and flags & needs == needs:
+            outcome = rule(para, state)
+            if outcome is not None:
+                return outcome
+    return None
+
+def _any_rule(rules, para, kind, flags, state):
+    for _, kinds, needs, rule in rules:
+        if kind & kinds and flags & needs == needs and rule(para, state):
+            return True
+    return False
+
+def classify_reference_line(para, current_ref):
+    """
+    判斷一行（已 normalize）與暫存區的關係：
+    'skip' 丟棄、NEW 新文獻、CONT 明確延續、None 預設合併
+    """
+    kind, flags = _line_features(para)
+    state = _ref_state(current_ref)
+
+    # 1. 過濾分類標題
+    if _any_rule(SKIP_RULES, para, kind, flags, state):
+        return 'skip'
+
+    # 2. 判斷是否為新文獻開始 (Priority High)
+    is_new_start = _any_rule(FORCE_NEW_RULES, para, kind, flags, state)
+    outcome = _run_chain(START_RULES, para, kind, flags, state)
+    if outcome == NEW:
+        is_new_start = True
+    elif outcome == NOT_NEW:
+        is_new_start = False
+
+    # 3. 判斷是否為延續 (Priority Low)
+    if not is_new_start:
+        if _run_chain(CONTINUATION_RULES, para, kind, flags, state) == CONT:
+            return CONT
+        return None
+
+    # 暫存區只有 "數字." (例如 "1.")，代表上一行是被斷開的編號 → 強制延續
+    if current_ref and _NUMBER_STUB_RE.match(current_ref):
+        return CONT
+    return NEW
+
 def merge_references_unified(paragraphs):
     """
     通用合併邏輯：
     1. 過濾分類標題
     2. 判斷新文獻開始 (增加數值大小防呆，避免文章編號 104979. 被誤判)
     3. 判斷延續
+    各步驟的規則見 SKIP_RULES / FORCE_NEW_RULES / START_RULES / CONTINUATION_RULES
     """
     merged = []
     current_ref = ""
-    
+
     for para in paragraphs:
         para = normalize_text(para)
         if not para: continue
 
-        if re.match(r'^\d+$', para) or re.match(r'^\[source', para, re.IGNORECASE): continue
-        if re.match(r'^(Table|Figure|Fig\.)', para, re.IGNORECASE): continue
-        category_keywords = r'(中文|英文|一|二|三|四|五|期刊論文|學術研討會論文|網站文章|紙本圖書|網路文獻|Conference|Journal|Article|Preprint|Paper|Book|Theses|Dissertation|Report|Proceedings|Symposium|Web|Online)'
-        if re.match(r'^[\d\.\s、，,：:\[\]一二三四五]*' + category_keywords, para, re.IGNORECASE):
-            if len(para) < 50:
-                if not re.search(r'[（(]\s*\d{4}', para): 
-                    if not re.search(r'(Journal of|Proceedings of)', para, re.IGNORECASE):
-                        continue
-        if re.match(r'^\d+\.\s*[A-Za-z\s/&]+$', para) and len(para) < 60:
-                continue 
-
-        # 2. 判斷是否為新文獻開始 (Priority High)
-        is_new_start = False
-
-        # 特殊處理：中文機構作者 + 民國年 + URL 模式
-        # 例如：「衛生福利部國民健康署,台灣腎臟醫學會【早期慢性腎臟病照護手冊】,民 111」
-        if re.match(r'^[\u4e00-\u9fa5]', para) and re.search(r'民\s*\d{2,3}', para):
-            is_new_start = True
-
-        # 特殊處理：英文機構作者 + 分號 + 地點 + 年份
-        # 例如：「United States Renal Data System . National Institutes ... ; Bethesda, MD: 2018.」
-        elif re.search(r';\s*[A-Z][a-z]+,\s*[A-Z]{2}:\s*\d{4}\.', para):
-            is_new_start = True
-
-        # 特殊判斷:「取自 URL (年月日)」後面接作者
-        # 例如: "...取自https://example.com (2023年06月06日) 張三、李四(2024)..."
-        if re.search(r'https?://[^\s。)）]+\s*[（(]\s*\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日\s*[)）]\s*$', current_ref):
-            # 如果當前行是中文作者開頭,視為新文獻
-            if re.match(r'^[\u4e00-\u9fa5]{2,}[、，(（]', para):
-                is_new_start = True
-
-        # 作者名字斷行的延續檢查
-        is_continuation = False
-        if (re.match(r'^[\u4e00-\u9fa5]{1,2}[、，]', para) and 
-            current_ref and re.search(r'[\u4e00-\u9fa5]{1,2}$', current_ref.strip()) and
-            not re.search(r'[。.]$', current_ref.strip())):
-            # 前一行以1-2個中文字結尾(非句號),當前行是單字+頓號開頭 → 強制延續
-            is_continuation = True
-            # 直接跳到執行動作,不做任何新文獻判斷
-        # A0. 民國年格式（優先於西元年）
-        elif re.match(r'^[\u4e00-\u9fa5]{2,4}.*?[（(]民\s*\d{2,3}[)）]', para):
-            is_new_start = True
-
-        elif re.match(r'^[\u4e00-\u9fa5]+.*?[（(]\d{4}[a-z]?[)）]', para):
-            # A. 中文標準（含年份在同一行，支援 2003a 格式）
-            is_new_start = True
-
-        # A2. 中文作者列表開頭(即使年份不在同一行)
-        elif re.match(r'^[\u4e00-\u9fa5]{2,4}[、，][\u4e00-\u9fa5]{2,4}', para):
-            # 【優先判斷】如果前一行以「單字中文」結尾(作者名字斷行),當前行是「單字+頓號」開頭 → 強制延續
-            if (re.match(r'^[\u4e00-\u9fa5]{1,2}[、，]', para) and 
-                current_ref and re.search(r'[\u4e00-\u9fa5]{1,2}$', current_ref.strip()) and
-                not re.search(r'[。.]$', current_ref.strip())):  # 前一行不是句號結尾
-                is_continuation = True  # 直接設為延續,跳過後續所有判斷
-            # 排除:書名號開頭
-            elif re.match(r'^[《〈「『\d]', para):
-                pass
-            # 如果當前行包含年份括號,肯定是新文獻（支援年份後綴）
-            elif re.search(r'[（(]\d{4}[a-z]?[)）]', para):
-                is_new_start = True
-            # 如果前一筆已經完整(有句號結尾),當前是作者列表 → 新文獻
-            elif current_ref and re.search(r'[。.]$', current_ref.strip()):
-                is_new_start = True
-            # 如果前一筆看起來是完整的參考文獻 → 新文獻
-            elif current_ref and (
-                re.search(r'[。.][\u4e00-\u9fa5]{2,}[。.]?$', current_ref.strip()) or
-                re.search(r'《[^》]+》', current_ref) or
-                re.search(r'[，,]\s*\d+.*[。.]?$', current_ref)
-            ):
-                is_new_start = True
-            # 其他情況:不判定
-            else:
-                pass
-            
-        # B. 英文標準
-        elif re.match(r'^[A-Z][^\d\(\)]+(\(|\,\s*)\d{4}', para) and not re.match(r'^\s*(&|and)\b', para, re.IGNORECASE):
-            is_new_start = True
-            
-        # C. 法規文獻（標題開頭 + 括號日期）
-        elif re.match(r'^[\u4e00-\u9fa5]+.*?[\(（]\d{4}\s*年', para):
-            is_new_start = True
-
-        # D. 編號開頭 (修正：避免文章編號與頁碼誤判)
-        elif re.match(r'^(\d+)\.', para):
-            num_match = re.match(r'^(\d+)', para)
-            num_val = int(num_match.group(1))
-            
-            if num_val > 500:
-                is_new_start = False
-            elif re.search(r'^\d+\.\s*(https?://|doi:)', para, re.IGNORECASE):
-                is_new_start = False
-            else:
-                is_new_start = True
-
-        # E. IEEE 括號編號 [1]
-        elif re.match(r'^\s*[\[【]\s*\d+\s*[】\]]', para):
-            is_new_start = True
-
-        # 3. 判斷是否為延續 (Priority Low)
-        is_continuation = False
-        if not is_new_start:
-            # 排除：中文開頭 + 包含民國年 → 不視為延續
-            if re.match(r'^[\u4e00-\u9fa5]', para) and re.search(r'民\s*\d{2,3}', para):
-                pass  # 不設為延續
-            # 排除：包含分號+地點+年份模式 → 不視為延續  
-            elif re.search(r';\s*[A-Z][a-z]+,\s*[A-Z]{2}:\s*\d{4}\.', para):
-                pass  # 不設為延續
-            # A. 包含 DOI 或 arXiv
-            elif re.search(r'(doi:10\.|doi\.org|arXiv:)', para, re.IGNORECASE):
-                is_continuation = True
-            # B. 會議資訊 (全大寫+年份)
-            elif re.match(r'^([A-Z]{2,}(?:\s+[A-Z]{2,})*)\s+\d{4}', para):
-                is_continuation = True
-            # C. 特殊出版資訊
-            elif re.match(r'^(Paper No\.|Vol\.|pp\.|no\.)', para, re.IGNORECASE):
-                is_continuation = True
-            # D. 大數字開頭的行 (如 104979.) 也視為延續
-            elif re.match(r'^\d{4,}\.', para):
-                is_continuation = True
-            # E. 中文作者延續(前一行是作者列表,當前行也是作者但無年份)
-            elif current_ref and re.search(r'[\u4e00-\u9fa5]{2,4}[、，][\u4e00-\u9fa5]{2,4}', current_ref):
-                # 當前行是中文字開頭,且包含頓號/逗號(作者列表特徵)
-                if re.match(r'^[\u4e00-\u9fa5]', para) and re.search(r'[、，]', para):
-                    # 如果包含年份括號,不視為延續(是新文獻)（支援年份後綴）
-                    if re.search(r'[（(]\d{4}[a-z]?[)）]', para):
-                        pass  # 不設為延續,讓它走新文獻判斷
-                    else:
-                        is_continuation = True
-            # F. 前一行以中文結尾但沒有句號(可能是斷行)
-            elif current_ref and re.search(r'[\u4e00-\u9fa5]$', current_ref.strip()):
-                # 當前行以中文開頭
-                if re.match(r'^[\u4e00-\u9fa5]', para):
-                    # 情況1:單字 + 頓號開頭(如「蓉、」)→ 肯定是延續
-                    if re.match(r'^[\u4e00-\u9fa5]{1,2}[、，]', para):
-                        # 但如果有年份括號,則不是延續
-                        if not re.search(r'[（(]\d{4}[)）]', para):
-                            is_continuation = True
-                    # 情況2:有頓號且前一行也有頓號(作者列表延續)
-                    elif re.search(r'[、，]', para) and re.search(r'[、，]', current_ref):
-                        # 如果有年份括號,則不是延續
-                        if not re.search(r'[（(]\d{4}[)）]', para):
-                            is_continuation = True
-
-        if is_new_start and current_ref:
-            # 如果暫存區只有 "數字." (例如 "1.")，代表上一行是被斷開的編號
-            if re.match(r'^\d+\.\s*$', current_ref):
-                is_new_start = False   # 取消新文獻判定
-                is_continuation = True # 強制視為延續
+        action = classify_reference_line(para, current_ref)
+        if action == 'skip':
+            continue
 
         # 4. 執行動作
-        if is_new_start:
+        if action == NEW:
             if current_ref: merged.append(current_ref)
-            # 【修正 1】針對 "6. Putra"：放寬移除條件
-            # 只要是 "1~3位數字 + 點" 開頭 (例如 1. 或 999.)，後面不管接什麼，都把編號跟空白去掉
-            if re.match(r'^\d{1,3}\.\s*', para):
-                para = re.sub(r'^\d{1,3}\.\s*', '', para) # 【修正 2】針對 "Waqar,A."：補上逗號後的空白，# 如果發現 "小寫字母,大寫字母" (例如 r,A)，中間補一個空白變成 "r, A"， # 這樣後續的作者判斷程式就能讀懂了
-            para = re.sub(r'([a-z]),([A-Z])', r'\1, \2', para)
+            # 只要是 "1~3位數字 + 點" 開頭 (例如 1. 或 999.)，把編號跟空白去掉
+            para = _LEADING_NUMBER_RE.sub('', para, count=1)
+            # "Waqar,A." → "Waqar, A."，後續的作者判斷才讀得懂
+            para = _MISSING_SPACE_RE.sub(r'\1, \2', para)
             current_ref = para
-        elif is_continuation:
+        elif action == CONT:
             if current_ref:# 處理中文與英文的連接空白
                 if has_chinese(current_ref[-1:]) and has_chinese(para[:1]):
                     current_ref += para
@@ -207,16 +365,16 @@ def merge_references_unified(paragraphs):
                     current_ref += " " + para
             else:
                 current_ref = para
-                
+
     if current_ref: merged.append(current_ref)
-    
+
     # 修復 URL 斷行問題
     # 例如: "https://example.com/path- abc123" → "https://example.com/path-abc123"
     fixed_merged = []
     for ref in merged:
         # 移除 URL 中間的空格和換行（連字符後的空格）
-        ref = re.sub(r'(https?://[^\s]*?)-\s+([a-zA-Z0-9])', r'-\1\2', ref)
-        ref = re.sub(r'(https?://[^\s]*?)\s+([a-zA-Z0-9/_\-]+)', r'\1\2', ref)
+        ref = _URL_HYPHEN_BREAK_RE.sub(r'-\1\2', ref)
+        ref = _URL_SPACE_BREAK_RE.sub(r'\1\2', ref)
         fixed_merged.append(ref)
-    
+
     return fixed_merged
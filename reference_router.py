@@ -1,5 +1,8 @@
 # reference_router.py
+import copy
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 #from common_utils import normalize_text, has_chinese
 #from apa_module import extract_apa_en_detailed, extract_apa_zh_detailed
 #from ieee_module import extract_ieee_reference_full
@@ -7,14 +10,25 @@ from utils.text_processor import normalize_text, has_chinese
 from parsers.apa.apa_parser_en import extract_apa_en_detailed
 from parsers.apa.apa_parser_zh import extract_apa_zh_detailed
 from parsers.ieee.ieee_parser import extract_ieee_reference_full
-def process_single_reference(ref_text: str) -> dict:
+from utils.reference_cache import (
+    make_reference_key,
+    get_cached_reference,
+    put_cached_reference,
+)
+
+# 解析器版本：任何解析規則改變時遞增，讓解析結果快取失效
+PARSER_VERSION = 1
+# 少於這個筆數時直接單核解析（開 process pool 的成本比解析本身還高）
+PARALLEL_MIN_REFS = 300
+# 每個 worker 分到的段數；每筆解析時間差異大，切細一點讓負載較平均
+CHUNKS_PER_WORKER = 4
+
+def _parse_normalized_reference(ref_text):
     """
-    核心分流邏輯：
+    核心分流邏輯（輸入須已 normalize_text）：
     - 開頭是 [n]/【n】 → 走 IEEE 解析（內部再判斷是否 inline APA）
     - 否則 → 依語言走 APA EN / APA ZH
     """
-    ref_text = normalize_text(ref_text)
-
     if re.match(r'^\s*[\[【]', ref_text):
         data = extract_ieee_reference_full(ref_text)
     else:
@@ -32,3 +46,70 @@ def process_single_reference(ref_text: str) -> dict:
         data["author"] = "Unknown"
 
     return data
+
+def process_single_reference(ref_text: str, use_cache: bool = True) -> dict:
+    """
+    解析單筆參考文獻
+    相同文字（normalize 後）的解析結果會被快取，命中時回傳快取結果的副本
+    """
+    ref_text = normalize_text(ref_text)
+    if not use_cache:
+        return _parse_normalized_reference(ref_text)
+
+    key = make_reference_key(ref_text, PARSER_VERSION)
+    data = get_cached_reference(key)
+    if data is None:
+        data = _parse_normalized_reference(ref_text)
+        put_cached_reference(key, data)
+    return data
+
+def _process_reference_chunk(refs):
+    """[Worker] 依序解析一段已 normalize 的參考文獻（不經過快取，結果由主程序寫入）"""
+    return [_parse_normalized_reference(r) for r in refs]
+
+def process_references_batch(refs, workers=None, use_cache=True):
+    """
+    批次解析參考文獻，回傳順序與輸入相同
+    - 先查快取，只有未命中的文獻（同批重複的只算一次）才需要解析
+    - workers=None 代表使用全部 CPU；workers=1 或待解析筆數少於 PARALLEL_MIN_REFS 時單核解析
+    - 平行時將連續的文獻切段交給 ProcessPoolExecutor，executor.map 依提交順序拼回
+    """
+    texts = [normalize_text(r) for r in refs]
+    results = [None] * len(texts)
+
+    # 待解析：normalize 後文字 -> 出現位置
+    pending = {}
+    keys = {}
+    for i, text in enumerate(texts):
+        if use_cache:
+            key = keys.get(text)
+            if key is None:
+                key = keys[text] = make_reference_key(text, PARSER_VERSION)
+            if text not in pending:
+                results[i] = get_cached_reference(key)
+                if results[i] is not None:
+                    continue
+        pending.setdefault(text, []).append(i)
+
+    todo = list(pending)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(todo))
+    if workers <= 1 or len(todo) < PARALLEL_MIN_REFS:
+        parsed_refs = _process_reference_chunk(todo)
+    else:
+        chunk = -(-len(todo) // (workers * CHUNKS_PER_WORKER))
+        chunks = [todo[i:i + chunk] for i in range(0, len(todo), chunk)]
+        parsed_refs = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for parsed in executor.map(_process_reference_chunk, chunks):
+                parsed_refs.extend(parsed)
+
+    for text, data in zip(todo, parsed_refs):
+        if use_cache:
+            put_cached_reference(keys[text], data)
+        positions = pending[text]
+        results[positions[0]] = data
+        # 同批重複出現的文獻各自拿一份副本
+        for i in positions[1:]:
+            results[i] = copy.deepcopy(data)
+    return results
@@ -7,16 +7,28 @@ def init_session_state():
     # 儲存參考文獻列表
     if 'reference_list' not in st.session_state:
         st.session_state.reference_list = []
+    # reference_list 的作者/年份/編號索引，內文擷取與交叉比對共用
+    if 'reference_index' not in st.session_state:
+        st.session_state.reference_index = None
     if 'missing_refs' not in st.session_state:
         st.session_state.missing_refs = []
     if 'unused_refs' not in st.session_state:
         st.session_state.unused_refs = []
     if 'comparison_done' not in st.session_state:
         st.session_state.comparison_done = False
+    # 比對結果的內容雜湊（匯出快取的 key）
+    if 'comparison_hash' not in st.session_state:
+        st.session_state.comparison_hash = None
 
-    # 只有在真正換檔案（檔名或大小改變）時才會清空比對結果
+    # 只有在真正換檔案（內容雜湊改變）時才會清空比對結果
     if 'last_file_id' not in st.session_state:
         st.session_state.last_file_id = None
+    # (上傳識別, 內容雜湊)：同一次上傳 rerun 時不必重新雜湊整份檔案
+    if 'upload_hash' not in st.session_state:
+        st.session_state.upload_hash = None
+    # 文件區段地圖（標題位置、參考文獻範圍、頁首頁尾），同一檔案 rerun 時沿用
+    if 'section_map' not in st.session_state:
+        st.session_state.section_map = None
 
 # 引入：
 import streamlit as st
\ No newline at end of file
@@ -0,0 +1,27 @@
+from citation.citation_matcher import build_reference_index, ensure_reference_index
+
+
+def _refs(*pairs):
+    return [
+        {"authors": [author], "year": year, "original": f"{author} ({year}). Title."}
+        for author, year in pairs
+    ]
+
+
+def test_ensure_reference_index_reuses_index_for_same_list():
+    refs = _refs(("Smith, J.", "2020"), ("Lee, K.", "2019"))
+    index = build_reference_index(refs)
+    assert ensure_reference_index(refs, index) is index
+    # 內容相同的另一份 list（例如 Streamlit 快取回傳的複本）也沿用
+    assert ensure_reference_index([dict(r) for r in refs], index) is index
+
+
+def test_ensure_reference_index_rebuilds_for_same_length_different_list():
+    old_refs = _refs(("Smith, J.", "2020"), ("Lee, K.", "2019"))
+    new_refs = _refs(("Wang, L.", "2021"), ("Chen, Y.", "2018"))
+    old_index = build_reference_index(old_refs)
+
+    index = ensure_reference_index(new_refs, old_index)
+    assert index is not old_index
+    assert index["years"] == ["2021", "2018"]
+    assert index == build_reference_index(new_refs)
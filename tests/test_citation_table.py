@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("streamlit")
+
+from ui.components import build_citation_table, filter_citation_table  # noqa: E402
+
+
+def _ieee(numbers):
+    return {"format": "IEEE", "original": f"[{', '.join(numbers)}]", "ref_number": numbers[0],
+            "all_numbers": numbers, "type": "IEEE-numeric", "matched_ref_index": None}
+
+
+def test_ref_number_sorts_numerically():
+    citations = [_ieee(["10"]), _ieee(["2", "3"]), _ieee(["1"]), {"format": "APA", "original": "(Smith, 2020)"}]
+    table = build_citation_table(citations, [])
+
+    ordered = filter_citation_table(table, sort_by="ref_number")
+    assert list(ordered["ref_number"])[:3] == ["1", "2, 3", "10"]
+    # 沒有編號的引用排在最後
+    assert ordered["format"].iloc[-1] == "APA"
+
+    descending = filter_citation_table(table, sort_by="ref_number", descending=True)
+    assert list(descending["ref_number"])[:3] == ["10", "2, 3", "1"]
@@ -0,0 +1,60 @@
+import io
+import zipfile
+
+import pytest
+
+pytest.importorskip("docx")
+pytest.importorskip("fitz")
+
+from utils.file_reader import (  # noqa: E402
+    _extract_paragraphs_from_docx_model,
+    iter_docx_paragraphs
+)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+_DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<w:body>'
+    '<w:p><w:r><w:t xml:space="preserve">Smith, J. (2020). Title. </w:t></w:r>'
+    '<w:hyperlink r:id="rId9"><w:r><w:t>https://doi.org/10.1000/xyz</w:t></w:r></w:hyperlink>'
+    '</w:p>'
+    '<w:p><w:r><w:t>Plain paragraph</w:t></w:r></w:p>'
+    '</w:body>'
+    '</w:document>'
+)
+
+
+def _make_docx():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _RELS)
+        package.writestr("word/document.xml", _DOCUMENT)
+    return buffer.getvalue()
+
+
+def test_docx_hyperlink_text_same_in_fast_path_and_fallback():
+    data = _make_docx()
+    fast = list(iter_docx_paragraphs(io.BytesIO(data)))
+    fallback = _extract_paragraphs_from_docx_model(io.BytesIO(data))
+
+    assert fast[0] == "Smith, J. (2020). Title. https://doi.org/10.1000/xyz"
+    assert fast == fallback
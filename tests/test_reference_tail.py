@@ -0,0 +1,147 @@
+import io
+
+import pytest
+
+from parsers.ieee.ieee_merger import merge_references_ieee_strict
+from utils.section_detector import (
+    build_section_map,
+    classify_document_sections,
+    extract_reference_section_tail_first,
+    find_running_line_indices
+)
+
+_REFERENCES = [
+    ("[1] A. Smith, \"Mutual infor-", "mation in networks,\" IEEE Trans., 2020."),
+    ("[2] B. Lee, \"Graph learning,\" in Proc. ICML, 2021, doi: 10.1109/abc-", "123."),
+    ("[3] C. Wang, \"Citation checking,\" 2019.",),
+    ("[4] D. Kim, \"Layout analysis of long", "documents,\" 2018."),
+    ("[5] E. Park, \"Running headers,\" 2017.",),
+    ("[6] F. Chen, \"Tail-first reading,\" 2016.",),
+]
+
+
+def _make_pages():
+    """8 頁文件：每頁有頁首與頁碼頁尾，第 6 頁起為參考文獻（跨頁）"""
+    pages = []
+    body = [[f"Body text line {p}-{i}." for i in range(4)] for p in range(5)]
+    ref_lines = [(line, i > 0) for ref in _REFERENCES for i, line in enumerate(ref)]
+    ref_pages = [ref_lines[0:4], ref_lines[4:7], ref_lines[7:]]
+    for page_no in range(1, 9):
+        lines = [("Journal of Citation Studies", False)]
+        if page_no <= 5:
+            lines += [(text, False) for text in body[page_no - 1]]
+        else:
+            if page_no == 6:
+                lines.append(("References", False))
+            lines += ref_pages[page_no - 6]
+        lines.append((f"Page {page_no}", False))
+        pages.append((page_no, [t for t, _ in lines], [j for _, j in lines]))
+    return pages
+
+
+def _full_document_refs(pages):
+    """與 ui.stage_cache.split_document 相同的整份讀取流程"""
+    paragraphs = [line for _, lines, _ in pages for line in lines]
+    page_numbers = [page_no for page_no, lines, _ in pages for _ in lines]
+    line_joins = [j for _, _, joins in pages for j in joins]
+    noise_indices = find_running_line_indices(paragraphs, page_numbers)
+    section_map = build_section_map(paragraphs, noise_indices)
+    _, ref_paras, _, _ = classify_document_sections(
+        paragraphs, section_map=section_map, line_joins=line_joins
+    )
+    return ref_paras
+
+
+def test_tail_first_matches_full_document():
+    pages = _make_pages()
+    expected = _full_document_refs(pages)
+    tail_refs, keyword, _ = extract_reference_section_tail_first(reversed(pages))
+
+    assert keyword == "References"
+    assert tail_refs == expected
+    assert len(merge_references_ieee_strict(tail_refs)) == len(_REFERENCES)
+    assert not any("Journal of Citation Studies" in r or r.startswith("Page") for r in tail_refs)
+
+
+def test_tail_first_stops_reading_early():
+    pages = _make_pages()
+    consumed = []
+
+    def pages_from_end():
+        for page in reversed(pages):
+            consumed.append(page[0])
+            yield page
+
+    extract_reference_section_tail_first(pages_from_end())
+    assert 1 not in consumed
+
+
+def test_tail_first_matches_full_document_pdf():
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("docx")  # utils.file_reader 也匯入 python-docx
+    from utils.file_reader import iter_pdf_pages_reversed, read_pdf_document
+
+    doc = fitz.open()
+    for _, lines, joins in _make_pages():
+        page = doc.new_page()
+        y = 72
+        for text, joins_previous in zip(lines, joins):
+            # 續行以懸掛縮排排版，讓版面判斷標記為延續
+            page.insert_text((90 if joins_previous else 72, y), text, fontsize=10)
+            y += 14
+    pdf_bytes = doc.tobytes()
+
+    document = read_pdf_document(io.BytesIO(pdf_bytes), workers=1, layout=True)
+    noise_indices = find_running_line_indices(document["paragraphs"], document["page_numbers"])
+    section_map = build_section_map(document["paragraphs"], noise_indices)
+    _, expected, _, _ = classify_document_sections(
+        document["paragraphs"], section_map=section_map, line_joins=document["line_joins"]
+    )
+
+    tail_refs, _, _ = extract_reference_section_tail_first(iter_pdf_pages_reversed(io.BytesIO(pdf_bytes)))
+    assert expected
+    assert tail_refs == expected
+
+
+def _ieee_pdf(fitz, body_pages=40, ref_pages=12, refs_per_page=10):
+    """IEEE 論文 PDF：每頁有頁首與頁碼頁尾，文獻編號與內容分開排版"""
+    doc = fitz.open()
+    number = 0
+    for page_no in range(1, body_pages + ref_pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 50), "IEEE Transactions on Citation Studies", fontsize=9)
+        y = 90
+        if page_no <= body_pages:
+            for i in range(5):
+                page.insert_text((72, y), f"Body text {page_no}-{i} as shown in [{i + 1}].", fontsize=10)
+                y += 14
+        else:
+            if page_no == body_pages + 1:
+                page.insert_text((72, y), "References", fontsize=12)
+                y += 20
+            for _ in range(refs_per_page):
+                number += 1
+                page.insert_text((72, y), f"[{number}]", fontsize=10)
+                page.insert_text((100, y), f"A. Author{number}, \"Title {number},\" 2020.", fontsize=10)
+                y += 14
+        page.insert_text((290, 800), f"Page {page_no}", fontsize=9)
+    return doc.tobytes(), number
+
+
+def test_tail_first_matches_full_document_long_ieee_pdf():
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("docx")  # utils.file_reader 也匯入 python-docx
+    from utils.file_reader import iter_pdf_pages_reversed, read_pdf_document
+
+    pdf_bytes, ref_count = _ieee_pdf(fitz)
+    document = read_pdf_document(io.BytesIO(pdf_bytes), workers=1, layout=True)
+    noise_indices = find_running_line_indices(document["paragraphs"], document["page_numbers"])
+    section_map = build_section_map(document["paragraphs"], noise_indices)
+    _, expected, _, _ = classify_document_sections(
+        document["paragraphs"], section_map=section_map, line_joins=document["line_joins"]
+    )
+
+    tail_refs, _, _ = extract_reference_section_tail_first(iter_pdf_pages_reversed(io.BytesIO(pdf_bytes)))
+    assert tail_refs == expected
+    assert len(merge_references_ieee_strict(tail_refs)) == ref_count
+    assert not any("IEEE Transactions" in r for r in tail_refs)
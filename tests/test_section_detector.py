@@ -0,0 +1,89 @@
+from parsers.ieee.ieee_merger import merge_references_ieee_strict
+from utils.section_detector import (
+    build_section_map,
+    classify_document_sections,
+    find_running_line_indices,
+    group_reference_lines_by_layout
+)
+
+
+def _group(lines):
+    """每一行都標記為版面續行（第一行除外），全部視為參考文獻段落"""
+    joins = [False] + [True] * (len(lines) - 1)
+    return group_reference_lines_by_layout(lines, list(range(len(lines))), joins)
+
+
+def test_layout_join_leaves_hyphenated_lines_to_the_merger():
+    lines = ["[1] A. Smith, \"Mutual infor-", "mation in networks,\" 2020."]
+    assert _group(lines) == lines
+    # IEEE merger 的規則：下一行小寫開頭時保留連字號（URL 斷行保護）
+    assert merge_references_ieee_strict(_group(lines)) == [
+        "[1] A. Smith, \"Mutual infor-mation in networks,\" 2020."
+    ]
+
+
+def test_layout_join_keeps_wrapped_url_and_doi():
+    url_lines = ["[2] B. Lee, Title, 2021. [Online]. Available: https://ex.org/some-", "path1"]
+    assert merge_references_ieee_strict(_group(url_lines)) == [
+        "[2] B. Lee, Title, 2021. [Online]. Available: https://ex.org/some-path1"
+    ]
+    doi_lines = ["[3] C. Wang, Title, 2020, doi: 10.1000/abc-", "def.2020"]
+    assert merge_references_ieee_strict(_group(doi_lines)) == [
+        "[3] C. Wang, Title, 2020, doi: 10.1000/abc-def.2020"
+    ]
+    numeric_doi = ["[4] D. Kim, Title, 2021, doi: 10.1109/abc-", "123."]
+    assert merge_references_ieee_strict(_group(numeric_doi)) == [
+        "[4] D. Kim, Title, 2021, doi: 10.1109/abc-123."
+    ]
+
+
+def test_layout_join_continues_after_hyphenated_line():
+    lines = ["[5] E. Park, \"Long infor-", "mation title,\" in", "Proc. Conf., 2019."]
+    assert _group(lines) == ["[5] E. Park, \"Long infor-", "mation title,\" in Proc. Conf., 2019."]
+
+
+def test_layout_join_spacing():
+    assert _group(["王小明（2020）。研究", "方法。"]) == ["王小明（2020）。研究方法。"]
+    assert _group(["Smith, J. (2020). A", "study."]) == ["Smith, J. (2020). A study."]
+
+
+def _ieee_document(body_pages=6, ref_pages=4, refs_per_page=10):
+    """IEEE 文件：每頁有頁首與頁碼頁尾；文獻編號與內容分成兩行（PyMuPDF 常見的抽取結果）"""
+    paragraphs, page_numbers, line_joins = [], [], []
+
+    def add(page_no, text, joins=False):
+        paragraphs.append(text)
+        page_numbers.append(page_no)
+        line_joins.append(joins)
+
+    number = 0
+    for page_no in range(1, body_pages + ref_pages + 1):
+        add(page_no, "IEEE Transactions on Citation Studies")
+        if page_no <= body_pages:
+            for i in range(5):
+                add(page_no, f"Body text {page_no}-{i} as shown in [{i + 1}].")
+        else:
+            if page_no == body_pages + 1:
+                add(page_no, "References")
+            for _ in range(refs_per_page):
+                number += 1
+                add(page_no, f"[{number}]")
+                add(page_no, f"A. Author{number}, \"Title {number},\" 2020.", joins=True)
+        add(page_no, f"Page {page_no}")
+    return paragraphs, page_numbers, line_joins
+
+
+def test_running_line_detection_keeps_ieee_labels_at_page_edges():
+    paragraphs, page_numbers, line_joins = _ieee_document()
+    noise_indices = find_running_line_indices(paragraphs, page_numbers)
+
+    assert not any(paragraphs[i].startswith("[") for i in noise_indices)
+    assert any(paragraphs[i].startswith("IEEE Transactions") for i in noise_indices)
+
+    section_map = build_section_map(paragraphs, noise_indices)
+    _, ref_paras, _, _ = classify_document_sections(
+        paragraphs, section_map=section_map, line_joins=line_joins
+    )
+    merged = merge_references_ieee_strict(ref_paras)
+    assert len(merged) == 40
+    assert merged[8] == "[9] A. Author9, \"Title 9,\" 2020."
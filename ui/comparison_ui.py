@@ -1,9 +1,12 @@
 import streamlit as st
-import json
-import csv
-import pandas as pd
 from datetime import datetime
 from checker import check_references
+from utils.report_export import (
+    build_csv_export,
+    build_json_export,
+    export_result_hash,
+    iter_ndjson_lines
+)
 from utils.i18n import get_text # 假設您有匯入翻譯
 
 def run_comparison():
@@ -13,12 +16,16 @@ def run_comparison():
         
     missing, unused, year_errors = check_references(
         st.session_state.in_text_citations,
-        st.session_state.reference_list
+        st.session_state.reference_list,
+        reference_index=st.session_state.get('reference_index'),
+        trust_matched_index=True
     )
     
     st.session_state.missing_refs = missing
     st.session_state.unused_refs = unused
     st.session_state.year_error_refs = year_errors
+    # 比對結果的內容雜湊，匯出內容以此快取
+    st.session_state.comparison_hash = export_result_hash(missing, unused, year_errors)
     st.session_state.comparison_done = True
     return True
 
@@ -87,77 +94,59 @@ def display_year_error_tab():
                         st.write(f"{get_text('citation_in_text')} {mismatch['citation']}")
 
 
+EXPORT_CACHE_MAX_ENTRIES = 4
+
+
+@st.cache_data(max_entries=EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def _export_json_payloads(result_hash, _missing_refs, _unused_refs, _year_error_refs):
+    """JSON / NDJSON 匯出內容，以比對結果雜湊快取（與介面語言無關）"""
+    json_bytes = build_json_export(_missing_refs, _unused_refs, _year_error_refs)
+    ndjson_bytes = b"".join(iter_ndjson_lines(_missing_refs, _unused_refs, _year_error_refs))
+    return json_bytes, ndjson_bytes
+
+
+@st.cache_data(max_entries=EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def _export_csv_payload(result_hash, header, detail_format, _missing_refs, _unused_refs, _year_error_refs):
+    """CSV 匯出內容，以比對結果雜湊 + 表頭文字快取（表頭隨介面語言改變）"""
+    return build_csv_export(_missing_refs, _unused_refs, _year_error_refs, header, detail_format)
+
+
 def display_export_section():
-    """顯示匯出功能區"""
+    """顯示匯出功能區（匯出內容依比對結果雜湊快取，rerun 時不重新產生）"""
     st.subheader(get_text("export_title"))
     
     missing_refs = st.session_state.get('missing_refs', [])
     unused_refs = st.session_state.get('unused_refs', [])
     year_error_refs = st.session_state.get('year_error_refs', [])
+    result_hash = st.session_state.get('comparison_hash') or export_result_hash(
+        missing_refs, unused_refs, year_error_refs
+    )
     
-    # 準備 JSON
-    export_obj = {
-        "missing_references": missing_refs,
-        "unused_references": unused_refs,
-        "year_error_references": year_error_refs
-    }
-    json_bytes = json.dumps(export_obj, ensure_ascii=False, indent=2).encode("utf-8")
-    
-    # 準備 CSV
-    def to_df(items, kind):
-        # 定義 CSV 欄位名稱 (如果要支援多語言匯出，這裡也要用 get_text)
-        # 但通常 CSV 欄位名稱保持英文比較好處理，這裡示範用多語言表頭
-        columns = [
-            get_text("csv_header_type"), 
-            get_text("csv_header_original"), 
-            get_text("csv_header_format"), 
-            get_text("csv_header_ref_num"), 
-            get_text("csv_header_author"), 
-            get_text("csv_header_year"), 
-            get_text("csv_header_detail")
-        ]
-        
-        if not items:
-            return pd.DataFrame(columns=columns)
-            
-        rows = []
-        for x in items:
-            error_detail = ""
-            if 'year_mismatch' in x and x['year_mismatch']:
-                mismatch_info = []
-                for m in x['year_mismatch']:
-                    # 使用格式化字串
-                    detail_str = get_text("err_detail_format", cited=m['cited_year'], correct=m['correct_year'])
-                    mismatch_info.append(detail_str)
-                error_detail = "; ".join(mismatch_info)
-            
-            rows.append({
-                columns[0]: kind,
-                columns[1]: x.get("original", ""),
-                columns[2]: x.get("format", ""),
-                columns[3]: x.get("ref_number", ""),
-                columns[4]: x.get("author", ""),
-                columns[5]: x.get("year", ""),
-                columns[6]: error_detail
-            })
-        return pd.DataFrame(rows)
-    
-    df_missing = to_df(missing_refs, "missing")
-    df_unused = to_df(unused_refs, "unused")
-    df_year_error = to_df(year_error_refs, "year_error")
-    df_export = pd.concat([df_missing, df_unused, df_year_error], ignore_index=True)
-    
-    # 使用 utf-8-sig + quoting=QUOTE_ALL 解決 Excel 亂碼與欄位錯位
-    csv_bytes = df_export.to_csv(index=False, quoting=csv.QUOTE_ALL).encode("utf-8-sig")
+    # 準備 JSON / NDJSON
+    json_bytes, ndjson_bytes = _export_json_payloads(result_hash, missing_refs, unused_refs, year_error_refs)
+    
+    # 準備 CSV：多語言表頭；使用 utf-8-sig + 全部欄位加引號解決 Excel 亂碼與欄位錯位
+    header = (
+        get_text("csv_header_type"), 
+        get_text("csv_header_original"), 
+        get_text("csv_header_format"), 
+        get_text("csv_header_ref_num"), 
+        get_text("csv_header_author"), 
+        get_text("csv_header_year"), 
+        get_text("csv_header_detail")
+    )
+    detail_format = get_text("err_detail_format")
+    csv_bytes = _export_csv_payload(result_hash, header, detail_format, missing_refs, unused_refs, year_error_refs)
     
     # 下載按鈕
-    col_json, col_csv = st.columns(2)
+    col_json, col_csv, col_ndjson = st.columns(3)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     with col_json:
         st.download_button(
             label=get_text("download_json"),
             data=json_bytes,
-            file_name=f"citation_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            file_name=f"citation_check_{timestamp}.json",
             mime="application/json",
             use_container_width=True,
             key="download_json_button"
@@ -167,11 +156,21 @@ def display_export_section():
         st.download_button(
             label=get_text("download_csv"),
             data=csv_bytes,
-            file_name=f"citation_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            file_name=f"citation_check_{timestamp}.csv",
             mime="text/csv",
             use_container_width=True,
             key="download_csv_button"
         )
+    
+    with col_ndjson:
+        st.download_button(
+            label=get_text("download_ndjson"),
+            data=ndjson_bytes,
+            file_name=f"citation_check_{timestamp}.ndjson",
+            mime="application/x-ndjson",
+            use_container_width=True,
+            key="download_ndjson_button"
+        )
 
 
 def display_comparison_results():
@@ -1,5 +1,8 @@
 import streamlit as st
+import hashlib
+import json
 import re
+import pandas as pd
 # 引用解析相關
 from parsers.ieee.ieee_converter import convert_en_ieee_to_apa
 from parsers.apa.apa_converter import (
@@ -12,186 +15,162 @@ from parsers.apa.apa_converter import (
 from utils.i18n import get_text
 
 
-def display_reference_with_details(ref, index, format_type='IEEE'):
-    """ 統一顯示參考文獻的詳細資訊 """
+REF_FRAGMENT_CACHE_ENTRIES = 2000
+
+
+def reference_content_hash(ref):
+    """解析後參考文獻的內容雜湊：欄位內容相同即視為同一筆，用於快取繪製片段與轉換結果"""
+    payload = json.dumps(ref, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _reference_converter(ref, format_type):
+    """
+    依格式與語言選擇格式轉換
+    回傳 (按鈕文字 key, 轉換函式)；沒有可用的轉換時回傳 (None, None)
+    """
+    lang = ref.get('lang', 'EN')
+    if format_type == 'IEEE':
+        return "to_apa", convert_en_ieee_to_apa
+    if format_type == 'APA':
+        if lang == 'EN':
+            return "to_ieee", convert_en_apa_to_ieee
+        if lang == 'ZH':
+            fmt = ref.get('format', '')
+            if 'APA' in fmt:
+                return "to_num", convert_zh_apa_to_num
+            if 'Numbered' in fmt:
+                return "to_apa", convert_zh_num_to_apa
+    return None, None
+
+
+def build_reference_fragment(ref, index, format_type='IEEE'):
+    """
+    組出單筆參考文獻的顯示內容（不呼叫任何 st 元件）
+    回傳 dict：header（expander 標題）/ details（欄位 Markdown）/ original_html（原文區塊）
+    """
     title_text = ref.get('title', get_text("no_title"))
     ref_num = ref.get('ref_number', str(index))
-    
-    # 根據來源類型決定圖示
     lang = ref.get('lang', 'EN')
-    
-    with st.expander(f"[{ref_num}] {title_text}", expanded=False):
-        # 作者
-        authors_data = ref.get('authors')
-        if authors_data:
-            st.markdown(f"**{get_text('authors')}**")
-            # IEEE 格式才使用 parsed_authors（名 姓）
-            if format_type == 'IEEE' and ref.get('parsed_authors'):
-                auth_list = [f"{a.get('first', '')} {a.get('last', '')}".strip() for a in ref['parsed_authors']]
-                st.markdown(f"　└─ {', '.join(auth_list)}")
-            elif isinstance(authors_data, list):
-                # APA 格式的作者列表
-                if lang == 'ZH':
-                    author_display = "、".join(authors_data)
-                else:
-                    author_display = ", ".join(authors_data)
-                st.markdown(f"　└─ {author_display}")
-            else:
-                # 字串格式作者
-                st.markdown(f"　└─ {authors_data}")
-        
-        # 標題
-        if ref.get('title'):
-            st.markdown(f"**{get_text('title')}**")
-            st.markdown(f"　└─ {ref['title']}")
-        
-        # 書名（若為書籍章節）
-        if ref.get('book_title'):
-            st.markdown(f"**{get_text('book_title')}**")
-            st.markdown(f"　└─ {ref['book_title']}")
-
-        # 論文集名稱（若為會議論文）
-        if ref.get('proceedings_title'):
-            st.markdown(f"**{get_text('proceedings')}**")
-            st.markdown(f"　└─ In {ref['proceedings_title']}")
-        
-        # 編輯
-        if ref.get('editors'):
-            st.markdown(f"**{get_text('editors')}**")
-            st.markdown(f"　└─ {ref['editors']}")
-        
-        # 來源（會議、期刊、出版社）
-        if format_type == 'IEEE':
-            source_show = (ref.get('conference_name') or 
-                        ref.get('journal_name') or 
-                        ref.get('source'))
-        else:  # APA
-            source_show = (ref.get('source') or 
-                        ref.get('publisher'))
-
-        if source_show:
-            if ref.get('conference_name'):
-                label = get_text("conf_name")
-            elif ref.get('journal_name'):
-                label = get_text("journal_name")
-            elif ref.get('source'):
-                label = get_text("journal_name") if format_type == 'IEEE' else get_text("journal_name")
-            elif ref.get('publisher'):
-                label = get_text("publisher")
-            else:
-                label = get_text("source")
-            st.markdown(f"**📖 {label}**")
-            st.markdown(f"　└─ {source_show}")
-        
-        # 卷期
-        if ref.get('volume') or ref.get('issue'):
-            volume_val = ref.get('volume')
-            issue_val = ref.get('issue')
-            
-            if volume_val and issue_val:
-                issue_str = str(issue_val)
-                is_numeric_issue = bool(
-                    issue_str.isdigit() or 
-                    re.match(r'^\d+[\-–—]\d+$', issue_str) or 
-                    re.match(r'^\d+,\s*\d+$', issue_str)
-                )
-                
-                if is_numeric_issue:
-                    vi_display = f"Vol. {volume_val}, No. {issue_str}"
-                else:
-                    vi_display = f"Vol. {volume_val}({issue_str})"
-            elif volume_val:
-                vi_display = f"Vol. {volume_val}"
-            elif issue_val:
-                vi_display = f"No. {issue_val}"
+
+    # (標籤, 內容) 依顯示順序排列
+    fields = []
+
+    # 作者
+    authors_data = ref.get('authors')
+    if authors_data:
+        # IEEE 格式才使用 parsed_authors（名 姓）
+        if format_type == 'IEEE' and ref.get('parsed_authors'):
+            auth_list = [f"{a.get('first', '')} {a.get('last', '')}".strip() for a in ref['parsed_authors']]
+            fields.append((get_text('authors'), ', '.join(auth_list)))
+        elif isinstance(authors_data, list):
+            # APA 格式的作者列表
+            if lang == 'ZH':
+                author_display = "、".join(authors_data)
             else:
-                vi_display = None
-            
-            if vi_display:
-                st.markdown(f"**{get_text('volume')}**")
-                st.markdown(f"　└─ {vi_display}")
-        
-        # 版次
-        if ref.get('edition'):
-            st.markdown(f"**{get_text('edition')}**")
-            st.markdown(f"　└─ {ref['edition']}")
-
-        # 頁碼/文章編號
-        if ref.get('article_number'):
-            st.markdown(f"**{get_text('article_num')}**")
-            st.markdown(f"　└─ {ref['article_number']}")
-        
-        if ref.get('pages'):
-            formatted_pages = format_pages_display(ref['pages'])
-            st.markdown(f"**{get_text('pages')}**")
-            st.markdown(f"　└─ {formatted_pages}")
-        
-        # 年份與月份
-        if ref.get('year'):
-            date_str = ref['year']
-            if ref.get('month'):
-                date_str = f"{ref['month']} {date_str}"
-            st.markdown(f"**{get_text('date')}**")
-            st.markdown(f"　└─ {date_str}")
-        
-        # 文件類型
-        if ref.get('document_type'):
-            st.markdown(f"**{get_text('doc_type')}**")
-            st.markdown(f"　└─ {ref['document_type']}")
-        
-        # 電子資源
-        if ref.get('doi'):
-            st.markdown(f"**{get_text('doi')}**")
-            st.markdown(f"　└─ [{ref['doi']}](https://doi.org/{ref['doi']})")
-        
-        if ref.get('url'):
-            st.markdown(f"**{get_text('url')}**")
-            st.markdown(f"　└─ [{ref['url']}]({ref['url']})")
+                author_display = ", ".join(authors_data)
+            fields.append((get_text('authors'), author_display))
+        else:
+            # 字串格式作者
+            fields.append((get_text('authors'), authors_data))
 
-        col_title, col_button = st.columns([3, 1])
-        with col_title:
-            st.markdown(get_text("convert_fmt"))
-    
-        with col_button:
-            # 根據格式顯示不同的轉換按鈕
-            if format_type == 'IEEE':
-                button_clicked = st.button(get_text("to_apa"), key=f"ref_to_apa_{index}", use_container_width=True)
-            elif format_type == 'APA':
-                if lang == 'EN':
-                    button_clicked = st.button(get_text("to_ieee"), key=f"ref_to_ieee_{index}", use_container_width=True)
-                elif lang == 'ZH':
-                    fmt = ref.get('format', '')
-                    if 'APA' in fmt:
-                        button_clicked = st.button(get_text("to_num"), key=f"ref_to_num_{index}", use_container_width=True)
-                    elif 'Numbered' in fmt:
-                        button_clicked = st.button(get_text("to_apa"), key=f"ref_to_apa_{index}", use_container_width=True)
-                    else:
-                        button_clicked = False
-                else:
-                    button_clicked = False
+    # 標題
+    if ref.get('title'):
+        fields.append((get_text('title'), ref['title']))
+
+    # 書名（若為書籍章節）
+    if ref.get('book_title'):
+        fields.append((get_text('book_title'), ref['book_title']))
+
+    # 論文集名稱（若為會議論文）
+    if ref.get('proceedings_title'):
+        fields.append((get_text('proceedings'), f"In {ref['proceedings_title']}"))
+
+    # 編輯
+    if ref.get('editors'):
+        fields.append((get_text('editors'), ref['editors']))
+
+    # 來源（會議、期刊、出版社）
+    if format_type == 'IEEE':
+        source_show = (ref.get('conference_name') or
+                    ref.get('journal_name') or
+                    ref.get('source'))
+    else:  # APA
+        source_show = (ref.get('source') or
+                    ref.get('publisher'))
+
+    if source_show:
+        if ref.get('conference_name'):
+            label = get_text("conf_name")
+        elif ref.get('journal_name'):
+            label = get_text("journal_name")
+        elif ref.get('source'):
+            label = get_text("journal_name") if format_type == 'IEEE' else get_text("journal_name")
+        elif ref.get('publisher'):
+            label = get_text("publisher")
+        else:
+            label = get_text("source")
+        fields.append((f"📖 {label}", source_show))
+
+    # 卷期
+    if ref.get('volume') or ref.get('issue'):
+        volume_val = ref.get('volume')
+        issue_val = ref.get('issue')
+
+        if volume_val and issue_val:
+            issue_str = str(issue_val)
+            is_numeric_issue = bool(
+                issue_str.isdigit() or
+                re.match(r'^\d+[\-–—]\d+$', issue_str) or
+                re.match(r'^\d+,\s*\d+$', issue_str)
+            )
+
+            if is_numeric_issue:
+                vi_display = f"Vol. {volume_val}, No. {issue_str}"
             else:
-                button_clicked = False
-        
-        # 顯示轉換結果
-        if button_clicked:
-            if format_type == 'IEEE':
-                converted_text = convert_en_ieee_to_apa(ref)
-            elif format_type == 'APA':
-                if lang == 'EN':
-                    converted_text = convert_en_apa_to_ieee(ref)
-                elif lang == 'ZH':
-                    fmt = ref.get('format', '')
-                    if 'APA' in fmt:
-                        converted_text = convert_zh_apa_to_num(ref)
-                    elif 'Numbered' in fmt:
-                        converted_text = convert_zh_num_to_apa(ref)
-            
-            st.code(converted_text, language=None)
-        
-        # 原文
-        st.divider()
-        st.caption(get_text("orig_text"))
-        st.markdown(f"""
+                vi_display = f"Vol. {volume_val}({issue_str})"
+        elif volume_val:
+            vi_display = f"Vol. {volume_val}"
+        elif issue_val:
+            vi_display = f"No. {issue_val}"
+        else:
+            vi_display = None
+
+        if vi_display:
+            fields.append((get_text('volume'), vi_display))
+
+    # 版次
+    if ref.get('edition'):
+        fields.append((get_text('edition'), ref['edition']))
+
+    # 頁碼/文章編號
+    if ref.get('article_number'):
+        fields.append((get_text('article_num'), ref['article_number']))
+
+    if ref.get('pages'):
+        fields.append((get_text('pages'), format_pages_display(ref['pages'])))
+
+    # 年份與月份
+    if ref.get('year'):
+        date_str = ref['year']
+        if ref.get('month'):
+            date_str = f"{ref['month']} {date_str}"
+        fields.append((get_text('date'), date_str))
+
+    # 文件類型
+    if ref.get('document_type'):
+        fields.append((get_text('doc_type'), ref['document_type']))
+
+    # 電子資源
+    if ref.get('doi'):
+        fields.append((get_text('doi'), f"[{ref['doi']}](https://doi.org/{ref['doi']})"))
+
+    if ref.get('url'):
+        fields.append((get_text('url'), f"[{ref['url']}]({ref['url']})"))
+
+    details = "\n\n".join(f"**{label}**\n\n　└─ {value}" for label, value in fields)
+
+    original_html = f"""
             <div style="
                 background-color: #f0f2f6;
                 border-left: 3px solid #1f77b4;
@@ -207,7 +186,266 @@ def display_reference_with_details(ref, index, format_type='IEEE'):
             ">
             {ref['original']}
             </div>
-            """, unsafe_allow_html=True)
+            """
+
+    return {
+        "header": f"[{ref_num}] {title_text}",
+        "details": details,
+        "original_html": original_html,
+    }
+
+
+@st.cache_data(max_entries=REF_FRAGMENT_CACHE_ENTRIES, show_spinner=False)
+def _cached_reference_fragment(ref_hash, index, format_type, language, _ref):
+    """以內容雜湊 + 筆號 + 格式 + 介面語言快取顯示內容（語言決定欄位標籤）"""
+    return build_reference_fragment(_ref, index, format_type)
+
+
+@st.cache_data(max_entries=REF_FRAGMENT_CACHE_ENTRIES, show_spinner=False)
+def _cached_converted_text(ref_hash, format_type, _ref):
+    """以內容雜湊 + 格式快取格式轉換結果（轉換結果與介面語言無關）"""
+    _, converter = _reference_converter(_ref, format_type)
+    return converter(_ref) if converter else None
+
+
+def display_reference_with_details(ref, index, format_type='IEEE', expanded=False):
+    """
+    統一顯示參考文獻的詳細資訊
+    顯示內容與格式轉換結果都依內容雜湊快取，rerun 時只需送出快取的字串；
+    格式轉換只在按下轉換按鈕時才執行
+    """
+    ref_hash = reference_content_hash(ref)
+    fragment = _cached_reference_fragment(
+        ref_hash, index, format_type, st.session_state.get('language', 'zh'), ref
+    )
+
+    with st.expander(fragment["header"], expanded=expanded):
+        if fragment["details"]:
+            st.markdown(fragment["details"])
+
+        col_title, col_button = st.columns([3, 1])
+        with col_title:
+            st.markdown(get_text("convert_fmt"))
+
+        # 根據格式顯示不同的轉換按鈕
+        button_label, _ = _reference_converter(ref, format_type)
+        with col_button:
+            if button_label:
+                button_clicked = st.button(
+                    get_text(button_label), key=f"ref_{button_label}_{index}", use_container_width=True
+                )
+            else:
+                button_clicked = False
+
+        # 顯示轉換結果
+        if button_clicked:
+            st.code(_cached_converted_text(ref_hash, format_type, ref), language=None)
+
+        # 原文
+        st.divider()
+        st.caption(get_text("orig_text"))
+        st.markdown(fragment["original_html"], unsafe_allow_html=True)
+
+
+REF_PAGE_SIZES = (10, 25, 50, 100)
+
+
+def _reference_search_text(ref):
+    """篩選用的比對字串：編號 + 作者 + 年份 + 標題 + 原文（小寫）"""
+    authors = ref.get('authors') or ref.get('author') or ''
+    if isinstance(authors, list):
+        authors = ' '.join(map(str, authors))
+    parts = (ref.get('ref_number'), authors, ref.get('year'), ref.get('title'), ref.get('original'))
+    return ' '.join(str(p) for p in parts if p).lower()
+
+
+def _filter_references(reference_list, query):
+    """回傳符合篩選字串的 (筆號, ref) 列表；筆號為在 reference_list 中的 1-based 位置"""
+    query = (query or '').strip().lower()
+    return [
+        (idx, ref) for idx, ref in enumerate(reference_list, 1)
+        if not query or query in _reference_search_text(ref)
+    ]
+
+
+def _jump_to_reference(reference_list, key):
+    """跳至編號的 on_change callback：在腳本重跑前設定頁數，之後仍可自由翻頁"""
+    target = st.session_state.get(f"{key}_jump", '').strip().strip('[]【】')
+    st.session_state[f"{key}_expand"] = None
+    st.session_state[f"{key}_jump_missing"] = None
+    if not target:
+        return
+
+    entries = _filter_references(reference_list, st.session_state.get(f"{key}_filter"))
+    page_size = st.session_state.get(f"{key}_page_size", REF_PAGE_SIZES[0])
+    for pos, (idx, ref) in enumerate(entries):
+        if str(ref.get('ref_number', idx)).strip() == target:
+            st.session_state[f"{key}_page"] = pos // page_size + 1
+            st.session_state[f"{key}_expand"] = idx
+            return
+    st.session_state[f"{key}_jump_missing"] = target
+
+
+def display_reference_details_paginated(reference_list, format_type='IEEE', key="ref_detail"):
+    """
+    分頁顯示參考文獻詳細資訊：每次 rerun 只建立目前頁面的 expander
+    提供篩選、每頁筆數、頁數與跳至編號；key 區分同一頁面上的多個列表
+    """
+    col_filter, col_size, col_jump = st.columns([3, 1, 1])
+    with col_filter:
+        query = st.text_input(get_text("ref_filter"), key=f"{key}_filter")
+    with col_size:
+        page_size = st.selectbox(get_text("ref_page_size"), REF_PAGE_SIZES, key=f"{key}_page_size")
+    with col_jump:
+        st.text_input(
+            get_text("ref_jump"), key=f"{key}_jump",
+            on_change=_jump_to_reference, args=(reference_list, key)
+        )
+
+    missing = st.session_state.get(f"{key}_jump_missing")
+    if missing:
+        st.warning(get_text("ref_jump_not_found", number=missing))
+
+    entries = _filter_references(reference_list, query)
+    if not entries:
+        st.info(get_text("ref_filter_empty"))
+        return
+
+    page_count = (len(entries) + page_size - 1) // page_size
+    page_key = f"{key}_page"
+    # 篩選或每頁筆數改變後，原本的頁數可能超出範圍
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+    if page_count > 1:
+        page = st.number_input(
+            get_text("ref_page", pages=page_count),
+            min_value=1, max_value=page_count, step=1, key=page_key
+        )
+    else:
+        page = 1
+
+    start = (page - 1) * page_size
+    visible = entries[start:start + page_size]
+    st.caption(get_text("ref_page_caption", start=start + 1, end=start + len(visible), count=len(entries)))
+
+    expand_idx = st.session_state.get(f"{key}_expand")
+    for idx, ref in visible:
+        display_reference_with_details(ref, idx, format_type=format_type, expanded=(idx == expand_idx))
+
+
+CITATION_TABLE_THRESHOLD = 200
+CITATION_TABLE_COLUMNS = ("no", "original", "format", "author", "year", "ref_number", "type", "matched")
+CITATION_TABLE_SORT_COLUMNS = ("no", "author", "year", "ref_number", "format", "type", "matched")
+# 排序時改用的數值欄位：ref_number 是顯示用字串（"2, 3, 4"），依字串排序會讓 "10" 排在 "2" 前面
+CITATION_TABLE_SORT_KEYS = {"ref_number": "ref_sort"}
+_FIRST_NUMBER_RE = re.compile(r'\d+')
+
+
+def build_citation_table(citations, reference_list):
+    """
+    內文引用轉成 DataFrame，每則引用一列（不呼叫任何 st 元件）
+    作者/年份優先取對應到的參考文獻（與列表模式一致），matched 表示是否對應到參考文獻
+    ref_sort 為第一個參考編號的整數（nullable Int64），只供排序，不顯示
+    """
+    rows = []
+    for i, cite in enumerate(citations, 1):
+        matched_ref = None
+        matched_ref_index = cite.get('matched_ref_index')
+        if matched_ref_index is not None and reference_list and 0 <= matched_ref_index < len(reference_list):
+            matched_ref = reference_list[matched_ref_index]
+
+        if matched_ref:
+            authors = matched_ref.get('authors') or matched_ref.get('author')
+            year = matched_ref.get('year')
+        else:
+            authors = cite.get('author')
+            year = cite.get('year')
+        if isinstance(authors, list):
+            authors = ", ".join(authors)
+
+        if cite.get('all_numbers') and len(cite['all_numbers']) > 1:
+            ref_number = ", ".join(cite['all_numbers'])
+        else:
+            ref_number = cite.get('ref_number')
+        first_number = _FIRST_NUMBER_RE.search(str(ref_number)) if ref_number else None
+
+        rows.append({
+            "no": i,
+            "original": cite.get('original'),
+            "format": cite.get('format'),
+            "author": str(authors) if authors else None,
+            "year": str(year) if year else None,
+            "ref_number": ref_number,
+            "type": cite.get('type', '?'),
+            "matched": matched_ref is not None,
+            "ref_sort": int(first_number.group()) if first_number else None,
+        })
+    table = pd.DataFrame(rows, columns=list(CITATION_TABLE_COLUMNS) + ["ref_sort"])
+    table["ref_sort"] = table["ref_sort"].astype("Int64")
+    return table
+
+
+def filter_citation_table(table, query="", status="all", formats=None, sort_by="no", descending=False):
+    """
+    篩選與排序引用表格（在伺服器端完成，瀏覽器只收到目前要顯示的列）
+    - query：比對原文與作者（不分大小寫）
+    - status："all" / "matched" / "unmatched"
+    - formats：只保留這些格式；空值表示全部
+    """
+    mask = pd.Series(True, index=table.index)
+    query = (query or "").strip()
+    if query:
+        mask &= (
+            table["original"].fillna("").str.contains(query, case=False, regex=False)
+            | table["author"].fillna("").str.contains(query, case=False, regex=False)
+        )
+    if status == "matched":
+        mask &= table["matched"]
+    elif status == "unmatched":
+        mask &= ~table["matched"]
+    if formats:
+        mask &= table["format"].isin(formats)
+
+    sort_column = CITATION_TABLE_SORT_KEYS.get(sort_by, sort_by)
+    return table[mask].sort_values(sort_column, ascending=not descending, kind="stable", na_position="last")
+
+
+def render_citation_table(citations, reference_list):
+    """表格模式：以單一 st.dataframe 顯示所有內文引用，提供篩選與排序"""
+    table = build_citation_table(citations, reference_list)
+
+    col_query, col_status, col_format, col_sort, col_order = st.columns([3, 2, 2, 2, 1])
+    with col_query:
+        query = st.text_input(get_text("cite_filter"), key="cite_table_filter")
+    with col_status:
+        status = st.selectbox(
+            get_text("cite_status"), ("all", "matched", "unmatched"),
+            format_func=lambda s: get_text(f"cite_status_{s}"), key="cite_table_status"
+        )
+    with col_format:
+        formats = st.multiselect(
+            get_text("cite_format"), sorted(table["format"].dropna().unique()), key="cite_table_formats"
+        )
+    with col_sort:
+        sort_by = st.selectbox(
+            get_text("cite_sort_by"), CITATION_TABLE_SORT_COLUMNS,
+            format_func=lambda c: get_text(f"cite_col_{c}"), key="cite_table_sort"
+        )
+    with col_order:
+        descending = st.checkbox(get_text("cite_sort_desc"), key="cite_table_desc")
+
+    view = filter_citation_table(table, query, status, formats, sort_by, descending)
+    st.caption(get_text("cite_table_caption", shown=len(view), total=len(table)))
+
+    view = view[list(CITATION_TABLE_COLUMNS)].assign(matched=view["matched"].map({
+        True: get_text("cite_status_matched"),
+        False: get_text("cite_status_unmatched"),
+    }))
+    st.dataframe(
+        view.rename(columns={c: get_text(f"cite_col_{c}") for c in CITATION_TABLE_COLUMNS}),
+        hide_index=True, use_container_width=True
+    )
+
 
 def render_citation_list(citations, reference_list=None):
     """
@@ -226,6 +464,17 @@ def render_citation_list(citations, reference_list=None):
         reference_list = st.session_state.get('reference_list', [])
     
     with st.expander(get_text("in_text_citation_list")):
+        # 引用數量多時預設用表格：單一 st.dataframe 取代每則一個 st.markdown
+        view_mode = st.radio(
+            get_text("cite_view_mode"), ("table", "list"),
+            index=0 if len(citations) > CITATION_TABLE_THRESHOLD else 1,
+            format_func=lambda mode: get_text(f"cite_view_{mode}"),
+            horizontal=True, key="cite_view_mode"
+        )
+        if view_mode == "table":
+            render_citation_table(citations, reference_list)
+            return
+
         for i, cite in enumerate(citations, 1):
             # 檢查是否匹配到參考文獻
             matched_ref = None
@@ -1,24 +1,33 @@
 #file_upload.py
 import streamlit as st
-import re
-from utils.file_reader import (
-    extract_paragraphs_from_docx,
-    extract_paragraphs_from_pdf
+from utils.paragraph_cache import file_content_hash
+from citation.citation_matcher import build_reference_index
+from ui.stage_cache import (
+    analyze_references,
+    analyze_references_stage,
+    read_document_stage,
+    read_reference_tail_stage
 )
-from utils.section_detector import classify_document_sections
-from citation.in_text_extractor import extract_in_text_citations
-from parsers.ieee.ieee_merger import merge_references_ieee_strict
-from parsers.apa.apa_merger import merge_references_unified
-from reference_router import process_single_reference
 from ui.components import (
     display_reference_with_details,
     render_citation_list
 )
-from utils.i18n import get_text  # 多語系
+from utils.i18n import get_text, localize_message  # 多語系
 
-# === 折衷版驗證器（必要條件 vs 非必要欄位警告）===
-from utils.reference_validator import validate_reference_list_relaxed
 
+def uploaded_file_hash(uploaded_file):
+    """
+    上傳檔案的內容雜湊（SHA-256）
+    同一次上傳在 rerun 時直接取用 session 中的結果，只有換檔案時才重新雜湊整份檔案
+    以 Streamlit 的 file_id 識別同一次上傳（每次上傳都不同）；沒有 file_id 時退回檔名 + 大小
+    """
+    upload_key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    cached = st.session_state.get("upload_hash")
+    if cached and cached[0] == upload_key:
+        return cached[1]
+    file_hash = file_content_hash(uploaded_file.getvalue())
+    st.session_state.upload_hash = (upload_key, file_hash)
+    return file_hash
 
 def render_stat_card(title, value, color_scheme="primary"):
     border_style = ""
@@ -50,25 +59,45 @@ def render_stat_card(title, value, color_scheme="primary"):
     st.markdown(html_content, unsafe_allow_html=True)
 
 
-def handle_file_upload(uploaded_file):
+def handle_file_upload(uploaded_file, file_hash=None):
     """
     處理檔案上傳與初始讀取
+    - 讀取結果以檔案內容雜湊快取（Streamlit 快取 + 磁碟快取），rerun 或重新上傳時不再解析 PDF/DOCX
+    回傳文件 dict：paragraphs / page_numbers / line_joins（DOCX 後兩者為 None）
     """
     file_ext = uploaded_file.name.split(".")[-1].lower()
     st.subheader(f"{get_text('file_processing')}{uploaded_file.name}")
 
+    if file_ext not in ("docx", "pdf"):
+        st.error(get_text("unsupported_file"))
+        st.stop()
+
+    data = uploaded_file.getvalue()
     with st.spinner(get_text("reading_file")):
-        if file_ext == "docx":
-            all_paragraphs = extract_paragraphs_from_docx(uploaded_file)
-        elif file_ext == "pdf":
-            all_paragraphs = extract_paragraphs_from_pdf(uploaded_file)
-        else:
-            st.error(get_text("unsupported_file"))
-            st.stop()
-
-    st.success(get_text("read_success", count=len(all_paragraphs)))
+        document = read_document_stage(file_hash or file_content_hash(data), file_ext, data)
+
+    st.success(get_text("read_success", count=len(document["paragraphs"])))
     st.markdown("---")
-    return all_paragraphs
+    return document
+
+def load_reference_paragraphs(uploaded_file, file_hash=None):
+    """
+    只檢查參考文獻時使用：從檔案尾端往前讀，找到參考文獻標題即停止
+    長篇論文只會抽取最後幾頁，不必讀完整份內文
+    """
+    file_ext = uploaded_file.name.split(".")[-1].lower()
+    st.subheader(f"{get_text('file_processing')}{uploaded_file.name}")
+
+    if file_ext not in ("docx", "pdf"):
+        st.error(get_text("unsupported_file"))
+        st.stop()
+
+    data = uploaded_file.getvalue()
+    with st.spinner(get_text("reading_file")):
+        ref_paras = read_reference_tail_stage(file_hash or file_content_hash(data), file_ext, data)
+
+    st.markdown("---")
+    return ref_paras
 
 def display_citation_analysis(content_paras):
     """
@@ -105,48 +134,53 @@ def display_citation_analysis(content_paras):
 
     return in_text_citations
 
-def display_reference_parsing(ref_paras):
+def display_reference_parsing(ref_paras, file_hash=None, source="body"):
     """
     顯示參考文獻解析結果（每一筆都顯示）
     - 作者/年份不足：顯示⛔，並設定 block_compare=True（不比對，但照樣顯示所有筆）
     - 標題/出處不足：顯示⚠️，但允許比對
+    - file_hash：提供時以「檔案雜湊 + source（body 整份讀取 / tail 尾端讀取）」快取分析結果
     """
     if not ref_paras:
         st.warning(get_text("no_ref_section"))
         st.session_state.reference_list = []
+        st.session_state.reference_index = build_reference_index([])
         st.session_state["block_compare"] = True
         st.session_state["ref_critical_map"] = {}
         st.session_state["ref_warning_map"] = {}
         return []
 
+    # 分析（合併、解析、驗證）與繪製分開：有檔案雜湊時分析結果由 Streamlit 快取取回
+    if file_hash:
+        analysis = analyze_references_stage(file_hash, source, ref_paras)
+    else:
+        analysis = analyze_references(ref_paras)
+    return render_reference_analysis(analysis)
+
+def render_reference_analysis(analysis):
+    """
+    繪製參考文獻分析結果，並寫入後續階段使用的 session 資料
+    analysis 為 ui.stage_cache.analyze_references 的結果
+    """
     st.subheader(get_text("ref_parsing"))
 
-    # 自動偵測格式（IEEE: [n] / 【n】）
-    is_ieee_mode = False
-    sample_count = min(len(ref_paras), 15)
-    for i in range(sample_count):
-        if re.match(r'^\s*[\[【]\s*\d+\s*[】\]]', ref_paras[i].strip()):
-            is_ieee_mode = True
-            break
+    format_type = analysis["format_type"]
+    parsed_refs = analysis["parsed_refs"]
+    valid_refs = analysis["valid_refs"]
+    skipped_refs = analysis["skipped_refs"]
+    warning_refs = analysis["warning_refs"]
 
-    if is_ieee_mode:
+    if format_type == "IEEE":
         st.info(get_text("detect_ieee"))
-        merged_refs = merge_references_ieee_strict(ref_paras)
-        format_type = "IEEE"
     else:
         st.info(get_text("detect_apa"))
-        merged_refs = merge_references_unified(ref_paras)
-        format_type = "APA"
-
-    # 解析參考文獻
-    parsed_refs = [process_single_reference(r) for r in merged_refs]
 
-    # ===== 折衷版驗證（必要條件 vs 非必要欄位警告）=====
-    valid_refs, skipped_refs, warning_refs = validate_reference_list_relaxed(parsed_refs, format_type)
     # ✅ 寫入可比對的文獻列表（排除被跳過的）
     st.session_state.reference_list = valid_refs
+    # 索引每份文獻列表只建一次，內文擷取與交叉比對共用
+    st.session_state.reference_index = analysis["reference_index"]
 
-    # ✅ 建立每筆 index -> messages 的 map
+    # ✅ 建立每筆 index -> messages 的 map（訊息為 {code, params}，顯示時再以 localize_message 翻譯）
     critical_map = {r["index"]: r.get("errors", []) for r in skipped_refs}
     warning_map = {w["index"]: w.get("warnings", []) for w in warning_refs}
     st.session_state["ref_critical_map"] = critical_map
@@ -175,7 +209,7 @@ def display_reference_parsing(ref_paras):
                 st.markdown(get_text("ref_critical_title", idx=idx, format=r.get('format_type', format_type)))
                 st.code(full_original, language="text")
                 for msg in r.get("errors", []):
-                    st.error(msg)
+                    st.error(localize_message(msg))
                 st.markdown("---")
 
     if warning_refs:
@@ -196,7 +230,7 @@ def display_reference_parsing(ref_paras):
                 st.markdown(get_text("ref_warning_title", idx=idx, format=w.get('format_type', format_type)))
                 st.code(full_original, language="text")
                 for msg in w.get("warnings", []):
-                    st.warning(msg)
+                    st.warning(localize_message(msg))
                 st.markdown("---")
 
     elif len(valid_refs) == len(parsed_refs):
@@ -0,0 +1,172 @@
+"""
+分析階段的 Streamlit 快取
+任何互動（切換語言、展開 expander、按下載按鈕）都會讓 app.py 從頭重跑，
+這裡把不含 UI 的分析階段包成 st.cache_data：以檔案內容雜湊 + 階段參數為 key，
+同一份檔案 rerun 時直接取回結果，只剩 UI 繪製的成本
+- 以底線開頭的參數不列入 key（內容已由 file_hash 代表，避免每次 rerun 重新雜湊整份文件）
+- 每個階段最多保留 STAGE_CACHE_MAX_ENTRIES 份結果，超過時淘汰最久未使用的
+"""
+import io
+import re
+
+import streamlit as st
+
+from utils.file_reader import (
+    extract_paragraphs_from_docx,
+    read_pdf_document,
+    iter_docx_pages_reversed,
+    iter_pdf_pages_reversed
+)
+from utils.paragraph_cache import make_cache_key, load_paragraphs, store_paragraphs
+from utils.section_detector import (
+    build_section_map,
+    classify_document_sections,
+    find_running_line_indices,
+    extract_reference_section_tail_first
+)
+from citation.in_text_extractor import extract_in_text_citations
+from citation.citation_matcher import build_reference_index
+from parsers.ieee.ieee_merger import merge_references_ieee_strict
+from parsers.apa.apa_merger import merge_references_unified
+from reference_router import process_references_batch
+from utils.reference_validator import validate_reference_list_relaxed
+
+STAGE_CACHE_MAX_ENTRIES = 8
+
+# 存入 session 的內文引用欄位
+CITATION_FIELDS = (
+    'author', 'co_author', 'year', 'ref_number', 'all_numbers', 'original',
+    'normalized', 'position', 'type', 'format', 'matched_ref_index', 'paragraph_index'
+)
+
+
+# ==================== 純分析函式（不呼叫任何 st 元件）====================
+
+def read_document(file_hash, file_ext, data):
+    """
+    讀取整份文件，回傳文件 dict：paragraphs / page_numbers / line_joins（DOCX 後兩者為 None）
+    先查磁碟段落快取，相同檔案重新上傳或伺服器重啟後也不必重新解析
+    """
+    cache_key = make_cache_key(file_hash, file_ext)
+    document = load_paragraphs(cache_key)
+    if document is not None:
+        return document
+
+    if file_ext == "docx":
+        # DOCX 沒有頁面與版面資訊
+        document = {
+            "paragraphs": extract_paragraphs_from_docx(io.BytesIO(data)),
+            "page_numbers": None,
+            "line_joins": None,
+        }
+    else:
+        # 版面模式讀取；長篇論文時平行抽取（短文件會自動退回單核）
+        document = read_pdf_document(io.BytesIO(data), workers=None, layout=True)
+    store_paragraphs(cache_key, document)
+    return document
+
+
+def split_document(document):
+    """
+    頁首頁尾偵測 + 區段地圖 + 內文/參考文獻分離
+    回傳 dict：content_paras / ref_paras / ref_start_idx / ref_keyword / section_map
+    """
+    paragraphs = document["paragraphs"]
+    noise_indices = find_running_line_indices(paragraphs, document["page_numbers"])
+    section_map = build_section_map(paragraphs, noise_indices)
+    content_paras, ref_paras, ref_start_idx, ref_keyword = classify_document_sections(
+        paragraphs, section_map=section_map, line_joins=document["line_joins"]
+    )
+    return {
+        "content_paras": content_paras,
+        "ref_paras": ref_paras,
+        "ref_start_idx": ref_start_idx,
+        "ref_keyword": ref_keyword,
+        "section_map": section_map,
+    }
+
+
+def read_reference_tail(file_ext, data):
+    """
+    只檢查參考文獻時使用：從檔案尾端往前讀，找到參考文獻標題即停止
+    PDF 同樣做版面續行合併與頁首頁尾偵測（門檻依整份文件頁數計算，只會少移除、不會多移除），
+    頁首頁尾出現在讀到的每一頁時（一般論文的情況），結果與 split_document 的 ref_paras 相同
+    """
+    if file_ext == "docx":
+        pages_from_end = iter_docx_pages_reversed(io.BytesIO(data))
+    else:
+        pages_from_end = iter_pdf_pages_reversed(io.BytesIO(data))
+    ref_paras, _, _ = extract_reference_section_tail_first(pages_from_end)
+    return ref_paras
+
+
+def analyze_references(ref_paras):
+    """
+    參考文獻分析：偵測格式 → 斷行合併 → 逐筆解析 → 驗證 → 建立 ReferenceIndex
+    回傳 dict：format_type / parsed_refs / valid_refs / skipped_refs / warning_refs / reference_index
+    """
+    # 自動偵測格式（IEEE: [n] / 【n】）
+    is_ieee_mode = False
+    sample_count = min(len(ref_paras), 15)
+    for i in range(sample_count):
+        if re.match(r'^\s*[\[【]\s*\d+\s*[】\]]', ref_paras[i].strip()):
+            is_ieee_mode = True
+            break
+
+    if is_ieee_mode:
+        merged_refs = merge_references_ieee_strict(ref_paras)
+        format_type = "IEEE"
+    else:
+        merged_refs = merge_references_unified(ref_paras)
+        format_type = "APA"
+
+    parsed_refs = process_references_batch(merged_refs, workers=None)
+
+    # 折衷版驗證（必要條件 vs 非必要欄位警告）
+    valid_refs, skipped_refs, warning_refs = validate_reference_list_relaxed(parsed_refs, format_type)
+
+    return {
+        "format_type": format_type,
+        "parsed_refs": parsed_refs,
+        "valid_refs": valid_refs,
+        "skipped_refs": skipped_refs,
+        "warning_refs": warning_refs,
+        "reference_index": build_reference_index(valid_refs),
+    }
+
+
+def extract_citations(content_paras, reference_list, reference_index=None):
+    """擷取內文引用並轉成可序列化（可存入 session）的 dict 列表"""
+    citations = extract_in_text_citations(content_paras, reference_list, reference_index=reference_index)
+    return [{field: cite.get(field) for field in CITATION_FIELDS} for cite in citations]
+
+
+# ==================== 快取階段 ====================
+
+@st.cache_data(max_entries=STAGE_CACHE_MAX_ENTRIES, show_spinner=False)
+def read_document_stage(file_hash, file_ext, _data):
+    return read_document(file_hash, file_ext, _data)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_MAX_ENTRIES, show_spinner=False)
+def split_document_stage(file_hash, _document):
+    return split_document(_document)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_MAX_ENTRIES, show_spinner=False)
+def read_reference_tail_stage(file_hash, file_ext, _data):
+    return read_reference_tail(file_ext, _data)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_MAX_ENTRIES, show_spinner=False)
+def analyze_references_stage(file_hash, source, _ref_paras):
+    """
+    source 區分參考文獻段落的來源（"body" 整份讀取 / "tail" 尾端讀取）
+    驗證訊息以代碼儲存、繪製時才翻譯，語言不列入 key：切換語言直接沿用同一份結果
+    """
+    return analyze_references(_ref_paras)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_MAX_ENTRIES, show_spinner=False)
+def extract_citations_stage(file_hash, _content_paras, _reference_list, _reference_index):
+    return extract_citations(_content_paras, _reference_list, _reference_index)
@@ -1,13 +1,308 @@
+import os
+import zipfile
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
 from docx import Document
 import fitz  # PyMuPDF
 
-def extract_paragraphs_from_docx(file):
+# 讀取器版本：抽取邏輯改變時遞增，磁碟快取會以此區分新舊結果
+READER_VERSION = 3
+# 頁數少於此值時不值得開 process pool（啟動成本高於抽取成本）
+PARALLEL_MIN_PAGES = 40
+# DOCX 沒有實體頁面，尾端讀取時以固定段落數視為一「頁」
+DOCX_TAIL_PAGE_SIZE = 200
+
+# 版面模式：判斷「這一行是上一行所屬條目的延續」的幾何門檻（單位：pt）
+# 懸掛縮排：延續行比條目首行右移 LAYOUT_INDENT_MIN ~ LAYOUT_INDENT_MAX
+LAYOUT_INDENT_MIN = 3.0
+LAYOUT_INDENT_MAX = 48.0
+# 行距：與上一行的垂直間隙不超過行高的這個比例
+LAYOUT_MAX_GAP_RATIO = 0.5
+# 字級差異容許值
+LAYOUT_FONT_TOLERANCE = 0.5
+
+# WordprocessingML 標籤（iterparse 快速路徑用）
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W_NS + "body"
+_W_P = _W_NS + "p"
+_W_R = _W_NS + "r"
+_W_HYPERLINK = _W_NS + "hyperlink"
+_W_T = _W_NS + "t"
+_W_BR = _W_NS + "br"
+_W_BR_TYPE = _W_NS + "type"
+_W_RUN_SYMBOLS = {
+    _W_NS + "tab": "\t",
+    _W_NS + "ptab": "\t",
+    _W_NS + "cr": "\n",
+    _W_NS + "noBreakHyphen": "-",
+}
+_OFFICE_DOCUMENT_REL = "/officeDocument"
+
+def _docx_run_text(run):
+    """w:r 的文字，規則與 python-docx 的 Run.text 相同"""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W_T:
+            parts.append(child.text or "")
+        elif tag == _W_BR:
+            # 只有一般換行算文字；分頁/分欄符號不輸出
+            if child.get(_W_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in _W_RUN_SYMBOLS:
+            parts.append(_W_RUN_SYMBOLS[tag])
+    return "".join(parts)
+
+def _docx_paragraph_text(paragraph):
+    """w:p 的文字：直屬的 w:r 以及超連結內的 w:r（快速路徑與 python-docx 備援共用）"""
+    parts = []
+    for child in paragraph:
+        if child.tag == _W_R:
+            parts.append(_docx_run_text(child))
+        elif child.tag == _W_HYPERLINK:
+            parts.extend(_docx_run_text(run) for run in child if run.tag == _W_R)
+    return "".join(parts)
+
+def _docx_main_part_name(package):
+    """從 _rels/.rels 找出主文件路徑（通常是 word/document.xml）"""
+    try:
+        rels = ElementTree.fromstring(package.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels:
+        if rel.get("Type", "").endswith(_OFFICE_DOCUMENT_REL):
+            return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    return "word/document.xml"
+
+def iter_docx_paragraphs(file):
+    """
+    快速路徑：直接從 zip 串流讀取主文件 XML，以 iterparse 逐段產出段落文字
+    - 只取 w:body 底下的段落（與 Document.paragraphs 相同，不含表格內段落）
+    - 每處理完一個頂層元素就清掉，記憶體只保留目前這一段
+    格式不符（非 zip、缺主文件、XML 錯誤）時直接拋出例外，由呼叫端決定是否退回 python-docx
+    """
+    with zipfile.ZipFile(file) as package:
+        with package.open(_docx_main_part_name(package)) as xml_stream:
+            depth = 0
+            body = None
+            for event, elem in ElementTree.iterparse(xml_stream, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if elem.tag == _W_BODY:
+                        body = elem
+                    continue
+
+                depth -= 1
+                # document(1) > body(2) > 頂層元素(3)
+                if body is not None and depth == 2:
+                    if elem.tag == _W_P:
+                        text = _docx_paragraph_text(elem).strip()
+                        if text:
+                            yield text
+                    body.clear()
+
+def _extract_paragraphs_from_docx_model(file):
+    """
+    python-docx 完整物件模型版本（備援）
+    段落文字同樣以 _docx_paragraph_text 取出：舊版 python-docx 的 Paragraph.text 不含超連結內的文字，
+    共用同一套規則，兩條路徑對同一段落才會得到相同結果
+    """
     doc = Document(file)
-    return [para.text.strip() for para in doc.paragraphs if para.text.strip()]
+    texts = (_docx_paragraph_text(para._p).strip() for para in doc.paragraphs)
+    return [text for text in texts if text]
+
+def extract_paragraphs_from_docx(file):
+    """
+    讀取 DOCX 段落：優先走 iterparse 快速路徑，
+    只有在檔案無法以快速路徑解析時才退回 python-docx
+    """
+    try:
+        return list(iter_docx_paragraphs(file))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return _extract_paragraphs_from_docx_model(file)
+
+def _split_page_lines(page_text):
+    """將單頁文字切成去頭尾空白的非空行"""
+    return [line.strip() for line in page_text.split("\n") if line.strip()]
+
+def iter_pdf_lines(file):
+    """
+    逐頁讀取 PDF，逐行產出 (頁碼, 文字)
+    - 頁碼從 1 開始
+    - 一次只持有一頁的文字，記憶體不隨頁數成長
+    """
+    with fitz.open(stream=file.read(), filetype="pdf") as doc:
+        for page_no, page in enumerate(doc, 1):
+            for line in _split_page_lines(page.get_text("text")):
+                yield page_no, line
 
-def extract_paragraphs_from_pdf(file):
-    text = ""
+def _pdf_page_layout_lines(page):
+    """
+    以 page.get_text("dict") 的座標資訊取出單頁文字行，並判斷每行是否延續上一個條目
+    回傳 [(文字, joins_previous), ...]
+    延續條件（全部成立）：
+    - 與條目首行字級相同
+    - 與上一行垂直間隙小（同一段落的行距內）
+    - 相對條目首行為懸掛縮排（APA 懸掛縮排、IEEE [n] 之後的對齊）
+    與上一行位於同一基線的片段（例如 IEEE 的 [1] 與其後文字被拆成兩行）也視為延續
+    """
+    result = []
+    prev = None           # 上一行 (x0, y0, y1)
+    entry_x0 = None       # 目前條目首行的 x0
+    entry_size = None     # 目前條目首行的字級
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue  # 圖片區塊
+        for line in block["lines"]:
+            spans = line["spans"]
+            text = "".join(span["text"] for span in spans).strip()
+            if not text:
+                continue
+            x0, y0, _, y1 = line["bbox"]
+            size = max(span["size"] for span in spans)
+
+            joins = False
+            if prev is not None:
+                prev_x0, prev_y0, prev_y1 = prev
+                line_height = max(prev_y1 - prev_y0, 1.0)
+                same_baseline = abs(y0 - prev_y0) < line_height * 0.5 and x0 > prev_x0
+                gap = y0 - prev_y1
+                hanging = LAYOUT_INDENT_MIN <= x0 - entry_x0 <= LAYOUT_INDENT_MAX
+                joins = abs(size - entry_size) <= LAYOUT_FONT_TOLERANCE and (
+                    same_baseline or
+                    (-line_height * 0.5 <= gap <= line_height * LAYOUT_MAX_GAP_RATIO and hanging)
+                )
+
+            if not joins:
+                entry_x0 = x0
+                entry_size = size
+            prev = (x0, y0, y1)
+            result.append((text, joins))
+    return result
+
+def iter_pdf_layout_lines(file):
+    """
+    版面模式：逐頁產出 (頁碼, 文字, joins_previous)
+    joins_previous 表示依座標判斷這一行延續上一行的條目（跨頁一律為 False）
+    """
     with fitz.open(stream=file.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text("text") + "\n"
-    return [p.strip() for p in text.split("\n") if p.strip()]
+        for page_no, page in enumerate(doc, 1):
+            for text, joins in _pdf_page_layout_lines(page):
+                yield page_no, text, joins
+
+def iter_pdf_pages_reversed(file):
+    """
+    由最後一頁往前逐頁產出 (頁碼, 該頁文字行列表, 續行標記列表)
+    以版面模式抽取（與 read_pdf_document(layout=True) 相同），頁首頁尾偵測與續行合併才能與整份讀取一致
+    呼叫端找到需要的內容後停止迭代，前面的頁面就不會被抽取
+    """
+    with fitz.open(stream=file.read(), filetype="pdf") as doc:
+        for page_index in range(doc.page_count - 1, -1, -1):
+            layout_lines = _pdf_page_layout_lines(doc[page_index])
+            yield (
+                page_index + 1,
+                [text for text, _ in layout_lines],
+                [joins for _, joins in layout_lines],
+            )
+
+def iter_docx_pages_reversed(file, page_size=DOCX_TAIL_PAGE_SIZE):
+    """
+    DOCX 版的尾端讀取：以 page_size 個段落為一頁，由後往前產出 (頁號, 段落列表)
+    """
+    paragraphs = extract_paragraphs_from_docx(file)
+    for end in range(len(paragraphs), 0, -page_size):
+        start = max(0, end - page_size)
+        yield start // page_size + 1, paragraphs[start:end]
+
+def _extract_pdf_page_range(pdf_bytes, start, stop, layout=False):
+    """
+    [Worker] 自行開啟文件，抽取 [start, stop) 頁的 (頁碼, 文字)
+    layout=True 時為 (頁碼, 文字, joins_previous)
+    fitz.Document 不能跨 process 傳遞，所以每個 worker 各自 open
+    """
+    lines = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page_index in range(start, stop):
+            page = doc[page_index]
+            if layout:
+                lines.extend((page_index + 1, text, joins)
+                             for text, joins in _pdf_page_layout_lines(page))
+            else:
+                page_text = page.get_text("text")
+                lines.extend((page_index + 1, line) for line in _split_page_lines(page_text))
+    return lines
+
+def iter_pdf_lines_parallel(file, workers=None, layout=False):
+    """
+    將頁碼範圍切段交給 ProcessPoolExecutor 平行抽取，依頁序拼回
+    輸出與 iter_pdf_lines（layout=True 時為 iter_pdf_layout_lines）完全相同；
+    頁數太少或 workers <= 1 時直接走單核版本
+    """
+    pdf_bytes = file.read()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, page_count)
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        yield from _extract_pdf_page_range(pdf_bytes, 0, page_count, layout)
+        return
+
+    # 每個 worker 一段連續頁碼，executor.map 會依提交順序回傳
+    chunk = -(-page_count // workers)
+    starts = list(range(0, page_count, chunk))
+    stops = [min(s + chunk, page_count) for s in starts]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for lines in executor.map(_extract_pdf_page_range,
+                                  [pdf_bytes] * len(starts), starts, stops,
+                                  [layout] * len(starts)):
+            yield from lines
+
+def extract_lines_from_pdf(file, workers=1):
+    """
+    讀取 PDF 全部文字行，同時回傳每一行所在頁碼（供頁首頁尾統計使用）
+    - workers=1：單核逐頁讀取（預設）
+    - workers>1 或 None：平行讀取，None 代表使用全部 CPU
+    回傳 (段落列表, 頁碼列表)，兩者等長
+    """
+    if workers == 1:
+        numbered_lines = iter_pdf_lines(file)
+    else:
+        numbered_lines = iter_pdf_lines_parallel(file, workers)
+    paragraphs = []
+    page_numbers = []
+    for page_no, line in numbered_lines:
+        paragraphs.append(line)
+        page_numbers.append(page_no)
+    return paragraphs, page_numbers
+
+def read_pdf_document(file, workers=1, layout=True):
+    """
+    讀取 PDF 為文件 dict：
+      paragraphs    文字行
+      page_numbers  每行所在頁碼
+      line_joins    版面模式下每行是否延續上一行的條目（layout=False 時為 None）
+    """
+    if not layout:
+        paragraphs, page_numbers = extract_lines_from_pdf(file, workers)
+        return {"paragraphs": paragraphs, "page_numbers": page_numbers, "line_joins": None}
+
+    if workers == 1:
+        layout_lines = iter_pdf_layout_lines(file)
+    else:
+        layout_lines = iter_pdf_lines_parallel(file, workers, layout=True)
+    paragraphs = []
+    page_numbers = []
+    line_joins = []
+    for page_no, line, joins in layout_lines:
+        paragraphs.append(line)
+        page_numbers.append(page_no)
+        line_joins.append(joins)
+    return {"paragraphs": paragraphs, "page_numbers": page_numbers, "line_joins": line_joins}
+
+def extract_paragraphs_from_pdf(file, workers=1):
+    """讀取 PDF 全部文字行（參數同 extract_lines_from_pdf）"""
+    return extract_lines_from_pdf(file, workers)[0]
@@ -27,6 +27,7 @@ TRANSLATIONS = {
         "view_json": "🔍 查看完整暫存資料（JSON 格式）",
         "lang_settings": "### 🌐 語言設定 / Language",
         "lang_select": "選擇語言 / Select Language",
+        "ref_only_mode": "只檢查參考文獻（略過內文，加快長篇論文）",
 
         # File Upload / Analysis
         "file_processing": "📄 處理檔案：",
@@ -80,6 +81,26 @@ TRANSLATIONS = {
         "author_label": "作者",
         "year_label": "年份",
         "type_label": "類型",
+        "cite_view_mode": "顯示方式",
+        "cite_view_table": "表格",
+        "cite_view_list": "列表",
+        "cite_filter": "🔍 篩選（原文或作者）",
+        "cite_status": "對應狀態",
+        "cite_status_all": "全部",
+        "cite_status_matched": "✅ 已對應",
+        "cite_status_unmatched": "⚠️ 未找到對應參考文獻",
+        "cite_format": "格式",
+        "cite_sort_by": "排序依據",
+        "cite_sort_desc": "遞減",
+        "cite_table_caption": "顯示 {shown} / {total} 則引用",
+        "cite_col_no": "#",
+        "cite_col_original": "原文",
+        "cite_col_format": "格式",
+        "cite_col_author": "作者",
+        "cite_col_year": "年份",
+        "cite_col_ref_number": "參考編號",
+        "cite_col_type": "類型",
+        "cite_col_matched": "對應狀態",
         "no_title": "未提供標題",
         # 交叉比對 & 結果
         "comparison_title": "🚀 交叉比對分析",
@@ -113,6 +134,7 @@ TRANSLATIONS = {
         "export_title": "📥 匯出比對結果",
         "download_json": "⬇️ 下載 JSON(遺漏 / 未使用 / 年份錯誤)",
         "download_csv": "⬇️ 下載 CSV(遺漏 / 未使用 / 年份錯誤)",
+        "download_ndjson": "⬇️ 下載 NDJSON（每行一筆）",
         "csv_header_type": "類型",
         "csv_header_original": "原始文字",
         "csv_header_format": "格式",
@@ -132,6 +154,13 @@ TRANSLATIONS = {
         "ref_warning_title": "### ⚠️ 第 {idx} 筆（{format}）",
         "ref_parse_success_msg": "✅ 參考文獻必要條件通過，且欄位解析完整度良好。",
         "ref_detail_header": "📌 參考文獻逐筆解析結果",
+        "ref_filter": "🔍 篩選（作者、年份、標題或原文）",
+        "ref_page_size": "每頁筆數",
+        "ref_jump": "跳至文獻編號",
+        "ref_page": "頁數（共 {pages} 頁）",
+        "ref_page_caption": "顯示第 {start}–{end} 筆，共 {count} 筆",
+        "ref_filter_empty": "沒有符合篩選條件的參考文獻。",
+        "ref_jump_not_found": "找不到編號 {number} 的參考文獻（或已被篩選排除）。",
         "auto_compare_blocked_msg": "⛔ 因參考文獻作者/年份為必要比對資訊且未能可靠解析，已暫停交叉比對（仍可查看逐筆解析結果）。",
         "auto_compare_spinner": "正在自動進行交叉比對...",
         # 參考文獻驗證錯誤訊息
@@ -174,6 +203,7 @@ TRANSLATIONS = {
         "view_json": "🔍 View Raw Data (JSON)",
         "lang_settings": "### 🌐 Language Settings / 語言設定",
         "lang_select": "Select Language / 選擇語言",
+        "ref_only_mode": "References only (skip body text, faster for long theses)",
 
         # File Upload / Analysis
         "file_processing": "📄 Processing File: ",
@@ -227,6 +257,26 @@ TRANSLATIONS = {
         "author_label": "Author",
         "year_label": "Year",
         "type_label": "Type",
+        "cite_view_mode": "View",
+        "cite_view_table": "Table",
+        "cite_view_list": "List",
+        "cite_filter": "🔍 Filter (text or author)",
+        "cite_status": "Match status",
+        "cite_status_all": "All",
+        "cite_status_matched": "✅ Matched",
+        "cite_status_unmatched": "⚠️ No matching reference",
+        "cite_format": "Format",
+        "cite_sort_by": "Sort by",
+        "cite_sort_desc": "Descending",
+        "cite_table_caption": "Showing {shown} of {total} citations",
+        "cite_col_no": "#",
+        "cite_col_original": "Citation",
+        "cite_col_format": "Format",
+        "cite_col_author": "Author",
+        "cite_col_year": "Year",
+        "cite_col_ref_number": "Ref Number",
+        "cite_col_type": "Type",
+        "cite_col_matched": "Match Status",
         "no_title": "No Title Provided",
         # Comparison & Results
         "comparison_title": "🚀 Cross-Check Analysis",
@@ -260,6 +310,7 @@ TRANSLATIONS = {
         "export_title": "📥 Export Results",
         "download_json": "⬇️ Download JSON (Missing / Unused / Errors)",
         "download_csv": "⬇️ Download CSV (Missing / Unused / Errors)",
+        "download_ndjson": "⬇️ Download NDJSON (one item per line)",
         "csv_header_type": "Type",
         "csv_header_original": "Original Text",
         "csv_header_format": "Format",
@@ -279,6 +330,13 @@ TRANSLATIONS = {
         "ref_warning_title": "### ⚠️ Ref {idx} ({format})",
         "ref_parse_success_msg": "✅ All references meet critical criteria and are well-parsed.",
         "ref_detail_header": "📌 Detailed Reference Parsing Results",
+        "ref_filter": "🔍 Filter (author, year, title or original text)",
+        "ref_page_size": "Per page",
+        "ref_jump": "Jump to reference #",
+        "ref_page": "Page (of {pages})",
+        "ref_page_caption": "Showing {start}–{end} of {count} references",
+        "ref_filter_empty": "No references match the filter.",
+        "ref_jump_not_found": "Reference {number} was not found (or is excluded by the filter).",
         "auto_compare_blocked_msg": "⛔ Cross-checking paused due to critical parsing issues (missing Author/Year). You can still view detailed parsing results.",
         "auto_compare_spinner": "Auto-running cross-check analysis...",
         # Reference Validation Errors
@@ -306,3 +364,12 @@ def get_text(key, **kwargs):
     if kwargs:
         return text.format(**kwargs)
     return text
+
+def localize_message(message):
+    """
+    翻譯分析結果中的訊息代碼（{code, params}，見 utils.reference_validator._message）
+    已是字串的訊息（例如舊版匯出的資料）原樣回傳
+    """
+    if isinstance(message, dict):
+        return get_text(message["code"], **message.get("params", {}))
+    return message
@@ -0,0 +1,110 @@
+"""
+段落抽取結果的磁碟快取
+- key：檔案內容 SHA-256 + 副檔名 + 讀取器版本（READER_VERSION）
+- 內容：段落列表（PDF 另含每行頁碼）以 JSON + zlib 壓縮儲存
+- 容量上限：超過 CACHE_MAX_BYTES 時依最後使用時間（mtime）淘汰最舊的項目（LRU）
+相同檔案不論來自哪個使用者或 session，重新上傳都不必再解析 PDF/DOCX
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from utils.file_reader import READER_VERSION
+
+CACHE_DIR = os.environ.get(
+    "CITATION_CHECKER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "citation_checker", "paragraphs")
+)
+CACHE_MAX_BYTES = int(os.environ.get("CITATION_CHECKER_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+_CACHE_SUFFIX = ".json.z"
+
+
+def file_content_hash(data):
+    """檔案內容的 SHA-256（十六進位字串）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_cache_key(content_hash, file_ext):
+    """快取 key：內容雜湊 + 副檔名 + 讀取器版本，讀取邏輯改版後舊快取自然失效"""
+    return f"{content_hash}_{file_ext}_v{READER_VERSION}"
+
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, key + _CACHE_SUFFIX)
+
+
+def load_paragraphs(key, cache_dir=None):
+    """讀取快取；不存在或損毀時回傳 None"""
+    path = _cache_path(key, cache_dir or CACHE_DIR)
+    try:
+        with open(path, "rb") as f:
+            paragraphs = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, zlib.error):
+        # 損毀的快取檔直接丟棄，改走正常解析
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    # 更新 mtime 作為 LRU 的最後使用時間
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return paragraphs
+
+
+def store_paragraphs(key, paragraphs, cache_dir=None, max_bytes=None):
+    """寫入快取（先寫暫存檔再 rename，避免其他 session 讀到寫一半的檔案），並執行容量淘汰"""
+    cache_dir = cache_dir or CACHE_DIR
+    payload = zlib.compress(
+        json.dumps(paragraphs, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, _cache_path(key, cache_dir))
+    except OSError:
+        # 快取寫不進去不影響主流程
+        return
+    evict_cache(cache_dir, max_bytes)
+
+
+def evict_cache(cache_dir=None, max_bytes=None):
+    """總容量超過上限時，從最久未使用的項目開始刪除"""
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    entries = []
+    total = 0
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(_CACHE_SUFFIX):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
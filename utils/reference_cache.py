@@ -0,0 +1,166 @@
+"""
+參考文獻解析結果的兩層快取
+- 第一層：process 內 LRU（MEMORY_MAX_ENTRIES 筆）
+- 第二層：選用的磁碟快取，設定 CITATION_CHECKER_REF_CACHE_DIR 或呼叫 configure_reference_cache 後啟用
+- key：normalize 後的文獻文字 SHA-256 + 解析器版本，解析邏輯改版後舊快取自然失效
+- 存入與取出都是 deepcopy，呼叫端修改解析結果不會污染快取
+指導教授的論文、常見教科書在不同論文中反覆出現，命中時不必再跑一次 IEEE/APA 解析
+"""
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+MEMORY_MAX_ENTRIES = int(os.environ.get("CITATION_CHECKER_REF_CACHE_ENTRIES", 4096))
+DISK_CACHE_DIR = os.environ.get("CITATION_CHECKER_REF_CACHE_DIR") or None
+DISK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# 每寫入這麼多筆才檢查一次磁碟容量（避免每筆都掃描目錄）
+DISK_EVICT_EVERY = 256
+_CACHE_SUFFIX = ".json.z"
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "disk_writes": 0}
+
+
+def configure_reference_cache(max_entries=None, disk_dir=None, disk_max_bytes=None):
+    """調整快取設定；disk_dir 設為空字串可關閉磁碟層"""
+    global MEMORY_MAX_ENTRIES, DISK_CACHE_DIR, DISK_CACHE_MAX_BYTES
+    with _lock:
+        if max_entries is not None:
+            MEMORY_MAX_ENTRIES = max_entries
+            while len(_memory) > MEMORY_MAX_ENTRIES:
+                _memory.popitem(last=False)
+        if disk_dir is not None:
+            DISK_CACHE_DIR = disk_dir or None
+        if disk_max_bytes is not None:
+            DISK_CACHE_MAX_BYTES = disk_max_bytes
+
+
+def make_reference_key(normalized_text, parser_version):
+    """快取 key：normalize 後文字的 SHA-256 + 解析器版本"""
+    digest = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+    return f"{digest}_v{parser_version}"
+
+
+def _disk_path(key):
+    return os.path.join(DISK_CACHE_DIR, key + _CACHE_SUFFIX)
+
+
+def _disk_load(key):
+    try:
+        with open(_disk_path(key), "rb") as f:
+            return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+    except (OSError, ValueError, zlib.error):
+        return None
+
+
+def _disk_store(key, data):
+    """寫入磁碟層；只存 JSON 來回後完全相同的結果（含 tuple 等型別的就不存）"""
+    try:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return
+    if json.loads(text) != data:
+        return
+    try:
+        os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=DISK_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(text.encode("utf-8")))
+        os.replace(tmp_path, _disk_path(key))
+    except OSError:
+        # 快取寫不進去不影響主流程
+        return
+    with _lock:
+        _stats["disk_writes"] += 1
+        should_evict = _stats["disk_writes"] % DISK_EVICT_EVERY == 0
+    if should_evict:
+        _evict_disk_cache()
+
+
+def _evict_disk_cache():
+    """磁碟層超過容量上限時，從最久未寫入的項目開始刪除"""
+    entries = []
+    total = 0
+    try:
+        with os.scandir(DISK_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(_CACHE_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+    except OSError:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= DISK_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _remember(key, data):
+    """放入記憶體層（呼叫前須持有 _lock）"""
+    _memory[key] = data
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def get_cached_reference(key):
+    """查詢快取，命中時回傳解析結果的副本，否則回傳 None"""
+    with _lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+            _stats["hits"] += 1
+            _stats["memory_hits"] += 1
+            return copy.deepcopy(data)
+
+    if DISK_CACHE_DIR:
+        data = _disk_load(key)
+        if data is not None:
+            with _lock:
+                _remember(key, data)
+                _stats["hits"] += 1
+                _stats["disk_hits"] += 1
+            return copy.deepcopy(data)
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put_cached_reference(key, data):
+    """存入解析結果的副本（兩層都寫）"""
+    data = copy.deepcopy(data)
+    with _lock:
+        _remember(key, data)
+    if DISK_CACHE_DIR:
+        _disk_store(key, data)
+
+
+def reference_cache_info():
+    """命中統計：hits / misses / memory_hits / disk_hits / size / max_entries / disk_dir"""
+    with _lock:
+        info = dict(_stats)
+        info["size"] = len(_memory)
+    info["max_entries"] = MEMORY_MAX_ENTRIES
+    info["disk_dir"] = DISK_CACHE_DIR
+    return info
+
+
+def clear_reference_cache():
+    """清空記憶體層與統計（磁碟層保留）"""
+    with _lock:
+        _memory.clear()
+        for name in _stats:
+            _stats[name] = 0
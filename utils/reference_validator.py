@@ -4,8 +4,17 @@
 """
 import re
 from typing import Dict, List, Tuple
-from utils.i18n import get_text
-def validate_apa_format(ref: dict, index: int) -> Tuple[bool, List[str]]:
+
+
+def _message(code: str, **params) -> Dict:
+    """
+    建立與語言無關的驗證訊息：code 為 utils.i18n 的翻譯 key，params 為格式化參數
+    分析結果只存代碼，繪製時才以 utils.i18n.localize_message 翻譯，切換語言不必重新分析
+    """
+    return {"code": code, "params": params}
+
+
+def validate_apa_format(ref: dict, index: int) -> Tuple[bool, List[Dict]]:
     """
     驗證 APA 格式參考文獻的基本格式要求
     
@@ -14,7 +23,7 @@ def validate_apa_format(ref: dict, index: int) -> Tuple[bool, List[str]]:
         index: 參考文獻索引（用於錯誤訊息）
     
     Returns:
-        (is_valid, error_messages): 是否有效及錯誤訊息列表
+        (is_valid, error_messages): 是否有效及錯誤訊息列表（{code, params}，見 _message）
     """
     errors = []
     original = ref.get('original', '')
@@ -23,23 +32,23 @@ def validate_apa_format(ref: dict, index: int) -> Tuple[bool, List[str]]:
     # 1. 必須有作者
     authors = ref.get('authors') or ref.get('author')
     if not authors:
-        errors.append(get_text("err_author_unparseable"))
+        errors.append(_message("err_author_unparseable"))
     elif isinstance(authors, list) and len(authors) == 0:
-        errors.append(get_text("err_author_empty"))
+        errors.append(_message("err_author_empty"))
     
     # 2. 必須有年份
     year = ref.get('year')
     if not year:
-        errors.append(get_text("err_year_missing"))
+        errors.append(_message("err_year_missing"))
     else:
         # 驗證年份格式 (支援 1600-2099 + a-z)
         year_str = str(year).strip()
         if not re.search(r'^(1[6-9]\d{2}|20\d{2})([a-z])?$', year_str):
-            errors.append(get_text("err_year_format", year=year))
+            errors.append(_message("err_year_format", year=year))
     
     # 3. 必須有標題
     if not ref.get('title'):
-        errors.append(get_text("err_title_missing"))
+        errors.append(_message("err_title_missing"))
     
     # 4. 檢查作者格式（英文 APA）
     # if lang == 'EN' and isinstance(authors, list) and authors:
@@ -101,11 +110,11 @@ def validate_apa_format(ref: dict, index: int) -> Tuple[bool, List[str]]:
             
             # 中文參考文獻、書籍、或明顯有期刊特徵但解析失敗，跳過檢查
             if not is_chinese and not is_book_chapter and not is_preprint and not likely_has_journal and not likely_book:
-                errors.append(get_text("err_journal_info_missing"))
+                errors.append(_message("err_journal_info_missing"))
     
     # 6. 檢查不應該有編號（APA 不使用編號）
     if ref.get('ref_number'):
-        errors.append(get_text("err_apa_numbered", number=ref.get('ref_number')))
+        errors.append(_message("err_apa_numbered", number=ref.get('ref_number')))
     
     return len(errors) == 0, errors
 
@@ -179,8 +188,8 @@ def get_validation_summary(validation_results: List[Dict]) -> Dict:
     for result in validation_results:
         if not result['is_valid']:
             for error in result['errors']:
-                # 提取錯誤類型（取第一個詞）
-                error_type = error.split('：')[0].split('（')[0]
+                # 錯誤類型即訊息代碼
+                error_type = error['code']
                 error_types[error_type] = error_types.get(error_type, 0) + 1
     
     return {
@@ -195,7 +204,7 @@ def get_validation_summary(validation_results: List[Dict]) -> Dict:
 
 from typing import Dict, List, Tuple
 
-def validate_required_fields(ref: dict, format_type: str) -> Tuple[bool, List[str]]:
+def validate_required_fields(ref: dict, format_type: str) -> Tuple[bool, List[Dict]]:
     """
     只檢查『交叉比對必要條件』：作者 + 年份 + 結尾完整性
     缺任一項 -> critical error
@@ -209,11 +218,11 @@ def validate_required_fields(ref: dict, format_type: str) -> Tuple[bool, List[st
         matches = list(re.finditer(author_year_pattern, original))
         
         if len(matches) >= 2:
-            errors.append(get_text("err_author_year_missing"))
+            errors.append(_message("err_author_year_missing"))
         
         # 模式2：檢查是否有「句號 + 大寫字母 + 逗號」（典型的新作者開頭）
         # if re.search(r'\.\s+[A-Z][a-z]+,\s*[A-Z]\.', original):
-        #     errors.append(get_text("err_author_year_missing"))
+        #     errors.append(_message("err_author_year_missing"))
         #     return (False, errors)
         suspicious_pattern = r'\.\s+([A-Z][a-z]+,\s*[A-Z]\.)'
         match = re.search(suspicious_pattern, original)
@@ -227,7 +236,7 @@ def validate_required_fields(ref: dict, format_type: str) -> Tuple[bool, List[st
             is_editor_context = bool(re.search(r'\bIn\s+', preceding_text, re.IGNORECASE))
             
             if not is_editor_context:
-                errors.append(get_text("err_author_year_missing"))
+                errors.append(_message("err_author_year_missing"))
                 return (False, errors)
         # authors 欄位檢查
         authors = ref.get("authors") or ref.get("author")
@@ -252,7 +261,7 @@ def validate_required_fields(ref: dict, format_type: str) -> Tuple[bool, List[st
         
         # 只要有任一錯誤，就回報統一訊息
         if has_author_error or has_year_error:
-            errors.append(get_text("err_author_year_missing"))
+            errors.append(_message("err_author_year_missing"))
         
         # ========== 結尾完整性檢查 ==========
         original_stripped = original.strip()
@@ -284,11 +293,11 @@ def validate_required_fields(ref: dict, format_type: str) -> Tuple[bool, List[st
                 
                 # 只有在不是期刊名稱且不是全大寫頁尾時才報錯
                 if not ends_with_journal_word and not is_all_caps_footer:
-                    errors.append(get_text("err_incomplete_ending"))
+                    errors.append(_message("err_incomplete_ending"))
 
     return (len(errors) == 0), errors
 
-def validate_optional_fields(ref: dict, format_type: str) -> Tuple[bool, List[str]]:
+def validate_optional_fields(ref: dict, format_type: str) -> Tuple[bool, List[Dict]]:
     """
     非必要欄位：缺了不擋比對，但要回報 warnings
     例如：title / doi / source 等
@@ -301,7 +310,7 @@ def validate_optional_fields(ref: dict, format_type: str) -> Tuple[bool, List[st
     # IEEE 你原本對 thesis 有特例；這裡也沿用（避免誤殺）
     is_thesis_format = bool(re.search(r'(Dissertation|Thesis|碩士|博士)\s*[-–—]\s*', original))
     if (not title) and (not is_thesis_format):
-        warnings.append(get_text("warn_title_missing"))
+        warnings.append(_message("warn_title_missing"))
 
     # DOI / URL
     #if not ref.get("doi") and not ref.get("url"):
@@ -310,7 +319,7 @@ def validate_optional_fields(ref: dict, format_type: str) -> Tuple[bool, List[st
     # 出處（source / journal / conference / publisher 任一）
     has_venue = bool(ref.get("source") or ref.get("journal_name") or ref.get("conference_name") or ref.get("publisher"))
     if not has_venue:
-        warnings.append(get_text("warn_source_missing"))
+        warnings.append(_message("warn_source_missing"))
     return (len(warnings) == 0), warnings
 
 def validate_reference_list_relaxed(reference_list: List[dict], format_type: str = "auto") -> Tuple[bool, List[Dict], List[Dict]]:
@@ -0,0 +1,93 @@
+"""
+比對結果的匯出（JSON / CSV / NDJSON）
+- 逐列產生輸出，不先組成整張 DataFrame：大型報告也只佔一列的記憶體
+- iter_* 逐列產生 bytes 片段；build_* 把片段接成完整 bytes
+- 不依賴 Streamlit：表頭文字與錯誤詳情的格式由呼叫端（UI）傳入
+- export_result_hash 為比對結果的內容雜湊，UI 以此快取匯出內容
+"""
+import csv
+import hashlib
+import io
+import json
+
+# (JSON 區段名稱, CSV/NDJSON 的類型標記)
+EXPORT_SECTIONS = (
+    ("missing_references", "missing"),
+    ("unused_references", "unused"),
+    ("year_error_references", "year_error"),
+)
+
+
+def export_result_hash(missing_refs, unused_refs, year_error_refs):
+    """比對結果的 SHA-256（十六進位字串），結果相同則匯出內容相同"""
+    payload = json.dumps(
+        [missing_refs, unused_refs, year_error_refs],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sections(missing_refs, unused_refs, year_error_refs):
+    return zip(EXPORT_SECTIONS, (missing_refs, unused_refs, year_error_refs))
+
+
+def iter_export_rows(missing_refs, unused_refs, year_error_refs, detail_format="{cited}→{correct}"):
+    """
+    逐列產生 CSV 資料：類型 / 原始文字 / 格式 / 編號 / 作者 / 年份 / 錯誤詳情
+    detail_format 為年份錯誤的單筆格式（可用 {cited}、{correct}），多筆以「; 」連接
+    """
+    for (_, kind), items in _sections(missing_refs, unused_refs, year_error_refs):
+        for x in items or []:
+            error_detail = "; ".join(
+                detail_format.format(cited=m['cited_year'], correct=m['correct_year'])
+                for m in x.get('year_mismatch') or []
+            )
+            yield (
+                kind,
+                x.get("original", ""),
+                x.get("format", ""),
+                x.get("ref_number", ""),
+                x.get("author", ""),
+                x.get("year", ""),
+                error_detail,
+            )
+
+
+def iter_csv_chunks(rows, header, encoding="utf-8-sig"):
+    """
+    逐列產生 CSV bytes（全部欄位加引號，第一個片段為表頭）
+    utf-8-sig 只在表頭前加一次 BOM，讓 Excel 正確辨識編碼
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+    row_encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+
+    writer.writerow(header)
+    yield buffer.getvalue().encode(encoding)
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue().encode(row_encoding)
+
+
+def iter_ndjson_lines(missing_refs, unused_refs, year_error_refs):
+    """逐筆產生 NDJSON bytes：每行一個物件，加上 kind 欄位標記所屬類型"""
+    for (_, kind), items in _sections(missing_refs, unused_refs, year_error_refs):
+        for x in items or []:
+            line = json.dumps({"kind": kind, **x}, ensure_ascii=False, default=str)
+            yield (line + "\n").encode("utf-8")
+
+
+def build_json_export(missing_refs, unused_refs, year_error_refs):
+    """完整 JSON（各類型分區，縮排 2）"""
+    export_obj = {
+        name: items for (name, _), items in _sections(missing_refs, unused_refs, year_error_refs)
+    }
+    return json.dumps(export_obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def build_csv_export(missing_refs, unused_refs, year_error_refs, header, detail_format="{cited}→{correct}"):
+    """完整 CSV bytes（由 iter_csv_chunks 串接而成）"""
+    rows = iter_export_rows(missing_refs, unused_refs, year_error_refs, detail_format)
+    return b"".join(iter_csv_chunks(rows, header))
@@ -1,3 +1,4 @@
+import math
 import re
 
 def is_appendix_heading(text):
@@ -56,27 +57,33 @@ def is_pure_keyword(text):
     # 移除常見標點後比對
     clean_text = re.sub(r'[^\w\u4e00-\u9fff]', '', text)
     return clean_text in keywords
+# is_page_noise 使用的規則（預先編譯）
+_PAGE_MARKER_RE = re.compile(r'^-+\s*PAGE\s*\d+\s*-+$', re.IGNORECASE)
+_PAGE_NUMBER_RE = re.compile(r'^[-—\s]*(page\s*)?\d+(\s*of\s*\d+)?[-—\s]*$', re.IGNORECASE)
+_HEADER_KEYWORDS_RE = re.compile(r'^(Master Thesis|碩士論文|Department of|National .* University|國立.*大學|.*研究所|NTPU|.*系\(?所\)?)$', re.IGNORECASE)
+
 def is_page_noise(text):
     """
     [新增] 判斷是否為頁首、頁尾、換頁分隔線或 IEEE 下載聲明
     回傳 True 代表這是雜訊，應該跳過 (continue)
+    文件有頁面資訊時，重複出現的頁首頁尾已先由 find_running_line_indices 排除，
+    這裡只需處理單次出現的雜訊（以及沒有頁面資訊的 DOCX）
     """
     text = text.strip()
     if not text: return True
 
     # 1. 工具產生的換頁標記 (例如: --- PAGE 28 ---)
-    if re.match(r'^-+\s*PAGE\s*\d+\s*-+$', text, re.IGNORECASE):
+    if _PAGE_MARKER_RE.match(text):
         return True
 
     # 2. 常見頁碼格式 (例如: "59", "Page 10", "10 of 25", "- 10 -")
     # 設定長度限制 < 20
-    if len(text) < 20 and re.match(r'^[-—\s]*(page\s*)?\d+(\s*of\s*\d+)?[-—\s]*$', text, re.IGNORECASE):
+    if len(text) < 20 and _PAGE_NUMBER_RE.match(text):
         return True
 
     # 3. 常見學位論文/期刊頁首 (根據您的檔案範例)
     # 支援：NTPU, 碩士論文, Master Thesis, 學校名稱, 系所名稱
-    header_keywords = r'^(Master Thesis|碩士論文|Department of|National .* University|國立.*大學|.*研究所|NTPU|.*系\(?所\)?)$'
-    if re.match(header_keywords, text, re.IGNORECASE):
+    if _HEADER_KEYWORDS_RE.match(text):
         return True
 
     # 4. 版權頁尾 (Copyright footer) - 短的版權宣告
@@ -93,109 +100,292 @@ def is_page_noise(text):
             return True
 
     # 5. IEEE Xplore 下載宣告
-    if "authorized licensed use limited to" in text.lower() and "ieee xplore" in text.lower():
+    if "authorized licensed use limited to" in text_lower and "ieee xplore" in text_lower:
         return True
 
     return False
-def extract_reference_section_improved(paragraphs):
+
+# ===== 統計式頁首頁尾偵測 =====
+# 每頁只看最前、最後幾行（頁首頁尾的位置）
+RUNNING_LINE_EDGE = 3
+# 同一行出現在至少這個比例的頁面才算頁首頁尾
+RUNNING_LINE_MIN_RATIO = 0.25
+# 頁數太少時統計不可靠，不做判斷
+RUNNING_LINE_MIN_PAGES = 4
+
+_DIGITS_RE = re.compile(r'\d+')
+_SPACES_RE = re.compile(r'\s+')
+# 單獨成行的參考文獻編號（[9]、【12】、3.）：數字正規化後每頁都相同，不能當成頁首頁尾
+_REF_LABEL_LINE_RE = re.compile(r'^\s*(?:[\[【]\s*\d+\s*[】\]]|\d+\.)\s*$')
+
+def _running_line_key(text):
+    """頁首頁尾比對用的正規化：忽略大小寫、空白與數字（頁碼、下載時間每頁不同）"""
+    return _SPACES_RE.sub(' ', _DIGITS_RE.sub('#', text.strip().lower()))
+
+def running_line_threshold(page_count):
+    """頁首頁尾至少要出現的頁數；頁數太少、統計不可靠時回傳 None"""
+    if page_count < RUNNING_LINE_MIN_PAGES:
+        return None
+    return max(3, RUNNING_LINE_MIN_RATIO * page_count)
+
+def find_running_line_indices(paragraphs, page_numbers, total_pages=None):
     """
-    支援斷行標題 (陸、\\n參考文獻) 與子標題保留
+    文件層級的頁首頁尾偵測（一次 O(行數) 掃描）
+    - 統計每個正規化行出現在幾個不同頁面的頁首/頁尾位置
+    - 出現頁數達門檻者視為頁首頁尾（會自動抓到期刊專屬頁尾，不需寫死規則）
+    - 單獨成行的文獻編號（[9]、[19]…）不列入統計，否則正規化後同為 [#] 會被誤判
+    total_pages：只傳入部分頁面（尾端讀取）時提供整份文件的頁數，門檻依整份文件計算，
+                 這樣判定為頁首頁尾的行，整份讀取時也一定會判定（出現頁數只會更多）
+    回傳應排除的段落索引集合；沒有頁面資訊（DOCX）或頁數太少時回傳空集合
+    """
+    if not page_numbers or len(page_numbers) != len(paragraphs):
+        return set()
+
+    # 每頁的段落索引範圍 (頁碼已依序排列)
+    page_spans = []
+    start = 0
+    for i in range(1, len(page_numbers) + 1):
+        if i == len(page_numbers) or page_numbers[i] != page_numbers[start]:
+            page_spans.append((start, i))
+            start = i
+
+    threshold = running_line_threshold(total_pages or len(page_spans))
+    if threshold is None:
+        return set()
+
+    # 只計算頁首頁尾位置的行；記錄各 key 出現在哪些段落
+    key_pages = {}
+    key_indices = {}
+    for page_idx, (start, stop) in enumerate(page_spans):
+        edge = set(range(start, min(stop, start + RUNNING_LINE_EDGE)))
+        edge.update(range(max(start, stop - RUNNING_LINE_EDGE), stop))
+        for i in edge:
+            if _REF_LABEL_LINE_RE.match(paragraphs[i]):
+                continue
+            key = _running_line_key(paragraphs[i])
+            key_pages.setdefault(key, set()).add(page_idx)
+            key_indices.setdefault(key, []).append(i)
+
+    noise_indices = set()
+    for key, pages in key_pages.items():
+        if len(pages) >= threshold:
+            noise_indices.update(key_indices[key])
+    return noise_indices
+
+def find_reference_heading(paragraphs, lo=0, hi=None):
+    """
+    在 paragraphs[lo:hi] 範圍內由後往前尋找參考文獻標題
+    (斷行標題的下一行可以落在範圍外，仍以完整 paragraphs 判斷)
+    回傳 (標題索引, 標題文字)，找不到時為 (-1, None)
     """
-    ref_start_index = -1
-    ref_keyword = None
-    
-    # --- 步驟 1: 尋找標題 (由後往前找，避免抓到目錄) ---
     n = len(paragraphs)
-    for i in range(n - 1, -1, -1):
+    if hi is None:
+        hi = n
+    for i in range(hi - 1, lo - 1, -1):
         para = paragraphs[i].strip()
         if not para: continue
-        
+
         # 情況 A: 標準單行標題
         if is_reference_heading_flexible(para):
-            ref_start_index = i
-            ref_keyword = para
-            break
-            
+            return i, para
+
         # 情況 B: 斷行標題
         if i + 1 < n:
             next_para = paragraphs[i+1].strip()
             if is_pure_prefix(para) and is_pure_keyword(next_para):
-                ref_start_index = i
-                ref_keyword = para + " " + next_para
-                break
+                return i, para + " " + next_para
 
+    return -1, None
+
+# 參考文獻區段結束（附錄、作者簡介、致謝等）
+_REF_STOP_RE = re.compile(r'^([0-9\.]+|[ivxlcdm]+|[一二三四五六七八九十]+)?\s*[\.\、\s]*(biography|about the author|acknowledgments?|index|declaration|copyright|作者簡介|致謝|誌謝|索引|著作權聲明|論文著作權)', re.IGNORECASE)
+_BARE_PAGE_NUMBER_RE = re.compile(r'^\d{1,3}\s*$')
+
+def build_section_map(paragraphs, noise_indices=None):
+    """
+    單次掃描建立文件區段地圖，供後續階段與 Streamlit rerun 重複使用
+    回傳 dict：
+      heading_index   參考文獻標題索引（-1 表示找不到）
+      heading_keyword 標題文字
+      ref_start       開始擷取參考文獻的索引（跳過標題與斷行標題的關鍵字行）
+      stop_index      遇到附錄/作者簡介等而停止的索引（沒有則為段落總數）
+      ref_indices     實際保留為參考文獻的段落索引
+      noise_indices   頁首頁尾段落索引（內文與參考文獻都排除）
+    """
+    noise_indices = set(noise_indices or ())
+    n = len(paragraphs)
+    section_map = {
+        'heading_index': -1,
+        'heading_keyword': None,
+        'ref_start': n,
+        'stop_index': n,
+        'ref_indices': [],
+        'noise_indices': noise_indices,
+    }
+
+    # --- 步驟 1: 尋找標題 (由後往前找，避免抓到目錄) ---
+    ref_start_index, ref_keyword = find_reference_heading(paragraphs)
     if ref_start_index == -1:
-        return [], None, "未找到參考文獻區段"
+        return section_map
+    section_map['heading_index'] = ref_start_index
+    section_map['heading_keyword'] = ref_keyword
 
     # --- 步驟 2: 提取內容 ---
-    final_refs = []
-    
     # 設定開始抓取的下一行
     start_capture_idx = ref_start_index + 1
     
     # 如果是斷行標題 (情況 B)，下一行是 "參考文獻" 關鍵字，也要跳過
     if start_capture_idx < n and is_pure_keyword(paragraphs[start_capture_idx]):
         start_capture_idx += 1
+    section_map['ref_start'] = start_capture_idx
 
+    ref_indices = section_map['ref_indices']
     for i in range(start_capture_idx, n):
         para = paragraphs[i].strip()
         
         if not para: continue
         
-        if is_page_noise(para):
+        if i in noise_indices or is_page_noise(para):
             continue
         # 1. 遇到附錄或作者簡介 -> 停止
-        stop_keywords = r'(biography|about the author|acknowledgments?|index|declaration|copyright|作者簡介|致謝|誌謝|索引|著作權聲明|論文著作權)'
-        if is_appendix_heading(para) or re.match(r'^([0-9\.]+|[ivxlcdm]+|[一二三四五六七八九十]+)?\s*[\.\、\s]*' + stop_keywords, para, re.IGNORECASE):
+        if is_appendix_heading(para) or _REF_STOP_RE.match(para):
+            section_map['stop_index'] = i
             break    
         # 2. 過濾掉重複的參考文獻標題 (跨頁頁眉)
         if is_reference_heading_flexible(para):
             continue
 
         # 3. 過濾掉單獨的頁碼 (如 "59", "60")
-        if re.match(r'^\d{1,3}\s*$', para):
+        if _BARE_PAGE_NUMBER_RE.match(para):
             continue
 
-        final_refs.append(para)
+        ref_indices.append(i)
+
+    return section_map
+
+def reference_paragraphs_from_map(paragraphs, section_map):
+    """依區段地圖取出參考文獻段落"""
+    return [paragraphs[i].strip() for i in section_map['ref_indices']]
 
+_CJK_CHAR_RE = re.compile(r'[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]')
+
+def _join_layout_line(prev, line):
+    """中文接中文直接相連，其餘以空白相接"""
+    if _CJK_CHAR_RE.match(prev[-1:]) and _CJK_CHAR_RE.match(line[:1]):
+        return prev + line
+    return prev + " " + line
+
+def group_reference_lines_by_layout(paragraphs, ref_indices, line_joins):
+    """
+    依版面資訊（file_reader.read_pdf_document 的 line_joins）預先把參考文獻的續行併回條目
+    只在相鄰的兩行之間合併：中間若有被排除的頁首頁尾或跨頁，一律不併，
+    留給後面的 APA/IEEE merger 以文字規則處理，因此結果只會比純文字合併更保守
+    上一行以連字號結尾時也不併：斷字或 URL/DOI 斷行要保留還是去掉連字號，由各格式的 merger 決定
+    """
+    grouped = []
+    prev_idx = None
+    for i in ref_indices:
+        line = paragraphs[i].strip()
+        if grouped and line_joins[i] and i == prev_idx + 1 and not grouped[-1].endswith('-'):
+            grouped[-1] = _join_layout_line(grouped[-1], line)
+        else:
+            grouped.append(line)
+        prev_idx = i
+    return grouped
+
+def extract_reference_section_improved(paragraphs, noise_indices=None):
+    """
+    支援斷行標題 (陸、\\n參考文獻) 與子標題保留
+    noise_indices：find_running_line_indices 偵測到的頁首頁尾段落索引，擷取時直接略過
+    """
+    section_map = build_section_map(paragraphs, noise_indices)
+    if section_map['heading_index'] == -1:
+        return [], None, "未找到參考文獻區段"
+
+    final_refs = reference_paragraphs_from_map(paragraphs, section_map)
+    return final_refs, section_map['heading_keyword'], "增強版標題識別(含斷行)"
+
+def extract_reference_section_tail_first(pages_from_end):
+    """
+    尾端優先模式：只需要參考文獻時使用
+    pages_from_end 為由最後一頁往前的 (頁碼, 文字行列表[, 續行標記列表])：
+    - 三元組（PDF 版面模式）：第一個產出的頁碼即總頁數；頁首頁尾偵測的門檻依總頁數計算
+      （不以讀到的少數幾頁重新估計），並依續行標記合併條目
+    - 二元組（DOCX 的假分頁）：沒有頁面資訊，不做頁首頁尾偵測
+    逐頁往前讀取直到找到參考文獻標題就停止，前面的內文頁不會被抽取；
+    PDF 至少讀取門檻頁數，出現在這些頁的頁首頁尾才能被偵測。
+    移除的頁首頁尾必定也是整份讀取時會移除的；頁首頁尾出現在所有讀到的頁時，結果與整份讀取相同
+    """
+    pages = []             # 由後往前讀到的頁：(頁碼, 文字行列表, 續行標記列表或 None)
+    total_pages = None
+    min_pages = 1
+    next_first_line = []   # 後一頁（上一輪讀到的頁）的第一行，斷行標題的關鍵字可能在那裡
+    heading_found = False
+    for page in pages_from_end:
+        page_no, page_lines = page[0], list(page[1])
+        joins = list(page[2]) if len(page) > 2 else None
+        if not pages and joins is not None:
+            total_pages = page_no
+            threshold = running_line_threshold(total_pages)
+            min_pages = math.ceil(threshold) if threshold else 1
+        pages.append((page_no, page_lines, joins))
+
+        # 後面的頁已確認沒有標題，只需檢查新加入的這一頁
+        if not heading_found:
+            window = page_lines + next_first_line
+            heading_found = find_reference_heading(window, 0, len(page_lines))[0] != -1
+        if page_lines:
+            next_first_line = page_lines[:1]
+        if heading_found and len(pages) >= min_pages:
+            break
+
+    pages.reverse()
+    lines = [line for _, page_lines, _ in pages for line in page_lines]
+    if total_pages is None:
+        return extract_reference_section_improved(lines)
+
+    page_numbers = [page_no for page_no, page_lines, _ in pages for _ in page_lines]
+    line_joins = [j for _, _, joins in pages for j in joins]
+    noise_indices = find_running_line_indices(lines, page_numbers, total_pages=total_pages)
+    section_map = build_section_map(lines, noise_indices)
+    if section_map['heading_index'] == -1:
+        return [], None, "未找到參考文獻區段"
+    _, final_refs, _, ref_keyword = classify_document_sections(
+        lines, section_map=section_map, line_joins=line_joins
+    )
     return final_refs, ref_keyword, "增強版標題識別(含斷行)"
 
 def extract_reference_section(paragraphs):
     return extract_reference_section_improved(paragraphs)
 
-def classify_document_sections(paragraphs):
+def classify_document_sections(paragraphs, noise_indices=None, section_map=None, line_joins=None):
     """
     將文件分為內文段落和參考文獻段落
     使用與 extract_reference_section_improved 一致的寬鬆判斷邏輯
+    noise_indices：頁首頁尾段落索引，內文與參考文獻兩邊都會排除
+    section_map：已建立的區段地圖（build_section_map），提供時不再重新掃描
+    line_joins：PDF 版面模式的續行標記，提供時參考文獻段落會先依版面併成條目
     """
-    # 1. 先嘗試提取參考文獻
-    ref_paragraphs, ref_keyword, method = extract_reference_section_improved(paragraphs)
+    if section_map is None:
+        section_map = build_section_map(paragraphs, noise_indices)
+    noise_indices = section_map['noise_indices']
+
+    if line_joins is not None:
+        ref_paragraphs = group_reference_lines_by_layout(
+            paragraphs, section_map['ref_indices'], line_joins
+        )
+    else:
+        ref_paragraphs = reference_paragraphs_from_map(paragraphs, section_map)
     
     if not ref_paragraphs:
+        if noise_indices:
+            paragraphs = [p for i, p in enumerate(paragraphs) if i not in noise_indices]
         return paragraphs, [], None, None
     
-    # 2. 尋找最佳切分點 (Split Index)
-    best_index = len(paragraphs) 
-    
-    # 由後往前找，找到「最後一個」符合我們萬用標題邏輯的地方
-    n = len(paragraphs)
-    for i in range(n - 1, -1, -1):
-        para = paragraphs[i].strip()
-        if not para: continue
-        
-        if is_reference_heading_flexible(para):
-            best_index = i
-            break
-            
-        # 斷行標題判斷
-        if i + 1 < n:
-            next_para = paragraphs[i+1].strip()
-            if is_pure_prefix(para) and is_pure_keyword(next_para):
-                best_index = i
-                break
+    # 切分點就是最後一個參考文獻標題（與擷取時找到的標題相同，不需再掃描一次）
+    best_index = section_map['heading_index']
 
-    # 3. 執行切分
-    content_paragraphs = paragraphs[:best_index]
+    # 執行切分（同時排除頁首頁尾）
+    content_paragraphs = [p for i, p in enumerate(paragraphs[:best_index]) if i not in noise_indices]
     
-    return content_paragraphs, ref_paragraphs, best_index, ref_keyword
-
+    return content_paragraphs, ref_paragraphs, best_index, section_map['heading_keyword']